@@ -1,3 +1,6 @@
+import sys
+from collections import deque
+
 class Agent:
     def __init__(self, name, role, age, personality, x, y, vision_radius=5):
         self.name = name
@@ -11,6 +14,10 @@ class Agent:
         self.daily_plan = ""      # To store the agent's overall daily plan.
         self.daily_plan_date = None  # Date of the current daily plan.
         self.speech = ""          # The last generated one-sentence speech.
+        self.move_queue = deque()     # Remaining moves of a multi-step action plan.
+        self.seen_agents = set()      # Names of agents in view last tick.
+        self.plan_directives = set()  # Overseer directives the current plan already accounts for.
+        self.spatial_index = None     # Shared SpatialIndex of agent positions, if any.
 
     def get_location(self):
         return self.x, self.y
@@ -25,6 +32,15 @@ class Agent:
             self.x -= 1 
         elif direction == "right":
             self.x += 1
+        if self.spatial_index is not None:
+            self.spatial_index.move(self, self.x, self.y)
+
+    def queue_moves(self, moves):
+        # replace any remaining plan with these moves (consumed one per tick)
+        self.move_queue = deque(moves)
+
+    def clear_moves(self):
+        self.move_queue.clear()
 
     def update_relationship(self, other_agent, delta):
         # Update the relationship status between agents
@@ -36,7 +52,8 @@ class Agent:
         # Clamp
         new_value = max(-100, min(new_value, 100))
         self.relationships[other_agent.name] = new_value
-        print(f"{self.name}'s relationship with {other_agent.name} updated to {new_value}")
+        print(f"{self.name}'s relationship with {other_agent.name} updated to {new_value}",
+              file=sys.stderr)
 
     def get_visible_entities(self, game_map, other_agents):
         # scan the surrounding area in vision_radius
@@ -46,14 +63,20 @@ class Agent:
         x0, y0 = self.x, self.y
         radius = self.vision_radius
         
-        # Scan the grid for key (non-Grass) tiles.
-        for y in range(max(0, y0 - radius), min(game_map.height, y0 + radius + 1)):
-            for x in range(max(0, x0 - radius), min(game_map.width, x0 + radius + 1)):
-                tile = game_map.grid[y][x]
-                if tile.tile_type != "Grass":  # Only add non-grass tiles.
-                    visible['tiles'].append((tile.tile_type, (x, y)))
+        # Key (non-Grass) tiles, from the map's precomputed index when it has one.
+        if hasattr(game_map, "visible_tiles"):
+            visible['tiles'].extend(game_map.visible_tiles(x0, y0, radius))
+        else:
+            for y in range(max(0, y0 - radius), min(game_map.height, y0 + radius + 1)):
+                for x in range(max(0, x0 - radius), min(game_map.width, x0 + radius + 1)):
+                    tile = game_map.grid[y][x]
+                    if tile.tile_type != "Grass":  # Only add non-grass tiles.
+                        visible['tiles'].append((tile.tile_type, (x, y)))
         
         # Include nearby agents (other than self), along with their speech.
+        # With a spatial index only agents in nearby cells are checked.
+        if self.spatial_index is not None:
+            other_agents = self.spatial_index.query(x0, y0, radius)
         for agent in other_agents:
             if agent is self:
                 continue
@@ -0,0 +1,5 @@
+# benchmarks/__init__.py
+# Standalone performance scripts, run as modules:
+#   python -m GenerativeAgents.benchmarks.vision
+#   python -m GenerativeAgents.benchmarks.suite --out bench.json
+#   python -m GenerativeAgents.benchmarks.compare base.json bench.json
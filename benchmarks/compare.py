@@ -0,0 +1,82 @@
+# benchmarks/compare.py
+# Compare two benchmarks.suite JSON files, eg from two commits:
+#   python -m GenerativeAgents.benchmarks.compare base.json new.json --threshold 0.1
+# Cases are matched on (agents, map, mode, latency). Exits with status 1
+# when any metric got worse by more than the threshold, so it can gate CI.
+
+import sys
+import json
+import argparse
+
+# metric -> True when bigger is better
+METRICS = {"ticks_per_s": True, "peak_mb": False, "traced_peak_mb": False}
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("environment", {}), {
+        (r["agents"], r["map"], r["mode"], r["latency"]): r for r in data["results"]}
+
+
+def metrics(result):
+    out = {name: result.get(name) for name in METRICS}
+    for phase, secs in result.get("phases", {}).items():
+        out[f"{phase}_s"] = secs
+    return out
+
+
+def compare(base, new, threshold=0.1, min_seconds=1e-3):
+    # -> rows of (case, metric, base value, new value, change, regressed);
+    # phases shorter than min_seconds in both runs are timer noise, skipped
+    rows = []
+    for case in sorted(base.keys() & new.keys()):
+        a, b = metrics(base[case]), metrics(new[case])
+        for name in a:
+            if name not in b or not a[name] or b[name] is None:
+                continue
+            if name.endswith("_s") and max(a[name], b[name]) < min_seconds:
+                continue
+            change = (b[name] - a[name]) / a[name]
+            higher_is_better = METRICS.get(name, False)
+            worse = -change if higher_is_better else change
+            rows.append((case, name, a[name], b[name], change, worse > threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="relative change that counts as a regression (0.1 = 10%%)")
+    parser.add_argument("--min-seconds", type=float, default=1e-3,
+                        help="ignore phases shorter than this in both runs")
+    parser.add_argument("--all", action="store_true", help="show unchanged metrics too")
+    args = parser.parse_args(argv)
+
+    base_env, base = load(args.base)
+    new_env, new = load(args.new)
+    print(f"base {base_env.get('commit') or args.base}  new {new_env.get('commit') or args.new}")
+    for case in sorted(base.keys() ^ new.keys()):
+        print(f"only in {'base' if case in base else 'new'}: {case}")
+
+    rows = compare(base, new, args.threshold, args.min_seconds)
+    regressions = 0
+    last = None
+    for case, name, a, b, change, regressed in rows:
+        if not (args.all or regressed or abs(change) > args.threshold):
+            continue
+        if case != last:
+            agents, size, mode, latency = case
+            print(f"\n{agents} agents, {size}, {mode}, latency {latency}")
+            last = case
+        mark = "REGRESSION" if regressed else ""
+        print(f"  {name:<22} {a:>12.4g} -> {b:>12.4g}  {change:+7.1%}  {mark}")
+        regressions += regressed
+    print(f"\n{regressions} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
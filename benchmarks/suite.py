@@ -0,0 +1,335 @@
+# benchmarks/suite.py
+# End-to-end benchmark: whole ticks against the stub LLM backend, plus the
+# UI-side work (map compositing, speech log layout), for a grid of agent
+# counts and map sizes. Results go to JSON so runs can be compared between
+# commits with benchmarks.compare.
+#   python -m GenerativeAgents.benchmarks.suite --agents 8 100 1000 10000 --out bench.json
+#   python -m GenerativeAgents.benchmarks.suite --agents 100 --maps 1x1 10x10 --latency uniform:0.01,0.05
+#
+# Maps are the town layout tiled NxM ("auto" grows it with the agent count,
+# at least 160 tiles per agent), or a map file / bundled layout name.
+#
+# Phase times are per tick and inclusive (llm is part of agents, which is
+# part of step). Phases that run on worker threads are summed over threads,
+# so they can add up to more than the tick's wall time.
+#
+# Each case runs in a fresh process. peak_mb is that process's peak RSS
+# (where the OS reports it); traced_peak_mb is the peak of Python
+# allocations from a separate tracemalloc pass, which is only run up to
+# --trace-max agents because tracing costs several times the memory it sees.
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import contextlib
+import threading
+import subprocess
+import tracemalloc
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+from GenerativeAgents.llm import llm
+from GenerativeAgents.environment.map import Map
+from GenerativeAgents.environment import render_cache
+from GenerativeAgents.simulation.scenario import DEFAULT_AGENT_SPECS, build_simulation
+from GenerativeAgents.ui.renderer import TextLayoutCache, wrap_pixel
+
+MODES = ("threads", "async", "pipelined", "batch")
+
+
+class _Phases:
+    # accumulates wall time of wrapped callables, from any thread
+    def __init__(self):
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def wrap(self, obj, attr, name):
+        fn = getattr(obj, attr)
+        if asyncio.iscoroutinefunction(fn):
+            async def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.add(name, time.perf_counter() - started)
+        else:
+            def timed(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.add(name, time.perf_counter() - started)
+        setattr(obj, attr, timed)
+        return fn
+
+    def reset(self):
+        with self._lock:
+            self.totals = {}
+
+
+class _Font:
+    # stands in for tkFont.Font without a display: fixed-pitch-ish widths
+    # plus a small cost per call, like a Tk round trip
+    def __init__(self, name, cost=20e-6):
+        self.name, self.cost = name, cost
+
+    def __str__(self):
+        return self.name
+
+    def measure(self, text):
+        end = time.perf_counter() + self.cost
+        while time.perf_counter() < end:
+            pass
+        return sum(6 + (ord(c) & 3) for c in text)
+
+
+def make_map(spec, agents):
+    # "auto", "NxM" (town tiled), or a map file / layout name
+    if spec == "auto":
+        town = Map(storage="array")
+        n = 1
+        while (n * town.width) * (n * town.height) < agents * 160:
+            n += 1
+        spec = f"{n}x{n}"
+    if "x" in spec and all(p.isdigit() for p in spec.lower().split("x")):
+        nx, ny = (int(p) for p in spec.lower().split("x"))
+        town = Map(storage="array")
+        out = Map(town.width * nx, town.height * ny, layout=None, storage="array")
+        for j in range(ny):
+            for i in range(nx):
+                out.load_layout(town, i * town.width, j * town.height)
+        return out
+    return Map.from_file(spec, storage="array")
+
+
+def make_specs(count, game_map, seed=0):
+    # the town roster's roles and personalities, on random walkable tiles
+    rng = random.Random(seed)
+    walkable = [(x, y) for y in range(game_map.height) for x in range(game_map.width)
+                if game_map.is_walkable(x, y)]
+    spots = rng.sample(walkable, min(count, len(walkable)))
+    specs = []
+    for i in range(count):
+        _, role, age, personality, *_ = DEFAULT_AGENT_SPECS[i % len(DEFAULT_AGENT_SPECS)]
+        x, y = spots[i % len(spots)]
+        specs.append({"name": f"Agent{i}", "role": role, "age": age,
+                      "personality": personality, "x": x, "y": y})
+    return specs
+
+
+def build(count, map_spec, mode, plan_horizon, seed):
+    game_map = make_map(map_spec, count)
+    sim = build_simulation(make_specs(count, game_map, seed),
+                           start_time="2025-06-01T06:00",
+                           environment=game_map,
+                           batch_planning=mode == "batch",
+                           pipelined=mode == "pipelined",
+                           plan_horizon=plan_horizon)
+    return sim
+
+
+def instrument(sim, phases):
+    phases.wrap(sim, "update_daily_plans", "daily_plans")
+    phases.wrap(sim, "update_daily_plans_async", "daily_plans")
+    phases.wrap(sim, "_update_agents_threaded", "agents")
+    phases.wrap(sim, "_update_agents_gathered", "agents")
+    phases.wrap(sim, "update_agents_batched", "agents")
+    phases.wrap(sim, "update_agents_batched_async", "agents")
+    phases.wrap(sim, "_parse_action_plan", "parse")
+    phases.wrap(sim, "_legal_moves", "validation")
+    for ag in sim.agents:
+        phases.wrap(ag, "get_visible_entities", "vision")
+    # llm round trips, stub latency included
+    originals = (phases.wrap(llm, "_complete", "llm"), phases.wrap(llm, "_acomplete", "llm"))
+    return originals
+
+
+def run_ticks(sim, mode, ticks, phases, quiet=True):
+    # agents print every relationship change; that is not what is measured
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull if quiet else sys.stdout), \
+            contextlib.redirect_stderr(devnull if quiet else sys.stderr):
+        _run_ticks(sim, mode, ticks, phases)
+
+
+def _run_ticks(sim, mode, ticks, phases):
+    if mode == "async":
+        async def go():
+            for _ in range(ticks):
+                started = time.perf_counter()
+                await sim.step_async()
+                phases.add("step", time.perf_counter() - started)
+            await llm.close_async_client()
+        asyncio.run(go())
+    else:
+        for _ in range(ticks):
+            started = time.perf_counter()
+            sim.step()
+            phases.add("step", time.perf_counter() - started)
+
+
+def bench_ui(sim, view=(40, 23), tile_size=32, frames=5):
+    # one frame's worth of UI-side work: the background for a window of
+    # view tiles, and the speech log layout for every agent (first layout,
+    # then an unchanged tick served from the cache, then uncached wrap_pixel)
+    out = {}
+    game_map = sim.environment
+    region = (0, 0, min(view[0], game_map.width), min(view[1], game_map.height))
+    render_cache.compose(game_map, tile_size, region)          # warm the atlas
+    started = time.perf_counter()
+    for _ in range(frames):
+        render_cache.compose(game_map, tile_size, region)
+    out["render_compose"] = (time.perf_counter() - started) / frames
+
+    font = _Font("normal")
+    msgs = [ag.speech or f"{ag.name} is thinking about the day ahead." for ag in sim.agents]
+    cache = TextLayoutCache()
+    started = time.perf_counter()
+    for text in msgs:
+        cache.wrap(text, 620, font)
+    out["text_layout"] = time.perf_counter() - started
+    started = time.perf_counter()
+    for text in msgs:
+        cache.wrap(text, 620, font)
+    out["text_layout_cached"] = time.perf_counter() - started
+    sample = msgs[:200]
+    started = time.perf_counter()
+    for text in sample:
+        wrap_pixel(text, 620, font)
+    out["wrap_pixel"] = (time.perf_counter() - started) * len(msgs) / max(1, len(sample))
+    return out
+
+
+def peak_rss_mb():
+    # this process's peak resident set, or None where resource is missing
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def bench(count, map_spec="auto", ticks=5, mode="threads", latency="0",
+          plan_horizon=1, seed=0, trace_max=2000):
+    llm.set_backend("stub", latency=latency, seed=seed)
+    llm.configure_cache(max_entries=0)         # every call goes to the backend
+    llm.telemetry.reset()
+    phases = _Phases()
+
+    started = time.perf_counter()
+    sim = build(count, map_spec, mode, plan_horizon, seed)
+    build_s = time.perf_counter() - started
+    originals = instrument(sim, phases)
+    try:
+        run_ticks(sim, mode, ticks, phases)
+    finally:
+        llm._complete, llm._acomplete = originals
+        sim.close()
+    totals = phases.totals
+    step_s = totals.get("step", 0.0)
+    result = {
+        "agents": count,
+        "map": f"{sim.environment.width}x{sim.environment.height}",
+        "mode": mode,
+        "latency": str(latency),
+        "ticks": ticks,
+        "build_s": build_s,
+        "ticks_per_s": ticks / step_s if step_s else None,
+        "phases": {name: secs / ticks for name, secs in sorted(totals.items())},
+        "llm_calls": llm.telemetry.summary().get("calls"),
+    }
+    result["phases"].update(bench_ui(sim))
+    result["peak_mb"] = peak_rss_mb()
+
+    if count <= trace_max:
+        # separate pass: tracemalloc slows everything it watches
+        del sim
+        tracemalloc.start()
+        sim = build(count, map_spec, mode, plan_horizon, seed)
+        try:
+            run_ticks(sim, mode, min(ticks, 2), _Phases())
+        finally:
+            sim.close()
+        result["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+    return result
+
+
+def bench_isolated(*args, **kwargs):
+    # bench in a fresh process, so peak memory and caches are per case
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(bench, *args, **kwargs).result()
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                capture_output=True, text=True, timeout=10,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "commit": commit or None,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ticks, phases and memory on the stub LLM")
+    parser.add_argument("--agents", type=int, nargs="+", default=[8, 100, 1000])
+    parser.add_argument("--maps", nargs="+", default=["auto"],
+                        help="auto, NxM (town tiled), or map files / layout names")
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--mode", choices=MODES, default="threads")
+    parser.add_argument("--latency", default="0", help="stub latency spec, eg uniform:0.01,0.05")
+    parser.add_argument("--plan-horizon", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trace-max", type=int, default=2000,
+                        help="largest agent count that gets a tracemalloc pass (0: none)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="run every case in this process (peak_mb then covers all of them)")
+    parser.add_argument("--out", help="write results as JSON (compare with benchmarks.compare)")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'agents':>7} {'map':>9} {'ticks/s':>9} {'step ms':>9} {'vision ms':>10} "
+          f"{'llm ms':>9} {'render ms':>10} {'peak MB':>8}")
+    for map_spec in args.maps:
+        for count in args.agents:
+            run = bench if args.in_process else bench_isolated
+            r = run(count, map_spec, args.ticks, args.mode, args.latency,
+                    args.plan_horizon, args.seed, args.trace_max)
+            results.append(r)
+            p = r["phases"]
+            peak = f"{r['peak_mb']:8.1f}" if r["peak_mb"] is not None else f"{'-':>8}"
+            print(f"{r['agents']:>7} {r['map']:>9} {r['ticks_per_s'] or 0:>9.2f} "
+                  f"{p.get('step', 0) * 1000:>9.1f} {p.get('vision', 0) * 1000:>10.1f} "
+                  f"{p.get('llm', 0) * 1000:>9.1f} {p['render_compose'] * 1000:>10.1f} {peak}",
+                  flush=True)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment_info(),
+                       "args": vars(args),
+                       "results": results}, f, indent=1)
+        print(f"wrote {args.out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
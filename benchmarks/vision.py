@@ -0,0 +1,87 @@
+# benchmarks/vision.py
+# Agent.get_visible_entities cost per tick, brute-force scan vs SpatialIndex.
+#   python -m GenerativeAgents.benchmarks.vision --counts 100 1000 10000
+#
+# The world grows with the agent count so density stays fixed (the town's
+# 8 agents on 48x27 is roughly one agent per 160 tiles). The brute-force
+# side is O(N) per agent, so at large N only a sample of agents is timed
+# and the per-tick figure is extrapolated.
+
+import time
+import random
+import argparse
+from types import SimpleNamespace
+
+from GenerativeAgents.agents.agent import Agent
+from GenerativeAgents.environment.spatial import SpatialIndex
+
+
+class _Field:
+    # an all-grass map of any size without loading tile images
+    def __init__(self, width, height):
+        grass = SimpleNamespace(tile_type="Grass")
+        self.width = width
+        self.height = height
+        self.grid = [[grass] * width for _ in range(height)]
+
+
+def make_world(count, tiles_per_agent=160, vision_radius=5, seed=0):
+    side = max(vision_radius * 2 + 1, int((count * tiles_per_agent) ** 0.5))
+    rng = random.Random(seed)
+    agents = [Agent(f"A{i}", "Farmer", 30, "Calm",
+                    rng.randrange(side), rng.randrange(side), vision_radius=vision_radius)
+              for i in range(count)]
+    return _Field(side, side), agents
+
+
+def time_tick(game_map, agents, sample):
+    # seconds to compute vision for every agent, extrapolated from `sample`
+    started = time.perf_counter()
+    for ag in sample:
+        ag.get_visible_entities(game_map, agents)
+    return (time.perf_counter() - started) * len(agents) / len(sample)
+
+
+def bench(count, max_brute_calls=2_000_000, seed=0):
+    game_map, agents = make_world(count, seed=seed)
+    rng = random.Random(seed)
+    sample = agents if count * count <= max_brute_calls else \
+        rng.sample(agents, max(1, max_brute_calls // count))
+
+    brute = time_tick(game_map, agents, sample)
+
+    index = SpatialIndex(cell_size=agents[0].vision_radius)
+    for ag in agents:
+        index.insert(ag, ag.x, ag.y)
+        ag.spatial_index = index
+    indexed = time_tick(game_map, agents, agents)
+
+    # the index must not change what agents see
+    for ag in sample[:50]:
+        seen = ag.get_visible_entities(game_map, agents)
+        ag.spatial_index = None
+        assert seen == ag.get_visible_entities(game_map, agents)
+        ag.spatial_index = index
+
+    return {"agents": count, "map": f"{game_map.width}x{game_map.height}",
+            "brute_s": brute, "indexed_s": indexed,
+            "sampled": len(sample) < count}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark agent vision queries")
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    print(f"{'agents':>7} {'map':>9} {'brute s/tick':>13} {'indexed s/tick':>15} {'speedup':>8}")
+    for count in args.counts:
+        r = bench(count, seed=args.seed)
+        mark = "*" if r["sampled"] else " "
+        print(f"{r['agents']:>7} {r['map']:>9} {r['brute_s']:>12.4f}{mark} "
+              f"{r['indexed_s']:>15.4f} {r['brute_s'] / r['indexed_s']:>7.1f}x")
+    print("* extrapolated from a sample of agents")
+
+
+if __name__ == "__main__":
+    main()
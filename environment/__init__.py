@@ -1,2 +1,3 @@
 from .tile import *
-from .map import Map
\ No newline at end of file
+from .map import Map
+from .spatial import SpatialIndex
\ No newline at end of file
@@ -0,0 +1,224 @@
+# environment/atlas.py
+# Texture atlases for the UI. Every sprite-sized image under assets/ (tiles
+# and agents) is scaled to a size and packed into one sheet per size. The
+# sheets are built in a thread pool, each source image decoded once for all
+# sizes asked for together, and saved in the render cache directory keyed
+# by the source files' mtimes, so later starts only load a few small PNGs.
+# Report cold and warm load times with:
+#   python -m GenerativeAgents.environment.atlas --sizes 8 16 32 64
+
+import os
+import math
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .tile import ASSETS_DIR
+
+# also used by render_cache; GA_RENDER_CACHE="" turns the disk cache off
+CACHE_DIR = os.getenv("GA_RENDER_CACHE",
+                      os.path.join(os.path.expanduser("~"), ".cache", "generative_agents", "render"))
+
+SKIP = {"background"}        # assets that are not square sprites
+ATLAS_VERSION = 1
+
+_atlases = {}                # size -> Atlas
+_lock = threading.RLock()
+
+
+def sources():
+    # key (lower-case file stem, eg "grass", "ada") -> png path
+    found = {}
+    for fn in sorted(os.listdir(ASSETS_DIR)):
+        stem, ext = os.path.splitext(fn)
+        if ext.lower() == ".png" and stem.lower() not in SKIP:
+            found.setdefault(stem.lower(), os.path.join(ASSETS_DIR, fn))
+    return found
+
+
+def sources_stamp(srcs):
+    h = hashlib.sha256(f"v{ATLAS_VERSION};".encode())
+    for key, path in sorted(srcs.items()):
+        try:
+            st = os.stat(path)
+            h.update(f"{key}:{st.st_mtime_ns}:{st.st_size};".encode())
+        except OSError:
+            h.update(f"{key}:-;".encode())
+    return h.hexdigest()[:16]
+
+
+class Atlas:
+    # one sheet of size x size images, in sorted key order, row-major
+    def __init__(self, size, sheet, keys, origin="built", seconds=0.0):
+        self.size = size
+        self.sheet = sheet
+        self.keys = list(keys)
+        self.cols = max(1, math.ceil(math.sqrt(len(self.keys))))
+        self.slots = {key: i for i, key in enumerate(self.keys)}
+        self.origin = origin     # "built", "disk" or "memory"
+        self.seconds = seconds   # time the last get/prepare spent on it
+        self._images = {}
+
+    @classmethod
+    def pack(cls, size, images, **kwargs):
+        keys = sorted(images)
+        cols = max(1, math.ceil(math.sqrt(len(keys))))
+        rows = max(1, math.ceil(len(keys) / cols))
+        sheet = Image.new("RGBA", (cols * size, rows * size), (0, 0, 0, 0))
+        for i, key in enumerate(keys):
+            sheet.paste(images[key], ((i % cols) * size, (i // cols) * size))
+        return cls(size, sheet, keys, **kwargs)
+
+    def __contains__(self, key):
+        return key in self.slots
+
+    def box(self, key):
+        i = self.slots[key]
+        x, y = (i % self.cols) * self.size, (i // self.cols) * self.size
+        return x, y, x + self.size, y + self.size
+
+    def image(self, key):
+        # RGBA slice for key, or None when there is no such asset
+        if key not in self.slots:
+            return None
+        img = self._images.get(key)
+        if img is None:
+            img = self._images[key] = self.sheet.crop(self.box(key))
+        return img
+
+    def photo(self, key, master=None):
+        # a new Tk image of the slice (the caller keeps the reference, so
+        # images never outlive the Tk root they were made for)
+        from PIL import ImageTk
+        img = self.image(key)
+        return ImageTk.PhotoImage(img, master=master) if img is not None else None
+
+
+def _cache_path(size, stamp):
+    return os.path.join(CACHE_DIR, f"atlas_{stamp}_{size}.png") if CACHE_DIR else None
+
+
+def _scale(path, sizes):
+    # decode once, box-reduce to about 4x the largest size (cheap, and the
+    # sources are far bigger than any tile), then one resize per size
+    try:
+        with Image.open(path) as img:
+            img = img.convert("RGBA")
+    except OSError:
+        print(f"Error: Unable to load image from {path}")
+        return None
+    factor = min(img.size) // (max(sizes) * 4)
+    if factor > 1:
+        img = img.reduce(factor)
+    return {s: img.resize((s, s), Image.LANCZOS) for s in sizes}
+
+
+def prepare(sizes, workers=None):
+    # -> {size: Atlas}, from memory, the disk cache, or built in one pass
+    with _lock:
+        out, missing = {}, []
+        srcs = stamp = None
+        for size in dict.fromkeys(sizes):
+            started = time.perf_counter()
+            atlas = _atlases.get(size)
+            if atlas is not None:
+                atlas.origin, atlas.seconds = "memory", time.perf_counter() - started
+                out[size] = atlas
+                continue
+            if srcs is None:
+                srcs = sources()
+                stamp = sources_stamp(srcs)
+            path = _cache_path(size, stamp)
+            if path and os.path.exists(path):
+                try:
+                    with Image.open(path) as img:
+                        sheet = img.convert("RGBA")
+                    keys = sorted(srcs)
+                    out[size] = _atlases[size] = Atlas(
+                        size, sheet, keys, origin="disk", seconds=time.perf_counter() - started)
+                    continue
+                except OSError:
+                    pass
+            missing.append(size)
+
+        if missing:
+            started = time.perf_counter()
+            keys = sorted(srcs)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                scaled = list(pool.map(lambda k: _scale(srcs[k], missing), keys))
+            for size in missing:
+                images = {k: s[size] for k, s in zip(keys, scaled) if s is not None}
+                atlas = Atlas.pack(size, images, origin="built")
+                # a failed source is left out of this sheet, and of the cache
+                if len(images) == len(keys):
+                    _save(atlas.sheet, _cache_path(size, stamp))
+                atlas.seconds = time.perf_counter() - started
+                out[size] = _atlases[size] = atlas
+        return out
+
+
+def _save(sheet, path):
+    if not path:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        sheet.save(tmp, format="PNG")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def get_atlas(size):
+    return prepare((size,))[size]
+
+
+def clear():
+    # drop the in-memory atlases (the disk cache is kept)
+    with _lock:
+        _atlases.clear()
+
+
+def main(argv=None):
+    global CACHE_DIR
+    parser = argparse.ArgumentParser(description="Time cold and warm texture atlas loads")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    n = len(sources())
+    started = time.perf_counter()
+    for path in sources().values():
+        for size in args.sizes:
+            _scale(path, [size])
+    one_by_one = time.perf_counter() - started
+
+    saved, CACHE_DIR = CACHE_DIR, tempfile.mkdtemp(prefix="ga_atlas_")
+    try:
+        clear()
+        started = time.perf_counter()
+        prepare(args.sizes, args.workers)
+        cold = time.perf_counter() - started
+        clear()
+        started = time.perf_counter()
+        prepare(args.sizes, args.workers)
+        warm = time.perf_counter() - started
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        CACHE_DIR = saved
+        clear()
+
+    print(f"{n} images x sizes {args.sizes}")
+    print(f"one by one, no cache : {one_by_one * 1000:8.1f} ms")
+    print(f"atlas cold (pool)    : {cold * 1000:8.1f} ms")
+    print(f"atlas warm (disk)    : {warm * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
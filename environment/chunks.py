@@ -0,0 +1,199 @@
+# environment/chunks.py
+# Chunked world storage for maps too big to hold in memory: the binary map
+# file (see map_io) stays on disk behind a read-only mmap and is read in
+# chunk_size x chunk_size tiles on first access. Chunks near agents (the
+# active set) are kept; the rest are evicted least-recently-used once more
+# than max_chunks are loaded. Edited chunks stay in memory.
+
+import mmap
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from . import map_io
+from .tile import TILES_BY_ID, Grass, tile_class
+
+
+class Chunk:
+    __slots__ = ("x0", "y0", "width", "height", "ids", "dirty", "_features")
+
+    def __init__(self, x0, y0, width, height, ids):
+        self.x0, self.y0 = x0, y0
+        self.width, self.height = width, height
+        self.ids = ids               # bytearray of registry tile ids, row-major
+        self.dirty = False
+        self._features = None
+
+    def features(self):
+        # per local row: (sorted global xs, tile types) of non-grass tiles
+        if self._features is None:
+            grass, rows = Grass.tile_id, []
+            for y in range(self.height):
+                row = self.ids[y * self.width:(y + 1) * self.width]
+                xs = [self.x0 + x for x, t in enumerate(row) if t != grass]
+                rows.append((xs, [TILES_BY_ID[row[x - self.x0]].tile_type for x in xs]))
+            self._features = rows
+        return self._features
+
+
+class ChunkStore:
+    def __init__(self, path, chunk_size=32, max_chunks=256):
+        self.path = path
+        self.chunk_size = max(1, int(chunk_size))
+        self.max_chunks = max_chunks
+        self._file = open(path, "rb")
+        self.width, self.height, names, self.notes, self._offset = \
+            map_io.read_binary_header(self._file)
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        # file-local tile index -> registry tile id, as a bytes.translate table
+        local = [tile_class(name).tile_id for name in names]
+        self._lut = bytes(local + [0] * (256 - len(local)))
+        self._chunks = OrderedDict()     # (cx, cy) -> Chunk
+        self._lock = threading.RLock()
+        self.active = set()              # chunk keys that must not be evicted
+        self.loads = 0
+        self.evictions = 0
+
+    def chunk_of(self, x, y):
+        return x // self.chunk_size, y // self.chunk_size
+
+    def chunk(self, cx, cy):
+        key = (cx, cy)
+        with self._lock:
+            ch = self._chunks.get(key)
+            if ch is not None:
+                self._chunks.move_to_end(key)
+                return ch
+            ch = self._chunks[key] = self._load(cx, cy)
+            self.loads += 1
+            self._evict()
+            return ch
+
+    def _load(self, cx, cy):
+        cs = self.chunk_size
+        x0, y0 = cx * cs, cy * cs
+        w, h = min(cs, self.width - x0), min(cs, self.height - y0)
+        ids = bytearray()
+        for y in range(y0, y0 + h):
+            start = self._offset + y * self.width + x0
+            ids += self._mm[start:start + w].translate(self._lut)
+        return Chunk(x0, y0, w, h, ids)
+
+    def _evict(self):
+        # oldest first, skipping chunks agents are near or that hold edits
+        excess = len(self._chunks) - self.max_chunks
+        if excess <= 0:
+            return
+        for key in list(self._chunks):
+            if excess <= 0:
+                break
+            ch = self._chunks[key]
+            if key in self.active or ch.dirty:
+                continue
+            del self._chunks[key]
+            self.evictions += 1
+            excess -= 1
+
+    def set_active(self, keys):
+        with self._lock:
+            self.active = set(keys)
+            self._evict()
+
+    def tile_id(self, x, y):
+        ch = self.chunk(*self.chunk_of(x, y))
+        return ch.ids[(y - ch.y0) * ch.width + (x - ch.x0)]
+
+    def set_tile_id(self, x, y, tile_id):
+        with self._lock:
+            ch = self.chunk(*self.chunk_of(x, y))
+            ch.ids[(y - ch.y0) * ch.width + (x - ch.x0)] = tile_id
+            ch.dirty = True
+            ch._features = None
+
+    def row_ids(self, y, x0=0, x1=None):
+        # registry tile ids of row y (columns x0..x1-1), without loading
+        # chunks (edited chunks are read from memory, the rest straight from
+        # the file)
+        cs = self.chunk_size
+        x1 = self.width if x1 is None else x1
+        start = self._offset + y * self.width
+        row = bytearray(self._mm[start + x0:start + x1].translate(self._lut))
+        with self._lock:
+            for (cx, cy), ch in self._chunks.items():
+                if cy == y // cs and ch.dirty and ch.x0 < x1 and ch.x0 + ch.width > x0:
+                    lo, hi = max(x0, ch.x0), min(x1, ch.x0 + ch.width)
+                    i = (y - ch.y0) * ch.width - ch.x0
+                    row[lo - x0:hi - x0] = ch.ids[i + lo:i + hi]
+        return bytes(row)
+
+    def row_features(self, y, x_lo, x_hi):
+        # (tile_type, (x, y)) for non-grass tiles x_lo <= x <= x_hi in row y
+        found = []
+        cs = self.chunk_size
+        for cx in range(x_lo // cs, x_hi // cs + 1):
+            ch = self.chunk(cx, y // cs)
+            xs, types = ch.features()[y - ch.y0]
+            lo, hi = bisect_left(xs, x_lo), bisect_right(xs, x_hi)
+            found.extend((types[i], (xs[i], y)) for i in range(lo, hi))
+        return found
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": len(self._chunks),
+                "active": len(self.active),
+                "dirty": sum(ch.dirty for ch in self._chunks.values()),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "loaded_bytes": sum(len(ch.ids) for ch in self._chunks.values()),
+            }
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+class _ChunkRow:
+    __slots__ = ("_store", "_y")
+
+    def __init__(self, store, y):
+        self._store, self._y = store, y
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self._store.width
+        if not 0 <= x < self._store.width:
+            raise IndexError("grid column out of range")
+        return TILES_BY_ID[self._store.tile_id(x, self._y)]()
+
+    def __setitem__(self, x, tile):
+        self._store.set_tile_id(x, self._y, tile.tile_id)
+
+    def __len__(self):
+        return self._store.width
+
+    def __iter__(self):
+        for x in range(self._store.width):
+            yield self[x]
+
+
+class ChunkedGridView:
+    # grid[y][x] over a ChunkStore; each access goes through the chunk layer
+    __slots__ = ("_store",)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self._store.height
+        if not 0 <= y < self._store.height:
+            raise IndexError("grid row out of range")
+        return _ChunkRow(self._store, y)
+
+    def __len__(self):
+        return self._store.height
+
+    def __iter__(self):
+        for y in range(self._store.height):
+            yield _ChunkRow(self._store, y)
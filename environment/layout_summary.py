@@ -0,0 +1,197 @@
+# environment/layout_summary.py
+# Generates the map description the daily-plan prompt sends to the LLM:
+# connected regions per tile type with bounding boxes, largest first, cut
+# to a token budget. Results are cached by the map's content hash, so one
+# map is only analysed once however many Map objects or days ask for it.
+
+import threading
+from itertools import groupby
+from dataclasses import dataclass
+
+from .tile import TILES_BY_ID
+
+# default budget for the generated summary, in (approximate) tokens
+SUMMARY_MAX_TOKENS = 500
+CHARS_PER_TOKEN = 4
+
+_cache = {}                  # (content hash, max_tokens, notes) -> summary
+_cache_lock = threading.Lock()
+
+
+@dataclass
+class Region:
+    tile_type: str
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+    cells: int
+
+    def describe(self):
+        if (self.x0, self.y0) == (self.x1, self.y1):
+            return f"({self.x0},{self.y0})"
+        xs = f"{self.x0}" if self.x0 == self.x1 else f"{self.x0}..{self.x1}"
+        ys = f"{self.y0}" if self.y0 == self.y1 else f"{self.y0}..{self.y1}"
+        return f"x={xs},y={ys}"
+
+
+def find_regions(rows):
+    # 4-connected regions of equal tile ids. rows yields one bytes-like row
+    # of tile ids at a time; cells are grouped into runs per row and runs
+    # are joined to overlapping runs of the same type on the row above, so
+    # the cost follows the number of runs rather than the number of cells.
+    parent = []
+    runs = []                    # run id -> (y, x0, x1, tile id)
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    prev = []
+    for y, row in enumerate(rows):
+        cur, x = [], 0
+        for tile_id, group in groupby(row):
+            n = sum(1 for _ in group)
+            rid = len(parent)
+            parent.append(rid)
+            runs.append((y, x, x + n - 1, tile_id))
+            cur.append((x, x + n - 1, tile_id, rid))
+            x += n
+        i = j = 0
+        while i < len(prev) and j < len(cur):
+            px0, px1, pt, pid = prev[i]
+            cx0, cx1, ct, cid = cur[j]
+            if pt == ct and px1 >= cx0 and cx1 >= px0:
+                a, b = find(pid), find(cid)
+                if a != b:
+                    parent[b] = a
+            if px1 < cx1:
+                i += 1
+            else:
+                j += 1
+        prev = cur
+
+    regions = {}
+    for rid, (y, x0, x1, tile_id) in enumerate(runs):
+        root = find(rid)
+        r = regions.get(root)
+        if r is None:
+            regions[root] = Region(TILES_BY_ID[tile_id].tile_type, x0, y, x1, y, x1 - x0 + 1)
+        else:
+            r.x0, r.x1 = min(r.x0, x0), max(r.x1, x1)
+            r.y0, r.y1 = min(r.y0, y), max(r.y1, y)
+            r.cells += x1 - x0 + 1
+    return sorted(regions.values(), key=lambda r: (-r.cells, r.y0, r.x0))
+
+
+def _fit_names(names, room):
+    # "a, b, c (+N more)" in at most room chars
+    for shown in range(len(names), 0, -1):
+        more = len(names) - shown
+        text = ", ".join(names[:shown]) + (f" (+{more} more)" if more else "")
+        if len(text) <= room:
+            return text
+    return f"{len(names)} types" if names else "none"
+
+
+def _fit_text(text, room):
+    # text cut at a word boundary to at most room chars
+    if len(text) <= room:
+        return text
+    if room < 2:
+        return ""
+    return text[:room - 1].rsplit(" ", 1)[0] + "…"
+
+
+def summarize(width, height, regions, max_tokens=SUMMARY_MAX_TOKENS, notes=""):
+    budget = max_tokens * CHARS_PER_TOKEN
+    by_type = {}
+    for r in regions:
+        by_type.setdefault(r.tile_type, []).append(r)
+    totals = {t: sum(r.cells for r in rs) for t, rs in by_type.items()}
+    types = sorted(by_type, key=lambda t: -totals[t])
+    background = types[0] if types else "Grass"
+    types = types[1:]
+
+    walkable = {cls.tile_type: cls.walkable for cls in TILES_BY_ID}
+    every = [background] + types
+    can_walk = [t for t in every if walkable.get(t)]
+    blocked = [t for t in every if not walkable.get(t)]
+    head = (
+        f"This map is {width} tiles wide (x=0..{width - 1}) and {height} tiles tall (y=0..{height - 1}); "
+        "(x=0, y=0) is the top-left corner. "
+        f"{background} is the default tile. "
+    )
+
+    # everything counts against the budget: when the type lists and notes
+    # alone would not fit, each list gets a quarter of what is left, the
+    # notes the rest; the areas get whatever remains after that
+    left = budget - len(head)
+    walk, block = ", ".join(can_walk) or "none", ", ".join(blocked) or "none"
+    if len(walk) + len(block) + len(notes) + 32 > left:
+        walk = _fit_names(can_walk, left // 4 - 12)
+        block = _fit_names(blocked, left // 4 - 16)
+    head += f"Walkable: {walk}. Not walkable: {block}. "
+    notes = _fit_text(notes, budget - len(head) - 1)
+    intro = "Other tiles by type, as bounding boxes of connected areas, largest first: "
+
+    # every type gets its largest area first, then more areas round-robin
+    # while the budget lasts; a "+N more" note covers what did not fit
+    shown = {t: 0 for t in types}
+    used = len(head) + len(intro) + (len(notes) + 1 if notes else 0)
+    order = []                               # types in the order areas were added
+    rank = 0
+    while True:
+        added = False
+        for t in types:
+            if shown[t] == rank and rank < len(by_type[t]):
+                cost = len(by_type[t][rank].describe()) + 2
+                if rank == 0:
+                    cost += len(t) + 16          # "Type: " and a possible " (+NN more)"
+                if used + cost > budget:
+                    continue
+                used += cost
+                shown[t] += 1
+                order.append(t)
+                added = True
+        if not added:
+            break
+        rank += 1
+
+    def render():
+        parts = []
+        for t in types:
+            if not shown[t]:
+                continue
+            areas = "; ".join(r.describe() for r in by_type[t][:shown[t]])
+            more = len(by_type[t]) - shown[t]
+            parts.append(f"{t}: {areas}" + (f" (+{more} more)" if more else ""))
+        omitted = [t for t in types if not shown[t]]
+        if omitted and parts:
+            parts.append("also " + _fit_names(omitted, budget - used - 8))
+        text = head + intro + ". ".join(parts) + "." if parts else head.rstrip()
+        return text + " " + notes if notes else text
+
+    # the costs above are estimates; drop the last areas added until it
+    # fits (only the size sentence is kept whatever the budget)
+    text = render()
+    while len(text) > budget and order:
+        shown[order.pop()] -= 1
+        text = render()
+    return text
+
+
+def layout_summary(game_map, max_tokens=SUMMARY_MAX_TOKENS):
+    # cached per map content, so identical maps share the work
+    key = (game_map.content_hash(), max_tokens, game_map.notes)
+    with _cache_lock:
+        hit = _cache.get(key)
+    if hit is not None:
+        return hit
+    regions = find_regions(game_map.id_rows())
+    text = summarize(game_map.width, game_map.height, regions, max_tokens, game_map.notes)
+    with _cache_lock:
+        _cache[key] = text
+    return text
@@ -1,143 +1,350 @@
 # environment/map.py
 
-from .tile import Grass, Water, Soil, Bridge, Bush, Wall, Path, Floor, Sand, BedTop, BedBottom, BenchTop, BenchBottom, CounterBottom, CounterMiddle, CounterTop, BinApple, BinCucumber, BinEggplant, BinPotato, TreeOak, TreeOrange, TreePine, TreePink, TreePurple
+import hashlib
+from bisect import bisect_left, bisect_right
+
+from . import map_io, render_cache
+from .chunks import ChunkStore, ChunkedGridView
+from .layout_summary import SUMMARY_MAX_TOKENS, layout_summary
+from .tile import TILES_BY_ID, Grass
+
+# bundled layout Map() starts from (assets/maps/town.txt)
+DEFAULT_LAYOUT = "town"
+
+STORAGES = ("objects", "array", "chunked")
+
+
+def _numpy():
+    # numpy is only needed for storage="array" and the tile-id masks
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("Map(storage='array') needs numpy (pip install numpy)") from None
+    return numpy
+
+
+class _RowView:
+    # one row of an array-backed grid; cells read back as the shared tiles
+    __slots__ = ("_row",)
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getitem__(self, x):
+        return TILES_BY_ID[self._row[x]]()
+
+    def __setitem__(self, x, tile):
+        self._row[x] = tile.tile_id
+
+    def __len__(self):
+        return len(self._row)
+
+    def __iter__(self):
+        for tile_id in self._row.tolist():
+            yield TILES_BY_ID[tile_id]()
+
+
+class GridView:
+    # grid[y][x] access over a (height, width) uint8 tile-id array, so code
+    # written against the list-of-lists grid keeps working in array storage
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids):
+        self._ids = ids
+
+    def __getitem__(self, y):
+        return _RowView(self._ids[y])
+
+    def __len__(self):
+        return self._ids.shape[0]
+
+    def __iter__(self):
+        for y in range(self._ids.shape[0]):
+            yield _RowView(self._ids[y])
+
 
 class Map:
-    def __init__(self, width=48, height=27):
-        self.width = width
-        self.height = height
+    # token budget for get_layout_summary; set per map for very large worlds
+    summary_max_tokens = SUMMARY_MAX_TOKENS
+
+    # layout: a map file (.txt/.json/.bin, see map_io), a bundled layout name,
+    # or None for plain grass. width/height default to the layout's size;
+    # a larger map gets the layout in its top-left corner.
+    # storage="chunked" reads a .bin layout lazily in chunk_size squares and
+    # keeps at most max_chunks of them (plus any near agents) in memory.
+    def __init__(self, width=None, height=None, storage="objects", layout=DEFAULT_LAYOUT,
+                 chunk_size=32, max_chunks=256):
+        if storage not in STORAGES:
+            raise ValueError(f"storage must be one of {STORAGES}, got {storage!r}")
+        self._chunks = None
+        if storage == "chunked":
+            self._init_chunked(width, height, layout, chunk_size, max_chunks)
+            return
+        loaded = map_io.load(layout) if isinstance(layout, str) else layout
+        if loaded is not None:
+            width = loaded.width if width is None else width
+            height = loaded.height if height is None else height
+        self.width = 48 if width is None else width
+        self.height = 27 if height is None else height
+        width, height = self.width, self.height
+        self.storage = storage
+        self.notes = ""              # free-text layout description from the file
         # grass filled by default
         # however, we edit in changes to tiles
-        self.grid = [[Grass() for _ in range(width)] for _ in range(height)]
-        self.create_base_map()
+        if storage == "array":
+            # one uint8 tile id per cell; grid is a view over it
+            np = _numpy()
+            if len(TILES_BY_ID) > 256:
+                raise ValueError("array storage holds at most 256 tile types")
+            self._tile_ids = np.full((height, width), Grass.tile_id, dtype=np.uint8)
+            self.grid = GridView(self._tile_ids)
+        else:
+            # tiles are shared flyweights, so every cell can point at one Grass
+            self._tile_ids = None    # built on demand by tile_ids()
+            self.grid = [[Grass()] * width for _ in range(height)]
+        # derived indexes, rebuilt lazily after edits
+        self._masks = {}             # name -> boolean (height, width) array
+        self._feature_rows = None    # per row: (sorted xs, tile types)
+        self._visible_memo = {}      # (x, y, radius) -> visible tiles
+        self._summaries = {}         # max_tokens -> layout summary
+        if loaded is not None:
+            self.load_layout(loaded)
+
+    def _init_chunked(self, width, height, layout, chunk_size, max_chunks):
+        path = map_io.resolve(layout) if isinstance(layout, str) else None
+        if path is None or not path.lower().endswith(".bin"):
+            raise ValueError("chunked storage reads a binary .bin map file "
+                             "(convert one with python -m GenerativeAgents.environment.map_io)")
+        self._chunks = ChunkStore(path, chunk_size, max_chunks)
+        if (width, height) != (None, None) and \
+                (width, height) != (self._chunks.width, self._chunks.height):
+            raise ValueError("chunked maps take their size from the file")
+        self.width, self.height = self._chunks.width, self._chunks.height
+        self.storage = "chunked"
+        self.notes = self._chunks.notes
+        self._tile_ids = None
+        self.grid = ChunkedGridView(self._chunks)
+        self._masks = {}
+        self._feature_rows = None
+        self._visible_memo = {}
+        self._summaries = {}
+
+    @classmethod
+    def from_file(cls, path, storage="objects", width=None, height=None, **options):
+        return cls(width, height, storage=storage, layout=path, **options)
+
+    def save(self, path):
+        # format follows the extension: .txt, .json or .bin
+        map_io.save(self, path)
+
+    def load_layout(self, layout, x0=0, y0=0):
+        # stamp a layout (file/name, map_io.Layout or another Map) onto this
+        # map with its top-left corner at (x0, y0); anything off-map is clipped
+        if isinstance(layout, str):
+            layout = map_io.load(layout)
+        if isinstance(layout, Map):
+            source = layout
+            ids = source.tile_ids() if source.storage == "array" else map_io._rows(source)
+            layout = map_io.Layout(source.width, source.height, ids, source.notes)
+        w = min(layout.width, self.width - x0)
+        h = min(layout.height, self.height - y0)
+        if w <= 0 or h <= 0:
+            return
+        if self.storage == "chunked":
+            raise ValueError("chunked maps are loaded from their file; use set_tile to edit")
+        if self.storage == "array":
+            np = _numpy()
+            ids = layout.ids
+            whole = (x0, y0, w, h) == (0, 0, self.width, self.height)
+            if whole and isinstance(ids, np.ndarray) and ids.dtype == np.uint8 and ids.flags.writeable:
+                # adopt the array as-is (a binary file stays memory-mapped)
+                self._tile_ids = ids
+                self.grid = GridView(ids)
+            else:
+                self._tile_ids[y0:y0 + h, x0:x0 + w] = np.asarray(ids, dtype=np.uint8)[:h, :w]
+        else:
+            tiles = [cls() for cls in TILES_BY_ID]
+            ids = layout.ids.tolist() if hasattr(layout.ids, "tolist") else layout.ids
+            for y in range(h):
+                row = self.grid[y0 + y]
+                row[x0:x0 + w] = [tiles[i] for i in ids[y][:w]]
+        if (x0, y0) == (0, 0):
+            self.notes = layout.notes
+        self.invalidate_features()
 
     def set_tile(self, x, y, tile_cls):
         # set one tile
         if 0 <= x < self.width and 0 <= y < self.height:
-            self.grid[y][x] = tile_cls()
+            if self.storage == "array":
+                self._tile_ids[y, x] = tile_cls.tile_id
+            elif self.storage == "chunked":
+                self._chunks.set_tile_id(x, y, tile_cls.tile_id)
+            else:
+                self.grid[y][x] = tile_cls()
+            self.invalidate_features()
 
     def fill_tiles(self, x_topleft, y_topleft, width, height, tile_cls):
         # set multiple tiles at once
+        if self.storage == "array":
+            x0, y0 = max(0, x_topleft), max(0, y_topleft)
+            x1 = min(self.width, x_topleft + width)
+            y1 = min(self.height, y_topleft + height)
+            if x0 < x1 and y0 < y1:
+                self._tile_ids[y0:y1, x0:x1] = tile_cls.tile_id
+            self.invalidate_features()
+            return
+        if self.storage == "chunked":
+            for y in range(max(0, y_topleft), min(self.height, y_topleft + height)):
+                for x in range(max(0, x_topleft), min(self.width, x_topleft + width)):
+                    self._chunks.set_tile_id(x, y, tile_cls.tile_id)
+            self.invalidate_features()
+            return
+        tile = tile_cls()
         for y in range(height):
             for x in range(width):
                 if 0 <= x_topleft + x < self.width and 0 <= y_topleft + y < self.height:
-                    self.grid[y_topleft + y][x_topleft + x] = tile_cls()
+                    self.grid[y_topleft + y][x_topleft + x] = tile
+        self.invalidate_features()
+
+    def invalidate_features(self):
+        # call after editing self.grid directly (set_tile/fill_tiles do it)
+        if self.storage != "array":
+            self._tile_ids = None
+        self._masks = {}
+        self._feature_rows = None
+        self._visible_memo = {}
+        self._summaries = {}
+
+    def id_rows(self, region=None):
+        # tile ids one row at a time as bytes, whatever the storage, for the
+        # whole map or region (x0, y0, x1, y1)
+        # (chunked maps read rows from the file without loading chunks)
+        x0, y0, x1, y1 = region or (0, 0, self.width, self.height)
+        for y in range(y0, y1):
+            if self.storage == "array":
+                yield self._tile_ids[y, x0:x1].tobytes()
+            elif self.storage == "chunked":
+                yield self._chunks.row_ids(y, x0, x1)
+            else:
+                yield bytes(tile.tile_id for tile in self.grid[y][x0:x1])
+
+    def content_hash(self):
+        # sha256 of the size, the tile-type table and every cell
+        h = hashlib.sha256(f"{self.width}x{self.height}:".encode())
+        h.update(",".join(cls.tile_type for cls in TILES_BY_ID).encode())
+        for row in self.id_rows():
+            h.update(row)
+        return h.hexdigest()
+
+    def tile_ids(self):
+        # (height, width) uint8 array of tile ids (see tile.TILES_BY_ID)
+        # (on a chunked map this reads every chunk; prefer region queries)
+        if self._tile_ids is None:
+            np = _numpy()
+            self._tile_ids = np.array([[t.tile_id for t in row] for row in self.grid],
+                                      dtype=np.uint8)
+        return self._tile_ids
+
+    def _mask(self, name, attr):
+        mask = self._masks.get(name)
+        if mask is None:
+            np = _numpy()
+            lut = np.array([bool(attr(cls)) for cls in TILES_BY_ID], dtype=bool)
+            mask = self._masks[name] = lut[self.tile_ids()]
+        return mask
+
+    # boolean (height, width) terrain masks
+    @property
+    def walkable_mask(self):
+        return self._mask("walkable", lambda cls: cls.walkable)
+
+    @property
+    def water_mask(self):
+        return self._mask("water", lambda cls: cls.tile_type == "Water")
+
+    @property
+    def interactable_mask(self):
+        return self._mask("interactable", lambda cls: cls.interactable)
+
+    def are_walkable(self, xs, ys):
+        # vectorized is_walkable over matching coordinate sequences
+        # (a numpy bool array in array storage, a list of bools otherwise)
+        if self.storage != "array":
+            return [self.is_walkable(x, y) for x, y in zip(xs, ys)]
+        np = _numpy()
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        ok = np.zeros(xs.shape, dtype=bool)
+        ok[inside] = self.walkable_mask[ys[inside], xs[inside]]
+        return ok
+
+    def _build_features(self):
+        rows = []
+        if self.storage == "array":
+            np = _numpy()
+            names = [cls.tile_type for cls in TILES_BY_ID]
+            for row in self._tile_ids:
+                xs = np.flatnonzero(row != Grass.tile_id)
+                rows.append((xs.tolist(), [names[i] for i in row[xs].tolist()]))
+            self._feature_rows = rows
+            return rows
+        for row in self.grid:
+            xs, types = [], []
+            for x, tile in enumerate(row):
+                if tile.tile_type != "Grass":
+                    xs.append(x)
+                    types.append(tile.tile_type)
+            rows.append((xs, types))
+        self._feature_rows = rows
+        return rows
+
+    def visible_tiles(self, x0, y0, radius):
+        # non-grass (tile_type, (x, y)) within the square around (x0, y0),
+        # row-major like a scan of the grid; memoized per position and radius
+        key = (x0, y0, radius)
+        hit = self._visible_memo.get(key)
+        if hit is not None:
+            return hit
+        found = []
+        if self.storage == "chunked":
+            x_lo, x_hi = max(0, x0 - radius), min(self.width - 1, x0 + radius)
+            for y in range(max(0, y0 - radius), min(self.height, y0 + radius + 1)):
+                found.extend(self._chunks.row_features(y, x_lo, x_hi))
+            return self._memo_visible(key, found)
+        rows = self._feature_rows or self._build_features()
+        for y in range(max(0, y0 - radius), min(self.height, y0 + radius + 1)):
+            xs, types = rows[y]
+            lo = bisect_left(xs, x0 - radius)
+            hi = bisect_right(xs, x0 + radius)
+            found.extend((types[i], (xs[i], y)) for i in range(lo, hi))
+        return self._memo_visible(key, found)
+
+    def _memo_visible(self, key, found):
+        found = tuple(found)
+        if len(self._visible_memo) >= 65536:
+            self._visible_memo = {}
+        self._visible_memo[key] = found
+        return found
 
     def create_base_map(self):
-        # Grass base layer
-        self.fill_tiles(0, 0, self.width, self.height, Grass)
-        # River (Water)
-        self.fill_tiles(0, 11, self.width, 3, Water)
-        # Farm patches (Soil)
-        self.fill_tiles(1, 15, 5, 5, Soil)
-        self.fill_tiles(1, 21, 5, 5, Soil)
-        self.fill_tiles(7, 21, 5, 5, Soil)
-        self.fill_tiles(13, 21, 5, 5, Soil)
-        self.fill_tiles(19, 21, 5, 5, Soil)
-        # Bridges
-        self.fill_tiles(8, 11, 3, 3, Bridge)
-        self.fill_tiles(37, 11, 3, 3, Bridge)
-        # Apartments (Walls and Floors)
-        self.fill_tiles(0, 0, 21, 5, Wall)
-        self.fill_tiles(0, 5, 5, 5, Wall)
-        self.fill_tiles(1, 1, 4, 3, Floor)
-        self.fill_tiles(7, 1, 3, 3, Floor)
-        self.fill_tiles(12, 1, 3, 3, Floor)
-        self.fill_tiles(17, 1, 3, 3, Floor)
-        self.fill_tiles(1, 6, 3, 3, Floor)
-        # Store (Walls and Floors)
-        self.fill_tiles(33, 1, 14, 9, Wall)
-        self.fill_tiles(34, 2, 12, 7, Floor)
-        # Paths
-        self.fill_tiles(4, 5, 2, 2, Path)
-        self.fill_tiles(6, 6, 9, 4, Path)
-        self.fill_tiles(9, 4, 1, 2, Path)
-        self.fill_tiles(14, 4, 1, 2, Path)
-        self.set_tile(4, 4, Path)
-        self.fill_tiles(15, 6, 19, 1, Path)
-        self.fill_tiles(8, 10, 3, 1, Path)
-        self.fill_tiles(37, 9, 3, 2, Path)
-        self.fill_tiles(19,4,1,2,Path)
-        # Bushes
-        self.set_tile(5, 7, Bush)
-        self.set_tile(6, 5, Bush)
-        self.set_tile(8, 5, Bush)
-        self.set_tile(10, 5, Bush)
-        self.set_tile(13, 5, Bush)
-        self.set_tile(15, 5, Bush)
-        self.set_tile(18, 5, Bush)
-        self.set_tile(20, 5, Bush)
-        # Beach (Sand)
-        self.fill_tiles(14, 14, 19, 1, Sand)
-        self.fill_tiles(15, 15, 17, 1, Sand)
-        self.fill_tiles(16, 16, 15, 1, Sand)
-        # Beds
-        self.set_tile(1,6,BedTop) # Bed #5
-        self.set_tile(1,7,BedBottom)
-        self.set_tile(1,1,BedTop) # Bed #1
-        self.set_tile(1,2,BedBottom)
-        self.set_tile(7,1,BedTop) # Bed #2
-        self.set_tile(7,2,BedBottom)
-        self.set_tile(12,1,BedTop) # Bed #3
-        self.set_tile(12,2,BedBottom)
-        self.set_tile(17,1,BedTop) # Bed #4
-        self.set_tile(17,2,BedBottom)
-        # Benches
-        self.set_tile(32,3,BenchTop) # Bench 1
-        self.set_tile(32,4,BenchBottom)
-        self.set_tile(32,8,BenchTop) # Bench 2
-        self.set_tile(32,9,BenchBottom)
-        # Store Counter
-        self.set_tile(44,4,CounterTop)
-        self.set_tile(44,5,CounterMiddle)
-        self.set_tile(44,6,CounterBottom)
-        # Store Potato Shelf
-        self.fill_tiles(36,3,1,5,BinPotato)
-        # Store Eggplant Shelf
-        self.fill_tiles(38,3,1,5,BinEggplant)
-        # Store Cucumber Shelf
-        self.fill_tiles(40,3,1,5,BinCucumber)
-        # Store Apple Shelf
-        self.fill_tiles(42,3,1,5,BinApple)
-        # Oak trees
-        self.set_tile(32,2,TreeOak)
-        self.set_tile(32,5,TreeOak)
-        self.set_tile(32,7,TreeOak)
-        self.set_tile(32,10,TreeOak)
-        # Pine Trees
-        self.set_tile(16,9,TreePine)
-        self.set_tile(20,8,TreePine)
-        self.set_tile(22,4,TreePine)
-        self.set_tile(24,9,TreePine)
-        self.set_tile(25,1,TreePine)
-        self.set_tile(28,7,TreePine)
-        self.set_tile(29,4,TreePine)
-        # Lorax Trees
-        self.set_tile(18,7,TreePurple)
-        self.set_tile(22,10,TreeOrange)
-        self.set_tile(23,2,TreePink)
-        self.set_tile(26,4,TreePurple)
-        self.set_tile(27,9,TreePink)
-        self.set_tile(28,1,TreeOrange)
-        self.set_tile(30,10,TreeOrange)
-        self.set_tile(31,0,TreePurple)
-
-    def get_layout_summary(self):
-        # Provides a detailed overview of this 48x27 map stating major features and their coordinates.
+        # the bundled town (now loaded from assets/maps/town.txt)
+        self.load_layout(DEFAULT_LAYOUT)
+
+    def get_layout_summary(self, max_tokens=None):
+        # Overview of the map for the LLM, generated from the grid (see
+        # layout_summary): size, walkability, then bounding boxes of each
+        # tile type's connected areas, kept within max_tokens.
         #Coordinate System:
-        #- x ranges from 0 (left) to 47 (right)
-        #- y ranges from 0 (top) to 26 (bottom)
+        #- x ranges from 0 (left) to width-1 (right)
+        #- y ranges from 0 (top) to height-1 (bottom)
         #- (x=0, y=0) is top-left corner
         # used for LLM
-        return (
-            "This map is 48 tiles wide (x=0..47) and 27 tiles tall (y=0..26). "
-            "Rows y=11..13 contain a river that spans the entire width. Bridges cross the river at x=8..10 and x=37..39, y=11..13. "
-            "Apartments occupy the top-left, with walls in x=0..20, y=0..4 and x=0..4, y=5..9, plus floors at x=1..4,7..9,12..14,17..19 (y=1..3), etc. "
-            "A store is at x=33..46, y=1..9, with floors at x=34..45, y=2..8. "
-            "Farm patches (Soil) appear near the bottom, e.g. x=1..5,y=15..19 and x=1..5,y=21..25, among others. A sand beach lies around x=14..32, y=14..16. "
-            "Bushes are placed near x=6..20,y=5..7, and multiple paths connect these areas. "
-            "Grass is the default tile, water forms the river, soil for farmland, sand for the beach, walls/floors for buildings, and bushes/paths/bridges in fixed positions."
-        )
+        key = max_tokens or self.summary_max_tokens
+        summary = self._summaries.get(key)
+        if summary is None:
+            summary = self._summaries[key] = layout_summary(self, key)
+        return summary
 
     def display(self):
         # reference to map grid in text format
@@ -147,21 +354,67 @@ class Map:
     def is_walkable(self, x: int, y: int) -> bool:
         # True if (x, y) is on-map **and** its tile is walkable.
         if 0 <= x < self.width and 0 <= y < self.height:
+            if self.storage == "array":
+                return bool(self.walkable_mask[y, x])
+            if self.storage == "chunked":
+                return TILES_BY_ID[self._chunks.tile_id(x, y)].walkable
             return self.grid[y][x].walkable
         return False
 
-    def render_map(self, canvas, tile_size=32):
+    def update_active(self, positions, radius):
+        # chunked maps: keep the chunks within radius of these (x, y)
+        # positions resident; everything else may be evicted
+        if self._chunks is None:
+            return
+        cs = self._chunks.chunk_size
+        keys = set()
+        for x, y in positions:
+            for cy in range(max(0, y - radius) // cs, min(self.height - 1, y + radius) // cs + 1):
+                for cx in range(max(0, x - radius) // cs, min(self.width - 1, x + radius) // cs + 1):
+                    keys.add((cx, cy))
+        self._chunks.set_active(keys)
+
+    def active_region(self):
+        # (x0, y0, x1, y1) bounding the active chunks, or the whole map
+        if self._chunks is None or not self._chunks.active:
+            return 0, 0, self.width, self.height
+        cs = self._chunks.chunk_size
+        cxs = [cx for cx, _ in self._chunks.active]
+        cys = [cy for _, cy in self._chunks.active]
+        return (min(cxs) * cs, min(cys) * cs,
+                min(self.width, (max(cxs) + 1) * cs), min(self.height, (max(cys) + 1) * cs))
+
+    def chunk_stats(self):
+        return self._chunks.stats() if self._chunks is not None else None
+
+    def close(self):
+        if self._chunks is not None:
+            self._chunks.close()
+
+    def render_map(self, canvas, tile_size=32, region=None, origin=None, persist=True):
         # Renders the map's tiles onto the given Tkinter canvas.
         # Each tile is drawn at (x * tile_size, y * tile_size).
-        
-        # Initialize a list to store references to tile images
-        if not hasattr(canvas, 'image_refs'):
-            canvas.image_refs = []
-
-        for y in range(self.height):
-            for x in range(self.width):
-                tile = self.grid[y][x]
-                screen_x = x * tile_size
-                screen_y = y * tile_size
-                tile.display_image(canvas, screen_x, screen_y, tile_size)
+        # region (x0, y0, x1, y1) limits drawing to part of the map; chunked
+        # maps default to the area around agents instead of the whole world.
+        # origin is the canvas position of the region's top-left corner, for
+        # a scrolled view. The tiles are drawn as one pre-composited
+        # background image (see render_cache), which replaces the previous
+        # one on a redraw; persist=False skips the disk cache.
+        from PIL import ImageTk
+
+        if region is None:
+            region = self.active_region()
+        if origin is None:
+            origin = (region[0] * tile_size, region[1] * tile_size)
+        if persist:
+            img = render_cache.background(self, tile_size, region)
+        else:
+            img = render_cache.compose(self, tile_size, region)
+        photo = ImageTk.PhotoImage(img)
+        canvas.delete("map_layer")
+        canvas.create_image(origin[0], origin[1],
+                            image=photo, anchor='nw', tags="map_layer")
+        canvas.tag_lower("map_layer")
+        # Save reference to avoid garbage collection.
+        canvas.map_photo = photo
 
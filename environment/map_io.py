@@ -0,0 +1,302 @@
+# environment/map_io.py
+# Map layout files. Three formats, picked by extension:
+#
+#   .txt   ASCII, one character per tile (the tile's symbol). Symbols that
+#          several tile types share ('|', '0', '@', '5') need a legend line.
+#              [legend]
+#              b BedBottom
+#              [notes]
+#              free text for the LLM layout summary
+#              [map]
+#              ||||||bb...
+#          A file without section headers is all map rows. '#' is Soil, so
+#          comment lines are only allowed outside the [map] section.
+#   .json  {"width", "height", "legend": {char: type}, "rows": [...], "notes"}
+#          or, for authoring by rectangles like Map.fill_tiles:
+#          {"width", "height", "default": "Grass",
+#           "fills": [[x, y, w, h, "Water"], ...], "tiles": [[x, y, "Bush"], ...]}
+#   .bin   binary, little-endian, for big worlds (read through mmap):
+#              8s  magic b"GAMAP1\0\0"
+#              I   width, I height, H type count, H reserved
+#              per type: B name length + utf-8 name
+#              I notes length + utf-8 notes
+#              width * height uint8 indices into the name table, row-major
+#
+# Convert between formats, or tile a layout into a bigger world:
+#   python -m GenerativeAgents.environment.map_io town.txt big.bin --repeat 10x18
+
+import os
+import json
+import mmap
+import struct
+import argparse
+from dataclasses import dataclass
+
+from .tile import TILES_BY_ID, tile_class
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "maps")
+EXTENSIONS = (".txt", ".json", ".bin")
+
+MAGIC = b"GAMAP1\0\0"
+HEADER = struct.Struct("<8sIIHH")
+
+
+@dataclass
+class Layout:
+    width: int
+    height: int
+    ids: object         # (height, width) tile ids: numpy uint8 array or list of lists
+    notes: str = ""
+
+
+def _numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def resolve(name):
+    # a file path, or the name of a bundled layout in assets/maps ("town")
+    if os.path.exists(name):
+        return name
+    for ext in EXTENSIONS:
+        path = os.path.join(MAPS_DIR, name + ext)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No map file or bundled layout named {name!r}")
+
+
+def load(name):
+    path = resolve(name)
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        return read_json(path)
+    if ext == ".bin":
+        return read_binary(path)
+    return read_ascii(path)
+
+
+def save(game_map, path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".json":
+        write_json(game_map, path)
+    elif ext == ".bin":
+        write_binary(game_map, path)
+    else:
+        write_ascii(game_map, path)
+
+
+def _rows(game_map):
+    # tile ids row by row, whatever the map's storage
+    return [[tile.tile_id for tile in row] for row in game_map.grid]
+
+
+# symbols
+
+def default_symbols():
+    # symbol -> tile class, for symbols only one tile type uses
+    owners = {}
+    for cls in TILES_BY_ID:
+        owners.setdefault(cls.symbol, []).append(cls)
+    return {sym: classes[0] for sym, classes in owners.items() if len(classes) == 1}
+
+
+def _symbol_table(legend):
+    table = {sym: cls.tile_id for sym, cls in default_symbols().items()}
+    for sym, name in legend.items():
+        if len(sym) != 1:
+            raise ValueError(f"Legend symbols must be one character, got {sym!r}")
+        table[sym] = tile_class(name).tile_id
+    return table
+
+
+def assign_symbols(tile_ids):
+    # tile id -> character for writing; returns (chars, legend entries needed)
+    unique = default_symbols()
+    pool = iter(c for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+                if c not in unique and all(cls.symbol != c for cls in TILES_BY_ID))
+    chars, legend, taken = {}, {}, set()
+    for tile_id in sorted(tile_ids):
+        cls = TILES_BY_ID[tile_id]
+        if unique.get(cls.symbol) is cls:
+            chars[tile_id] = cls.symbol
+            continue
+        sym = cls.symbol if cls.symbol not in taken else next(pool)
+        chars[tile_id] = sym
+        legend[sym] = cls.tile_type
+        taken.add(sym)
+    return chars, legend
+
+
+def _parse_rows(rows, legend, where):
+    table = _symbol_table(legend)
+    width = len(rows[0]) if rows else 0
+    ids = []
+    for y, row in enumerate(rows):
+        if len(row) != width:
+            raise ValueError(f"{where}: row {y} is {len(row)} tiles wide, expected {width}")
+        try:
+            ids.append([table[c] for c in row])
+        except KeyError as e:
+            raise ValueError(f"{where}: row {y} has unknown or ambiguous tile symbol "
+                             f"{e.args[0]!r} (add it to the legend)") from None
+    return Layout(width, len(ids), ids)
+
+
+# ASCII
+
+def read_ascii(path):
+    legend, notes, rows = {}, [], []
+    section = None
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    if not any(line.strip() in ("[legend]", "[notes]", "[map]") for line in lines):
+        section = "map"
+    for line in lines:
+        if line.strip() in ("[legend]", "[notes]", "[map]"):
+            section = line.strip()[1:-1]
+            continue
+        if section == "map":
+            if line:
+                rows.append(line)
+            continue
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if section == "legend":
+            sym, _, name = line.partition(" ")
+            legend[sym] = name.strip()
+        elif section == "notes":
+            notes.append(line.strip())
+    layout = _parse_rows(rows, legend, path)
+    layout.notes = " ".join(notes)
+    return layout
+
+
+def write_ascii(game_map, path, header=None):
+    rows = _rows(game_map)
+    chars, legend = assign_symbols({i for row in rows for i in row})
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# {header or os.path.basename(path)}, {game_map.width}x{game_map.height}\n")
+        if legend:
+            f.write("[legend]\n")
+            for sym, name in legend.items():
+                f.write(f"{sym} {name}\n")
+        notes = getattr(game_map, "notes", "")
+        if notes:
+            f.write("[notes]\n" + notes + "\n")
+        f.write("[map]\n")
+        for row in rows:
+            f.write("".join(chars[i] for i in row) + "\n")
+
+
+# JSON
+
+def read_json(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if "rows" in data:
+        layout = _parse_rows(data["rows"], data.get("legend", {}), path)
+    else:
+        width, height = data["width"], data["height"]
+        ids = [[tile_class(data.get("default", "Grass")).tile_id] * width
+               for _ in range(height)]
+        for x0, y0, w, h, name in data.get("fills", []):
+            tile_id = tile_class(name).tile_id
+            for y in range(max(0, y0), min(height, y0 + h)):
+                for x in range(max(0, x0), min(width, x0 + w)):
+                    ids[y][x] = tile_id
+        for x, y, name in data.get("tiles", []):
+            if 0 <= x < width and 0 <= y < height:
+                ids[y][x] = tile_class(name).tile_id
+        layout = Layout(width, height, ids)
+    layout.notes = data.get("notes", "")
+    return layout
+
+
+def write_json(game_map, path):
+    rows = _rows(game_map)
+    chars, legend = assign_symbols({i for row in rows for i in row})
+    data = {
+        "width": game_map.width,
+        "height": game_map.height,
+        "legend": legend,
+        "notes": getattr(game_map, "notes", ""),
+        "rows": ["".join(chars[i] for i in row) for row in rows],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+
+
+# binary
+
+def read_binary_header(f):
+    # -> (width, height, names, data offset) from an open binary file
+    magic, width, height, count, _ = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{getattr(f, 'name', 'map')}: not a binary map file")
+    names = []
+    for _ in range(count):
+        (n,) = f.read(1)
+        names.append(f.read(n).decode("utf-8"))
+    (n,) = struct.unpack("<I", f.read(4))
+    notes = f.read(n).decode("utf-8")
+    return width, height, names, notes, f.tell()
+
+
+def read_binary(path):
+    with open(path, "rb") as f:
+        width, height, names, notes, offset = read_binary_header(f)
+        local = [tile_class(name).tile_id for name in names]
+        np = _numpy()
+        if np is None:
+            f.seek(offset)
+            data = f.read(width * height)
+            ids = [[local[b] for b in data[y * width:(y + 1) * width]] for y in range(height)]
+            return Layout(width, height, ids, notes)
+        # copy-on-write mapping: pages are only read (and copied) when touched
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    ids = np.frombuffer(mm, dtype=np.uint8, count=width * height,
+                        offset=offset).reshape(height, width)
+    if local != list(range(len(local))):
+        ids = np.asarray(local, dtype=np.uint8)[ids]
+    return Layout(width, height, ids, notes)
+
+
+def write_binary(game_map, path):
+    np = _numpy()
+    if np is not None and hasattr(game_map, "tile_ids"):
+        data = np.ascontiguousarray(game_map.tile_ids(), dtype=np.uint8).tobytes()
+    else:
+        data = bytes(i for row in _rows(game_map) for i in row)
+    names = [cls.tile_type.encode("utf-8") for cls in TILES_BY_ID]
+    notes = getattr(game_map, "notes", "").encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, game_map.width, game_map.height, len(names), 0))
+        for name in names:
+            f.write(bytes([len(name)]) + name)
+        f.write(struct.pack("<I", len(notes)) + notes)
+        f.write(data)
+
+
+def main(argv=None):
+    from .map import Map
+    parser = argparse.ArgumentParser(description="Convert or tile map layout files")
+    parser.add_argument("src", help="map file or bundled layout name")
+    parser.add_argument("dst", help="output (.txt, .json or .bin)")
+    parser.add_argument("--repeat", default="1x1", help="tile the layout NxM times, eg 10x18")
+    args = parser.parse_args(argv)
+
+    nx, ny = (int(n) for n in args.repeat.lower().split("x"))
+    src = Map(layout=args.src, storage="array" if _numpy() else "objects")
+    out = Map(src.width * nx, src.height * ny, layout=None, storage=src.storage)
+    for j in range(ny):
+        for i in range(nx):
+            out.load_layout(src, i * src.width, j * src.height)
+    out.notes = src.notes if (nx, ny) == (1, 1) else ""
+    save(out, args.dst)
+
+
+if __name__ == "__main__":
+    main()
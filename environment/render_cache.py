@@ -0,0 +1,117 @@
+# environment/render_cache.py
+# Map backgrounds for the UI. Tile images come from the texture atlas for
+# the tile size (see atlas), the static map is composited into one image,
+# and that image is kept on disk keyed by the map's content hash + tile
+# size (+ the tile images' mtimes), so a window for a map seen before
+# opens without any resizing.
+# Set GA_RENDER_CACHE to move the disk cache, or to "" to turn it off.
+
+import os
+import hashlib
+import threading
+
+from PIL import Image
+
+from .tile import TILES_BY_ID, ASSETS_DIR
+from .map_io import _numpy
+from .atlas import CACHE_DIR, get_atlas
+
+_scaled = {}                 # (tile class, tile_size) -> RGBA image
+_stacks = {}                 # tile_size -> (tile types, size, size, 4) uint8 array
+_lock = threading.Lock()
+
+
+def scaled_tile(cls, tile_size):
+    # the tile type's slice of the atlas, shared by every map and redraw
+    key = (cls, tile_size)
+    img = _scaled.get(key)
+    if img is None:
+        stem = os.path.splitext(cls.image_file or "")[0].lower()
+        img = get_atlas(tile_size).image(stem) if stem else None
+        if img is None:
+            img = Image.new("RGBA", (tile_size, tile_size), (0, 0, 0, 0))
+        with _lock:
+            img = _scaled.setdefault(key, img)
+    return img
+
+
+def tile_stack(tile_size):
+    # every tile type's scaled image as one array indexed by tile id
+    stack = _stacks.get(tile_size)
+    if stack is None:
+        np = _numpy()
+        stack = np.stack([np.asarray(scaled_tile(cls, tile_size), dtype=np.uint8)
+                          for cls in TILES_BY_ID])
+        with _lock:
+            stack = _stacks.setdefault(tile_size, stack)
+    return stack
+
+
+def assets_stamp():
+    # changes whenever a tile image is replaced, so stale composites are ignored
+    h = hashlib.sha256()
+    for cls in TILES_BY_ID:
+        path = os.path.join(ASSETS_DIR, cls.image_file or "")
+        try:
+            st = os.stat(path)
+            h.update(f"{cls.tile_type}:{st.st_mtime_ns}:{st.st_size};".encode())
+        except OSError:
+            h.update(f"{cls.tile_type}:-;".encode())
+    return h.hexdigest()[:16]
+
+
+def compose(game_map, tile_size, region=None):
+    # the map (or region (x0, y0, x1, y1) of it) as one RGBA image
+    x0, y0, x1, y1 = region or (0, 0, game_map.width, game_map.height)
+    x0, y0 = max(0, x0), max(0, y0)
+    x1, y1 = min(game_map.width, x1), min(game_map.height, y1)
+    w, h = max(0, x1 - x0), max(0, y1 - y0)
+    np = _numpy()
+    if np is not None and w and h:
+        # gather tile images by id and lay the (row, tile row, column, tile
+        # column) blocks out as one image, instead of one paste per tile
+        ids = np.frombuffer(b"".join(game_map.id_rows((x0, y0, x1, y1))),
+                            dtype=np.uint8).reshape(h, w)
+        px = tile_stack(tile_size)[ids].transpose(0, 2, 1, 3, 4)
+        return Image.fromarray(px.reshape(h * tile_size, w * tile_size, 4), "RGBA")
+    out = Image.new("RGBA", (w * tile_size, h * tile_size))
+    tiles = {}
+    for y in range(y0, y1):
+        row = game_map.grid[y]
+        for x in range(x0, x1):
+            cls = type(row[x])
+            img = tiles.get(cls)
+            if img is None:
+                img = tiles[cls] = scaled_tile(cls, tile_size)
+            out.paste(img, ((x - x0) * tile_size, (y - y0) * tile_size))
+    return out
+
+
+def cache_path(game_map, tile_size, region=None):
+    if not CACHE_DIR:
+        return None
+    x0, y0, x1, y1 = region or (0, 0, game_map.width, game_map.height)
+    name = (f"{game_map.content_hash()[:32]}_{assets_stamp()}_{tile_size}"
+            f"_{x0}_{y0}_{x1}_{y1}.png")
+    return os.path.join(CACHE_DIR, name)
+
+
+def background(game_map, tile_size, region=None):
+    # composited background, from the disk cache when this map was drawn before
+    path = cache_path(game_map, tile_size, region)
+    if path and os.path.exists(path):
+        try:
+            with Image.open(path) as img:
+                return img.convert("RGBA")
+        except OSError:
+            pass
+    img = compose(game_map, tile_size, region)
+    if path:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            img.save(tmp, format="PNG")
+            os.replace(tmp, path)
+        except OSError:
+            pass
+    return img
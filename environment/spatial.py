@@ -0,0 +1,85 @@
+# environment/spatial.py
+
+from collections import defaultdict
+
+
+class SpatialIndex:
+    # uniform grid hash for "who is near (x, y)" queries
+    # items live in cell_size x cell_size buckets; a query only touches the
+    # buckets overlapping its square, so cost follows local density instead
+    # of the total number of items. Results keep insertion order, so callers
+    # see the same ordering a plain scan of the original list would give.
+    # Not thread-safe: SimulationManager only moves agents (and so updates
+    # the index) on the thread that runs the tick, never from LLM workers.
+    def __init__(self, cell_size=5):
+        self.cell_size = max(1, int(cell_size))
+        self._cells = defaultdict(set)   # (cx, cy) -> items
+        self._pos   = {}                 # item -> (x, y)
+        self._order = {}                 # item -> insertion number
+        self._next  = 0
+
+    def _cell(self, x, y):
+        return x // self.cell_size, y // self.cell_size
+
+    def insert(self, item, x, y):
+        if item in self._pos:
+            self.move(item, x, y)
+            return
+        self._pos[item] = (x, y)
+        self._order[item] = self._next
+        self._next += 1
+        self._cells[self._cell(x, y)].add(item)
+
+    def move(self, item, x, y):
+        # incremental update; only touches buckets when the cell changes
+        old = self._pos.get(item)
+        if old is None:
+            self.insert(item, x, y)
+            return
+        self._pos[item] = (x, y)
+        old_cell, new_cell = self._cell(*old), self._cell(x, y)
+        if old_cell != new_cell:
+            bucket = self._cells[old_cell]
+            bucket.discard(item)
+            if not bucket:
+                del self._cells[old_cell]
+            self._cells[new_cell].add(item)
+
+    def remove(self, item):
+        pos = self._pos.pop(item, None)
+        if pos is None:
+            return
+        self._order.pop(item, None)
+        cell = self._cell(*pos)
+        bucket = self._cells[cell]
+        bucket.discard(item)
+        if not bucket:
+            del self._cells[cell]
+
+    def query(self, x, y, radius):
+        # items with |ix - x| <= radius and |iy - y| <= radius, in insertion order
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+        found = []
+        cells = self._cells
+        pos = self._pos
+        for cy in range(cy0, cy1 + 1):
+            for cx in range(cx0, cx1 + 1):
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for item in bucket:
+                    ix, iy = pos[item]
+                    if abs(ix - x) <= radius and abs(iy - y) <= radius:
+                        found.append(item)
+        found.sort(key=self._order.__getitem__)
+        return found
+
+    def position(self, item):
+        return self._pos.get(item)
+
+    def __contains__(self, item):
+        return item in self._pos
+
+    def __len__(self):
+        return len(self._pos)
@@ -1,39 +1,81 @@
 # environment/tile.py
 import os
-from PIL import Image, ImageTk
-import tkinter as tk
+from PIL import Image
 
 # Compute the path to the assets folder (assumes assets folder is at project/assets)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.join(BASE_DIR, "..", "assets")
 
+# tile_type -> tile class, filled in as subclasses are defined
+TILE_TYPES = {}
+# tile_id -> tile class (the same classes, indexed by tile_id)
+TILES_BY_ID = []
+
+
 class Tile:
-    def __init__(self, tile_type, walkable=False, interactable=False, symbol="?", image_path=None):
-        self.tile_type = tile_type
-        self.walkable = walkable
-        self.interactable = interactable
-        self.symbol = symbol
-        self.image = None
-        if image_path:
-            self.set_image(image_path)
-
-    def set_image(self, image_path):
-        # assign image to tile in render
+    # Flyweight tile record. A tile class *is* its data: every Grass() call
+    # returns the same shared, immutable instance, and the image is opened
+    # once per class the first time it is needed. Grid cells just point at
+    # these shared records.
+    __slots__ = ()
+
+    tile_type = "Tile"
+    walkable = False
+    interactable = False
+    symbol = "?"
+    image_file = None       # file name under ASSETS_DIR
+    tile_id = None          # small int per registered type, in definition order
+
+    _instances = {}         # class -> shared instance
+    _images = {}            # class -> PIL image (or None if it failed to load)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.tile_id = len(TILES_BY_ID)
+        TILE_TYPES[cls.tile_type] = cls
+        TILES_BY_ID.append(cls)
+
+    def __new__(cls):
+        inst = Tile._instances.get(cls)
+        if inst is None:
+            inst = Tile._instances[cls] = super().__new__(cls)
+        return inst
+
+    @property
+    def image(self):
+        cls = type(self)
+        if cls not in Tile._images:
+            Tile._images[cls] = cls.load_image()
+        return Tile._images[cls]
+
+    @classmethod
+    def load_image(cls):
+        if not cls.image_file:
+            return None
+        image_path = os.path.join(ASSETS_DIR, cls.image_file)
         try:
-            self.image = Image.open(image_path)
+            img = Image.open(image_path)
+            img.load()
+            return img
         except IOError:
             print(f"Error: Unable to load image from {image_path}")
+            return None
 
-    def display_image(self, canvas: tk.Canvas, x: int, y: int, tile_size=32):
+    def display_image(self, canvas, x: int, y: int, tile_size=32):
         # render image through resize and display on canvas at image (x,y)
+        # (ImageTk pulls in tkinter, so it is only imported when drawing)
+        # one scaled image and PhotoImage per tile type and size, per canvas
+        from PIL import ImageTk
+        from .render_cache import scaled_tile
         if self.image:
-            img = self.image.resize((tile_size, tile_size), Image.ANTIALIAS)
-            tk_img = ImageTk.PhotoImage(img)
+            if not hasattr(canvas, 'tile_photos'):
+                canvas.tile_photos = {}
+            key = (type(self), tile_size)
+            tk_img = canvas.tile_photos.get(key)
+            if tk_img is None:
+                # Save reference to avoid garbage collection.
+                tk_img = canvas.tile_photos[key] = ImageTk.PhotoImage(scaled_tile(type(self), tile_size))
             canvas.create_image(x, y, image=tk_img, anchor='nw')
-            # Save reference to avoid garbage collection.
-            if not hasattr(canvas, 'image_refs'):
-                canvas.image_refs = []
-            canvas.image_refs.append(tk_img)
         else:
             # In this version, we rely solely on images.
             pass
@@ -41,228 +83,187 @@ class Tile:
     def __repr__(self):
         return self.symbol
 
-# Specific tile classes with default image paths.
+
+def tile_class(tile_type):
+    # "Water" -> Water
+    try:
+        return TILE_TYPES[tile_type]
+    except KeyError:
+        raise ValueError(f"Unknown tile type {tile_type!r}") from None
+
+
+# Specific tile types with their default images.
 class Grass(Tile):
-    def __init__(self, symbol='+', walkable=True):
-        super().__init__(
-            tile_type="Grass",
-            walkable=walkable,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "grass.png")
-        )
+    __slots__ = ()
+    tile_type = "Grass"
+    walkable = True
+    symbol = '+'
+    image_file = "grass.png"
 
 class Water(Tile):
-    def __init__(self, symbol='~'):
-        super().__init__(
-            tile_type="Water",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "water.png")
-        )
+    __slots__ = ()
+    tile_type = "Water"
+    walkable = False
+    symbol = '~'
+    image_file = "water.png"
 
 class Soil(Tile):
-    def __init__(self, symbol='#', walkable=True):
-        super().__init__(
-            tile_type="Soil",
-            walkable=True,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "soil.png")
-        )
+    __slots__ = ()
+    tile_type = "Soil"
+    walkable = True
+    symbol = '#'
+    image_file = "soil.png"
 
 class Bridge(Tile):
-    def __init__(self, symbol='(', walkable=True):
-        super().__init__(
-            tile_type="Bridge",
-            walkable=True,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "bridge.png")
-        )
+    __slots__ = ()
+    tile_type = "Bridge"
+    walkable = True
+    symbol = '('
+    image_file = "bridge.png"
 
 class Bush(Tile):
-    def __init__(self, symbol='$'):
-        super().__init__(
-            tile_type="Bush",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "bush.png")
-        )
+    __slots__ = ()
+    tile_type = "Bush"
+    walkable = False
+    symbol = '$'
+    image_file = "bush.png"
 
 class Wall(Tile):
-    def __init__(self, symbol='|'):
-        super().__init__(
-            tile_type="Wall",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "wall.png")
-        )
+    __slots__ = ()
+    tile_type = "Wall"
+    walkable = False
+    symbol = '|'
+    image_file = "wall.png"
 
 class Path(Tile):
-    def __init__(self, symbol='=', walkable=True):
-        super().__init__(
-            tile_type="Path",
-            walkable=True,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "path.png")
-        )
+    __slots__ = ()
+    tile_type = "Path"
+    walkable = True
+    symbol = '='
+    image_file = "path.png"
 
 class Floor(Tile):
-    def __init__(self, symbol='.', walkable=True):
-        super().__init__(
-            tile_type="Floor",
-            walkable=True,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "floor.png")
-        )
+    __slots__ = ()
+    tile_type = "Floor"
+    walkable = True
+    symbol = '.'
+    image_file = "floor.png"
 
 class Sand(Tile):
-    def __init__(self, symbol=':', walkable=True):
-        super().__init__(
-            tile_type="Sand",
-            walkable=True,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "sand.png")
-        )
+    __slots__ = ()
+    tile_type = "Sand"
+    walkable = True
+    symbol = ':'
+    image_file = "sand.png"
 
 class BedTop(Tile):
-    def __init__(self, symbol = '0'):
-        super().__init__(
-            tile_type="BedTop",
-            walkable=True,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "bedtop.png")
-        )
+    __slots__ = ()
+    tile_type = "BedTop"
+    walkable = True
+    symbol = '0'
+    image_file = "bedtop.png"
 
 class BedBottom(Tile):
-    def __init__(self, symbol = '0'):
-        super().__init__(
-            tile_type="BedBottom",
-            walkable=True,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "bedbottom.png")
-        )
+    __slots__ = ()
+    tile_type = "BedBottom"
+    walkable = True
+    symbol = '0'
+    image_file = "bedbottom.png"
 
 class BenchTop(Tile):
-    def __init__(self, symbol = '%'):
-        super().__init__(
-            tile_type="BenchTop", 
-            walkable=True,
-            symbol=symbol, 
-            image_path=os.path.join(ASSETS_DIR, "benchtop.png")
-        )
+    __slots__ = ()
+    tile_type = "BenchTop"
+    walkable = True
+    symbol = '%'
+    image_file = "benchtop.png"
 
 class BenchBottom(Tile):
-    def __init__(self, symbol = '0'):
-        super().__init__(
-            tile_type="BenchBottom", 
-            walkable=True,
-            symbol=symbol, 
-            image_path=os.path.join(ASSETS_DIR, "benchbottom.png")
-        )
+    __slots__ = ()
+    tile_type = "BenchBottom"
+    walkable = True
+    symbol = '0'
+    image_file = "benchbottom.png"
 
 class CounterBottom(Tile):
-    def __init__(self,symbol = '|'):
-        super().__init__(
-            tile_type="CounterBottom",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "counterbottom.png")
-        )
+    __slots__ = ()
+    tile_type = "CounterBottom"
+    walkable = False
+    symbol = '|'
+    image_file = "counterbottom.png"
 
 class CounterMiddle(Tile):
-    def __init__(self,symbol = '|'):
-        super().__init__(
-            tile_type="CounterMiddle",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "countermiddle.png")
-        )
+    __slots__ = ()
+    tile_type = "CounterMiddle"
+    walkable = False
+    symbol = '|'
+    image_file = "countermiddle.png"
 
 class CounterTop(Tile):
-    def __init__(self,symbol = '|'):
-        super().__init__(
-            tile_type="CounterTop",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "countertop.png")
-        )
+    __slots__ = ()
+    tile_type = "CounterTop"
+    walkable = False
+    symbol = '|'
+    image_file = "countertop.png"
 
 class BinApple(Tile):
-    def __init__(self,symbol = '@'):
-        super().__init__(
-            tile_type="BinApple",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "binapple.png")
-        )
-        
+    __slots__ = ()
+    tile_type = "BinApple"
+    walkable = False
+    symbol = '@'
+    image_file = "binapple.png"
+
 class BinCucumber(Tile):
-    def __init__(self,symbol = '@'):
-        super().__init__(
-            tile_type="BinCucumber",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "bincucumber.png")
-        )
+    __slots__ = ()
+    tile_type = "BinCucumber"
+    walkable = False
+    symbol = '@'
+    image_file = "bincucumber.png"
 
 class BinEggplant(Tile):
-    def __init__(self,symbol = '@'):
-        super().__init__(
-            tile_type="BinEggplant",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "bineggplant.png")
-        )
+    __slots__ = ()
+    tile_type = "BinEggplant"
+    walkable = False
+    symbol = '@'
+    image_file = "bineggplant.png"
 
 class BinPotato(Tile):
-    def __init__(self,symbol = '@'):
-        super().__init__(
-            tile_type="BinPotato",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "binpotato.png")
-        )
+    __slots__ = ()
+    tile_type = "BinPotato"
+    walkable = False
+    symbol = '@'
+    image_file = "binpotato.png"
 
 class TreeOak(Tile):
-    def __init__(self,symbol = '5'):
-        super().__init__(
-            tile_type="TreeOak",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "treeoak.png")
-        )
+    __slots__ = ()
+    tile_type = "TreeOak"
+    walkable = False
+    symbol = '5'
+    image_file = "treeoak.png"
 
 class TreePine(Tile):
-    def __init__(self,symbol = '5'):
-        super().__init__(
-            tile_type="TreePine",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "treepine.png")
-        )
+    __slots__ = ()
+    tile_type = "TreePine"
+    walkable = False
+    symbol = '5'
+    image_file = "treepine.png"
 
 class TreeOrange(Tile):
-    def __init__(self,symbol = '5'):
-        super().__init__(
-            tile_type="TreeOrange",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "treeorange.png")
-        )
+    __slots__ = ()
+    tile_type = "TreeOrange"
+    walkable = False
+    symbol = '5'
+    image_file = "treeorange.png"
 
 class TreePink(Tile):
-    def __init__(self,symbol = '5'):
-        super().__init__(
-            tile_type="TreePink",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "treepink.png")
-        )
+    __slots__ = ()
+    tile_type = "TreePink"
+    walkable = False
+    symbol = '5'
+    image_file = "treepink.png"
 
 class TreePurple(Tile):
-    def __init__(self,symbol = '5'):
-        super().__init__(
-            tile_type="TreePurple",
-            walkable=False,
-            symbol=symbol,
-            image_path=os.path.join(ASSETS_DIR, "treepurple.png")
-        )
+    __slots__ = ()
+    tile_type = "TreePurple"
+    walkable = False
+    symbol = '5'
+    image_file = "treepurple.png"
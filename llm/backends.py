@@ -0,0 +1,294 @@
+# llm/backends.py
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from dataclasses import dataclass
+
+DIRECTIONS = ("up", "down", "left", "right")
+
+
+@dataclass
+class Completion:
+    # text plus the usage numbers the provider reported (or estimated)
+    text: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class LLMBackend:
+    # one way of turning a prompt into a completion
+    # subclasses implement complete(); acomplete() defaults to a worker thread
+    name = "base"
+
+    def __init__(self, max_concurrency=64):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._async_limit = None
+        self._async_loop = None
+
+    @property
+    def cache_namespace(self) -> str:
+        # prefixed onto the model in cache keys so backends never share entries
+        return self.name
+
+    def complete(self, message: str, model: str) -> Completion:
+        raise NotImplementedError
+
+    async def acomplete(self, message: str, model: str) -> Completion:
+        async with self._limit():
+            return await asyncio.to_thread(self.complete, message, model)
+
+    def set_max_concurrency(self, limit: int) -> None:
+        self.max_concurrency = max(1, int(limit))
+        self._async_loop = None
+
+    def _limit(self):
+        # asyncio primitives belong to one event loop; rebuild on a new loop
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self._async_limit = asyncio.Semaphore(self.max_concurrency)
+            self._async_loop = loop
+            self._on_new_loop()
+        return self._async_limit
+
+    def _on_new_loop(self):
+        pass
+
+    async def aclose(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class OpenAIBackend(LLMBackend):
+    # the hosted OpenAI API (key from OPENAI_API_KEY or the project's .env)
+    name = "openai"
+
+    def __init__(self, api_key=None, base_url=None, max_concurrency=64):
+        super().__init__(max_concurrency)
+        from openai import OpenAI
+        if api_key is None:
+            from dotenv import load_dotenv
+            dotenv_path = os.path.join(os.path.dirname(__file__), "..", ".env")
+            load_dotenv(dotenv_path)
+            api_key = os.getenv("OPENAI_API_KEY")
+        self.api_key  = api_key
+        self.base_url = base_url
+        self.client   = OpenAI(api_key=api_key, base_url=base_url)
+        self._async_client = None
+        self._client_loop  = None      # loop the async client was made on
+        self._closing      = set()     # close() tasks of replaced clients
+
+    @property
+    def cache_namespace(self) -> str:
+        # the hosted API keeps bare model names so existing cache files still hit
+        return self.base_url or ""
+
+    def _on_new_loop(self):
+        # one pooled async client per event loop (AsyncOpenAI keeps keep-alive
+        # connections internally), shared by every coroutine on that loop
+        from openai import AsyncOpenAI
+        old, old_loop = self._async_client, self._client_loop
+        self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+        self._client_loop  = asyncio.get_running_loop()
+        if old is not None:
+            self._close_later(old, old_loop)
+
+    def _close_later(self, client, loop):
+        # a replaced client's pool is closed on its own loop while that loop
+        # still runs, otherwise on this one (errors ignored: its connections
+        # went away with their loop)
+        async def close():
+            try:
+                await client.close()
+            except Exception:
+                pass
+        current = asyncio.get_running_loop()
+        if loop is not None and loop is not current and loop.is_running():
+            asyncio.run_coroutine_threadsafe(close(), loop)
+            return
+        task = current.create_task(close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    def _to_completion(completion, model):
+        usage = getattr(completion, "usage", None)
+        return Completion(
+            text=completion.choices[0].message.content.strip(),
+            model=getattr(completion, "model", None) or model,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+        )
+
+    def complete(self, message, model):
+        completion = self.client.chat.completions.create(
+            model=model,
+            messages=[{"role": "developer", "content": message}]
+        )
+        return self._to_completion(completion, model)
+
+    async def acomplete(self, message, model):
+        async with self._limit():
+            completion = await self._async_client.chat.completions.create(
+                model=model,
+                messages=[{"role": "developer", "content": message}]
+            )
+        return self._to_completion(completion, model)
+
+    async def aclose(self):
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+        if self._async_client is not None:
+            await self._async_client.close()
+        self._async_client = None
+        self._client_loop = None
+        self._async_loop = None
+
+
+class LocalHTTPBackend(OpenAIBackend):
+    # any OpenAI-compatible HTTP endpoint (llama.cpp, vLLM, or llm.stub_server)
+    name = "local"
+
+    def __init__(self, base_url="http://127.0.0.1:8000/v1", api_key="local",
+                 max_concurrency=64):
+        super().__init__(api_key=api_key, base_url=base_url,
+                         max_concurrency=max_concurrency)
+
+
+class LatencyModel:
+    # simulated response time in seconds, parsed from a short spec:
+    #   "0.2"                 constant
+    #   "uniform:0.1,0.5"     uniform between low and high
+    #   "normal:0.8,0.2"      mean, stddev (clipped at 0)
+    #   "lognormal:-0.5,0.6"  mu, sigma of the underlying normal
+    def __init__(self, spec="0", seed=0):
+        self.spec = str(spec)
+        kind, _, args = self.spec.partition(":")
+        if not args:
+            kind, args = "constant", kind
+        self.kind = kind
+        self.params = [float(a) for a in args.split(",") if a.strip()]
+        if kind not in ("constant", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {kind}")
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def sample(self) -> float:
+        p = self.params
+        with self._lock:
+            if self.kind == "constant":
+                return p[0] if p else 0.0
+            if self.kind == "uniform":
+                return self._rng.uniform(p[0], p[1])
+            if self.kind == "normal":
+                return max(0.0, self._rng.gauss(p[0], p[1]))
+            return self._rng.lognormvariate(p[0], p[1])
+
+
+class StubBackend(LLMBackend):
+    # in-process stand-in for load testing: no network, no key
+    # replies are well-formed JSON for whichever prompt it is given and are
+    # deterministic per (seed, prompt); script overrides them with a list of
+    # canned replies (cycled) or a callable(message) -> str
+    name = "stub"
+
+    _agent_re = re.compile(r"- Agent name: (.+)")
+    _moves_re = re.compile(r"array of up to (\d+) directions")
+    _size_re  = re.compile(r"grid of size (\d+) by (\d+)")
+
+    def __init__(self, seed=0, latency="0", script=None, max_concurrency=1024):
+        super().__init__(max_concurrency)
+        self.seed    = seed
+        self.latency = latency if isinstance(latency, LatencyModel) else LatencyModel(latency, seed)
+        self.script  = script
+        self.calls   = 0
+        self._lock   = threading.Lock()
+
+    def respond(self, message: str) -> str:
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+        if callable(self.script):
+            return self.script(message)
+        if self.script:
+            return self.script[n % len(self.script)]
+
+        rng   = random.Random(f"{self.seed}:{message}")
+        names = self._agent_re.findall(message) or ["Agent"]
+        if "daily action plan" in message:
+            return json.dumps({
+                "name": names[0].strip(),
+                "daily_plan": "08:00 - Walk around town, 12:00 - Eat lunch, 18:00 - Head home"
+            })
+        max_moves = self._moves_re.search(message)
+        max_moves = int(max_moves.group(1)) if max_moves else 1
+        # goals anywhere on the map the prompt describes (the town by default)
+        size = self._size_re.search(message)
+        size = (int(size.group(1)), int(size.group(2))) if size else (48, 27)
+        plans = [self._action(rng, name.strip(), max_moves, size) for name in names]
+        if "JSON array" in message:
+            return json.dumps(plans)
+        return json.dumps(plans[0])
+
+    @staticmethod
+    def _action(rng, name, max_moves=1, size=(48, 27)):
+        plan = {
+            "name": name,
+            "goalxy": [rng.randrange(size[0]), rng.randrange(size[1])],
+            "direction": rng.choice(DIRECTIONS),
+            "speech": f"{name} keeps busy."
+        }
+        if max_moves > 1:
+            # walk a straight line, which is what a model heading for goalxy mostly does
+            plan["moves"] = [plan["direction"]] * rng.randint(1, max_moves)
+        return plan
+
+    def _completion(self, message, model):
+        text = self.respond(message)
+        # ~4 characters per token is close enough for load accounting
+        return Completion(text=text, model=f"stub-{model}",
+                          prompt_tokens=len(message) // 4,
+                          completion_tokens=len(text) // 4)
+
+    def complete(self, message, model):
+        delay = self.latency.sample()
+        if delay > 0:
+            time.sleep(delay)
+        return self._completion(message, model)
+
+    async def acomplete(self, message, model):
+        async with self._limit():
+            delay = self.latency.sample()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return self._completion(message, model)
+
+
+def make_backend(kind=None, **kwargs) -> LLMBackend:
+    # build a backend from config; anything not passed comes from the env:
+    #   LLM_BACKEND       openai (default) | local | stub
+    #   LLM_BASE_URL      endpoint for local
+    #   LLM_STUB_LATENCY  latency spec for stub, see LatencyModel
+    #   LLM_STUB_SEED     seed for stub replies and latency
+    #   LLM_MAX_CONCURRENCY  in-flight cap on the async path
+    kind = (kind or os.getenv("LLM_BACKEND", "openai")).lower()
+    # unset, each backend keeps its own default (the stub allows far more)
+    if os.getenv("LLM_MAX_CONCURRENCY"):
+        kwargs.setdefault("max_concurrency", int(os.getenv("LLM_MAX_CONCURRENCY")))
+    if kind == "openai":
+        return OpenAIBackend(**kwargs)
+    if kind == "local":
+        kwargs.setdefault("base_url", os.getenv("LLM_BASE_URL", "http://127.0.0.1:8000/v1"))
+        return LocalHTTPBackend(**kwargs)
+    if kind == "stub":
+        kwargs.setdefault("latency", os.getenv("LLM_STUB_LATENCY", "0"))
+        kwargs.setdefault("seed", int(os.getenv("LLM_STUB_SEED", "0")))
+        return StubBackend(**kwargs)
+    raise ValueError(f"Unknown LLM backend: {kind}")
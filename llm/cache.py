@@ -0,0 +1,196 @@
+# llm/cache.py
+
+import json
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def cache_key(model: str, prompt: str) -> str:
+    # content address of one request: same model + same prompt = same key
+    return hashlib.sha256(f"{model}\0{prompt}".encode("utf-8")).hexdigest()
+
+
+def is_json_reply(text: str) -> bool:
+    # only replies the simulation can parse are worth keeping; a bad one
+    # would otherwise be replayed for that prompt forever (fences are
+    # stripped as in SimulationManager.clean_llm_output)
+    text = text.strip()
+    if text.startswith("```") and text.endswith("```"):
+        text = text.strip("`")
+        if text.lower().startswith("json"):
+            text = text[4:].strip()
+    try:
+        json.loads(text)
+    except ValueError:
+        return False
+    return True
+
+
+class LRUCache:
+    # in-memory tier, least recently used entry is dropped first
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    # SQLite tier that survives restarts, evicts by least recent use
+    # once the stored responses grow past max_bytes
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)"
+        )
+        self._conn.commit()
+        self.size_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key, value):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_used) "
+                "VALUES (?, ?, ?, ?)", (key, value, size, time.time()))
+            self.size_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # drop oldest rows until we fit the budget again
+        while self.size_bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_used LIMIT 1").fetchone()
+            if row is None:
+                self.size_bytes = 0
+                return
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (row[0],))
+            self.size_bytes -= row[1]
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self.size_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    # two-tier prompt/response cache: memory LRU in front of an optional disk tier
+    def __init__(self, max_entries=4096, disk_path=None,
+                 max_disk_bytes=64 * 1024 * 1024):
+        self.memory = LRUCache(max_entries)
+        self.disk = DiskCache(disk_path, max_disk_bytes) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, model, prompt):
+        key = cache_key(model, prompt)
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                # promote so the next lookup stays in memory
+                self.memory.put(key, value)
+                with self._lock:
+                    self.disk_hits += 1
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, model, prompt, response):
+        if not response:
+            return
+        key = cache_key(model, prompt)
+        self.memory.put(key, response)
+        if self.disk is not None:
+            self.disk.put(key, response)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "disk_entries": len(self.disk) if self.disk is not None else 0,
+            "disk_bytes": self.disk.size_bytes if self.disk is not None else 0,
+            "disk_evictions": self.disk.evictions if self.disk is not None else 0,
+        }
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+        with self._lock:
+            self.hits = self.disk_hits = self.misses = 0
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
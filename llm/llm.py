@@ -1,16 +1,216 @@
 # llm/llm.py
 
 import os
-import json
-from openai import OpenAI
-from dotenv import load_dotenv
+import asyncio
+import logging
+from contextlib import nullcontext
+from GenerativeAgents import tracing
+from .cache import ResponseCache, is_json_reply
+from .backends import LLMBackend, make_backend
+from .telemetry import Telemetry, OK, API_ERROR
 
-dotenv_path = os.path.join(os.path.dirname(__file__), "..", ".env")
-load_dotenv(dotenv_path)
-openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key)
+# prompts and raw replies are logged at DEBUG; LLM_LOG_LEVEL=DEBUG shows them
+logger = logging.getLogger(__name__)
+if os.getenv("LLM_LOG_LEVEL"):
+    logging.basicConfig()
+    logger.setLevel(os.getenv("LLM_LOG_LEVEL").upper())
 
-def generate_action_plan(sim_time, sim_vision, agent, prev_action_plan="", overseer_directives=None):
+MODEL = os.getenv("LLM_MODEL", "o3-mini")
+
+# prompt/response cache, keyed by a hash of model + prompt
+# LLM_CACHE_SIZE=0 turns the memory tier off, LLM_CACHE_PATH adds a SQLite tier
+cache = ResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_SIZE", "4096")),
+    disk_path=os.getenv("LLM_CACHE_PATH") or None,
+    max_disk_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+)
+
+
+def configure_cache(max_entries=4096, disk_path=None, max_disk_bytes=64 * 1024 * 1024):
+    # swap in a fresh cache (ie, point repeated experiments at a shared file)
+    global cache
+    cache.close()
+    cache = ResponseCache(max_entries, disk_path, max_disk_bytes)
+    return cache
+
+# per-call latency / token / cost / outcome accounting (see telemetry.Telemetry)
+telemetry = Telemetry()
+
+# the backend is built on first use (from LLM_BACKEND etc., see backends.make_backend)
+# so importing the simulation never needs a network connection or an API key
+_backend = None
+
+
+def get_backend() -> LLMBackend:
+    global _backend
+    if _backend is None:
+        _backend = make_backend()
+    return _backend
+
+
+def set_backend(backend=None, **kwargs) -> LLMBackend:
+    # accepts a backend instance or a name ("openai", "local", "stub") plus options
+    global _backend
+    if not isinstance(backend, LLMBackend):
+        backend = make_backend(backend, **kwargs)
+    _backend = backend
+    return backend
+
+
+def set_max_concurrency(limit: int) -> None:
+    # cap on requests in flight on the async path
+    get_backend().set_max_concurrency(limit)
+
+
+# optional cap shared across processes (eg a multiprocessing.Manager
+# semaphore handed to every sweep worker), held for the length of each call
+_global_limiter = None
+
+
+def set_global_limiter(limiter) -> None:
+    global _global_limiter
+    _global_limiter = limiter
+
+
+async def close_async_client() -> None:
+    # release pooled connections (call before the event loop shuts down)
+    if _backend is not None:
+        await _backend.aclose()
+
+
+# extra cache key part, so runs that must not replay each other's replies
+# (ie, sweep repeats sharing a worker process) each get their own entries
+_cache_scope = None
+
+
+def set_cache_scope(scope=None) -> None:
+    global _cache_scope
+    _cache_scope = scope
+
+
+def _cache_model(backend):
+    ns = backend.cache_namespace
+    model = f"{ns}/{MODEL}" if ns else MODEL
+    return f"{model}#{_cache_scope}" if _cache_scope else model
+
+
+def _complete(message, kind, agent=None, tick=None):
+    # one chat completion, served from the cache when this exact prompt was seen
+    with tracing.span(f"llm.{kind}", cat="llm", agent=agent, tick=tick) as sp:
+        backend = get_backend()
+        cache_model = _cache_model(backend)
+        begun = telemetry.begin()
+        cached = cache.get(cache_model, message)
+        if cached is not None:
+            telemetry.end(begun, kind, MODEL, agent, tick, cached=True)
+            sp.set(cached=True)
+            return cached
+        try:
+            with _global_limiter or nullcontext(), tracing.span("backend", cat="llm"):
+                result = backend.complete(message, MODEL)
+        except Exception as e:
+            telemetry.end(begun, kind, MODEL, agent, tick, outcome=API_ERROR, error=str(e))
+            raise
+        telemetry.end(begun, kind, result.model, agent, tick,
+                      result.prompt_tokens, result.completion_tokens, OK)
+        sp.set(prompt_tokens=result.prompt_tokens, completion_tokens=result.completion_tokens)
+        if is_json_reply(result.text):
+            cache.put(cache_model, message, result.text)
+        return result.text
+
+
+async def _acquire(limiter):
+    # the shared limiter blocks, so wait for it off the event loop; a task
+    # cancelled while waiting hands back the permit its thread still gets
+    waiter = asyncio.ensure_future(asyncio.to_thread(limiter.acquire))
+    try:
+        await asyncio.shield(waiter)
+    except asyncio.CancelledError:
+        def give_back(fut):
+            if not fut.cancelled() and fut.exception() is None:
+                limiter.release()
+        waiter.add_done_callback(give_back)
+        raise
+
+
+async def _acomplete(message, kind, agent=None, tick=None):
+    with tracing.span(f"llm.{kind}", cat="llm", agent=agent, tick=tick) as sp:
+        backend = get_backend()
+        cache_model = _cache_model(backend)
+        begun = telemetry.begin()
+        cached = cache.get(cache_model, message)
+        if cached is not None:
+            telemetry.end(begun, kind, MODEL, agent, tick, cached=True)
+            sp.set(cached=True)
+            return cached
+        try:
+            if _global_limiter is None:
+                with tracing.span("backend", cat="llm"):
+                    result = await backend.acomplete(message, MODEL)
+            else:
+                limiter = _global_limiter
+                await _acquire(limiter)
+                try:
+                    with tracing.span("backend", cat="llm"):
+                        result = await backend.acomplete(message, MODEL)
+                finally:
+                    limiter.release()
+        except Exception as e:
+            telemetry.end(begun, kind, MODEL, agent, tick, outcome=API_ERROR, error=str(e))
+            raise
+        telemetry.end(begun, kind, result.model, agent, tick,
+                      result.prompt_tokens, result.completion_tokens, OK)
+        sp.set(prompt_tokens=result.prompt_tokens, completion_tokens=result.completion_tokens)
+        if is_json_reply(result.text):
+            cache.put(cache_model, message, result.text)
+        return result.text
+
+
+# (width, height) used when a caller does not pass the map's own size
+DEFAULT_WORLD_SIZE = (48, 27)
+
+# movement rules shared by the single-agent and batched action prompts
+# (filled in with the map size by _action_rules)
+ACTION_RULES = (
+    "Moving up means position_y+1 relative to the current position; moving down means position_y-1; moving right means position_x+1; moving left means position_x-1. "
+    "RULE: The simulation environment is a grid of size {width} by {height}. Valid x coordinates are 0 to {max_x} and valid y coordinates are 0 to {max_y}. "
+    "The agent must not plan a move that takes it out of these bounds. "
+    "RULE: The agent cannot move into or through walls. "
+    "RULE: If the agent sees water and a nearby bridge, the agent must choose to use the bridge instead of moving through water. "
+    "RULE: The agent should be coming up with tasks to meet the daily plan. "
+    "Obey ALL rules in the message; obeying them is more important than achieving any goal. \n"
+)
+
+
+def _action_rules(world_size=None):
+    width, height = world_size or DEFAULT_WORLD_SIZE
+    return ACTION_RULES.format(width=width, height=height,
+                               max_x=width - 1, max_y=height - 1)
+
+
+# batched planning: how many agents (and prompt characters) go in one request
+BATCH_MAX_AGENTS = 25
+BATCH_MAX_CHARS = 24000
+
+
+def _plan_keys(max_moves=1, for_batch=False):
+    # JSON keys the model must return; with max_moves > 1 it also plans a short
+    # queue of moves that the simulation walks without asking again
+    keys = (
+        "  \"name\": string" + (" (the agent name exactly as given)" if for_batch else "") + ",\n"
+        "  \"goalxy\": [int, int],\n"
+        "  \"direction\": string (one of \"up\", \"down\", \"left\", \"right\"),\n"
+    )
+    if max_moves > 1:
+        keys += (
+            f"  \"moves\": array of up to {max_moves} directions (each one of \"up\", \"down\", \"left\", \"right\"), "
+            "one per turn starting with \"direction\", leading toward goalxy; every move must obey the rules from the square reached by the previous move,\n"
+        )
+    return keys + "  \"speech\": string (a one-sentence statement).\n"
+
+
+def _action_plan_message(sim_time, sim_vision, agent, prev_action_plan="", overseer_directives=None,
+                         max_moves=1, world_size=None):
     if overseer_directives is None:
         overseer_directives = []
     # Generate a movement-level action plan for an agent, including a one-sentence speech.
@@ -26,13 +226,7 @@ def generate_action_plan(sim_time, sim_vision, agent, prev_action_plan="", overs
     message = (
         "You are creating an action plan for an agent in a Generative Agents Simulator. "
         "The agent's decision should be a movement decision only, with no additional talking beyond a single sentence of speech. "
-        "Moving up means position_y+1 relative to the current position; moving down means position_y-1; moving right means position_x+1; moving left means position_x-1. "
-        "RULE: The simulation environment is a grid of size 48 by 27. Valid x coordinates are 0 to 47 and valid y coordinates are 0 to 26. "
-        "The agent must not plan a move that takes it out of these bounds. "
-        "RULE: The agent cannot move into or through walls. "
-        "RULE: If the agent sees water and a nearby bridge, the agent must choose to use the bridge instead of moving through water. "
-        "RULE: The agent should be coming up with tasks to meet the daily plan. "
-        "Obey ALL rules in the message; obeying them is more important than achieving any goal. \n"
+        + _action_rules(world_size) +
         "In addition, produce a one-sentence statement (the agent's 'speech') that expresses what the agent is thinking or saying at this moment. \n"
         "Based on the following information:\n"
         f"- Simulation time: {sim_time}\n"
@@ -47,33 +241,131 @@ def generate_action_plan(sim_time, sim_vision, agent, prev_action_plan="", overs
         f"- Overseer directives (the user wants attempts to apply these to agent plans!): "
         f"{', '.join(overseer_directives) if overseer_directives else 'None'}\n\n"
         "Output an action plan strictly in JSON format with exactly these keys:\n\n"
-        "  \"name\": string,\n"
-        "  \"goalxy\": [int, int],\n"
-        "  \"direction\": string (one of \"up\", \"down\", \"left\", \"right\"),\n"
-        "  \"speech\": string (a one-sentence statement).\n"
+        + _plan_keys(max_moves) +
         "Only output the JSON object."
     )
-    print(message)
+    return message
+
+
+def generate_action_plan(sim_time, sim_vision, agent, prev_action_plan="", overseer_directives=None,
+                         max_moves=1, tick=None, world_size=None):
+    message = _action_plan_message(sim_time, sim_vision, agent, prev_action_plan, overseer_directives,
+                                   max_moves, world_size)
+    logger.debug("Prompt:\n%s", message)
     try:
-        completion = client.chat.completions.create(
-            #model="gpt-4o-mini",
-            model="o3-mini",
-            messages=[{"role": "developer", "content": message}]
-        )
-        action_plan = completion.choices[0].message.content.strip()
-        print("LLM action plan output:", action_plan)
+        action_plan = _complete(message, "action", agent.name, tick)
+        logger.debug("LLM action plan output: %s", action_plan)
+        return action_plan
+    except Exception as e:
+        logger.warning("API call failed: %s", e)
+        return None
+
+
+async def generate_action_plan_async(sim_time, sim_vision, agent, prev_action_plan="", overseer_directives=None,
+                                     max_moves=1, tick=None, world_size=None):
+    # same as generate_action_plan, but awaits the shared pooled client
+    message = _action_plan_message(sim_time, sim_vision, agent, prev_action_plan, overseer_directives,
+                                   max_moves, world_size)
+    logger.debug("Prompt:\n%s", message)
+    try:
+        action_plan = await _acomplete(message, "action", agent.name, tick)
+        logger.debug("LLM action plan output: %s", action_plan)
         return action_plan
     except Exception as e:
-        print(f"API call failed: {e}")
+        logger.warning("API call failed: %s", e)
+        return None
+
+
+def _batch_agent_block(agent, sim_vision, prev_action_plan=""):
+    # per-agent state inside a batched prompt (rules are sent once per request)
+    daily_plan = getattr(agent, "daily_plan", "None")
+    return (
+        f"- Agent name: {agent.name}\n"
+        f"  role: {agent.role}; personality: {agent.personality}; "
+        f"position x: {agent.x}; position y: {agent.y}\n"
+        f"  vision: {sim_vision}\n"
+        f"  previous action plan: {prev_action_plan}\n"
+        f"  current daily plan: {daily_plan}\n"
+    )
+
+
+def _batch_action_plan_message(sim_time, blocks, overseer_directives=None, max_moves=1,
+                               world_size=None):
+    if overseer_directives is None:
+        overseer_directives = []
+    return (
+        "You are creating action plans for several agents in a Generative Agents Simulator. "
+        "Each agent's decision should be a movement decision only, with no additional talking beyond a single sentence of speech. "
+        + _action_rules(world_size) +
+        "These rules apply to every agent independently. \n"
+        "For each agent, also produce a one-sentence statement (the agent's 'speech') that expresses what the agent is thinking or saying at this moment. \n"
+        f"Simulation time: {sim_time}\n"
+        f"Overseer directives (the user wants attempts to apply these to agent plans!): "
+        f"{', '.join(overseer_directives) if overseer_directives else 'None'}\n"
+        "Agents:\n"
+        + "".join(blocks) +
+        "\nOutput strictly a JSON array with one object per agent listed above, each with exactly these keys:\n\n"
+        + _plan_keys(max_moves, for_batch=True) +
+        "Only output the JSON array."
+    )
+
+
+def split_action_batches(entries, max_agents=None, max_chars=None):
+    # entries are (agent, vision, prev_action_plan) tuples; yields size-capped
+    # lists of (entry, prompt block) so no single request grows unbounded
+    max_agents = max_agents or BATCH_MAX_AGENTS
+    max_chars  = max_chars or BATCH_MAX_CHARS
+    batch, size = [], 0
+    for entry in entries:
+        block = _batch_agent_block(*entry)
+        if batch and (len(batch) >= max_agents or size + len(block) > max_chars):
+            yield batch
+            batch, size = [], 0
+        batch.append((entry, block))
+        size += len(block)
+    if batch:
+        yield batch
+
+
+def generate_batch_action_plan(sim_time, batch, overseer_directives=None, max_moves=1, tick=None,
+                               world_size=None):
+    # one completion covering every agent in batch (from split_action_batches);
+    # returns the raw JSON array text, or None so callers can fall back per agent
+    message = _batch_action_plan_message(sim_time, [block for _, block in batch],
+                                         overseer_directives, max_moves, world_size)
+    names = ";".join(entry[0].name for entry, _ in batch)
+    logger.debug("Prompt:\n%s", message)
+    try:
+        action_plans = _complete(message, "batch", names, tick)
+        logger.debug("LLM batch action plan output: %s", action_plans)
+        return action_plans
+    except Exception as e:
+        logger.warning("Batch API call failed: %s", e)
+        return None
+
+
+async def generate_batch_action_plan_async(sim_time, batch, overseer_directives=None, max_moves=1,
+                                           tick=None, world_size=None):
+    message = _batch_action_plan_message(sim_time, [block for _, block in batch],
+                                         overseer_directives, max_moves, world_size)
+    names = ";".join(entry[0].name for entry, _ in batch)
+    logger.debug("Prompt:\n%s", message)
+    try:
+        action_plans = await _acomplete(message, "batch", names, tick)
+        logger.debug("LLM batch action plan output: %s", action_plans)
+        return action_plans
+    except Exception as e:
+        logger.warning("Batch API call failed: %s", e)
         return None
 
 
-def generate_daily_action_plan(sim_date, env_summary, agent, prev_daily_plan=""):
+def _daily_plan_message(sim_date, env_summary, agent, prev_daily_plan="", world_size=None):
     #Generate a daily action plan for an agent outlining the overall objectives for the day.
     #The output JSON should include:
     #  - "name": the agent's name,
     #  - "daily_plan": a string representing the overall objectives for the day, including recommended timestamps for when tasks should be attempted.
     
+    width, height = world_size or DEFAULT_WORLD_SIZE
     message = (
         "You are creating a daily action plan for an agent in a Generative Agents Simulator. "
         "The daily action plan should outline the overall objectives for the day—such as tasks to complete, "
@@ -81,7 +373,7 @@ def generate_daily_action_plan(sim_date, env_summary, agent, prev_daily_plan="")
         "should be attempted (for example, '09:00 - Visit the farm', '14:00 - Meet the merchant at the market'). "
         "The daily plan should be conservative in the number of tasks and goals it sets for the day, "
         "to ensure the agent does not overcommit. \n"
-        "The simulation environment is a grid of size 48 x 27. Valid x coordinates are 0 to 47 and valid y coordinates are 0 to 26. \n"
+        f"The simulation environment is a grid of size {width} x {height}. Valid x coordinates are 0 to {width - 1} and valid y coordinates are 0 to {height - 1}. \n"
         "The environment is described as follows: " + env_summary + "\n"
         "RULE: The plan must not contain any moves that take the agent out of bounds. \n"
         "Based on the following information:\n"
@@ -96,15 +388,31 @@ def generate_daily_action_plan(sim_date, env_summary, agent, prev_daily_plan="")
         "  \"daily_plan\": string.\n"
         "Only output the JSON object."
     )
-    print(message)
+    return message
+
+
+def generate_daily_action_plan(sim_date, env_summary, agent, prev_daily_plan="", tick=None,
+                               world_size=None):
+    message = _daily_plan_message(sim_date, env_summary, agent, prev_daily_plan, world_size)
+    logger.debug("Prompt:\n%s", message)
     try:
-        completion = client.chat.completions.create(
-            model="o3-mini",
-            messages=[{"role": "developer", "content": message}]
-        )
-        daily_action_plan = completion.choices[0].message.content.strip()
-        print("LLM daily action plan output:", daily_action_plan)
+        daily_action_plan = _complete(message, "daily", agent.name, tick)
+        logger.debug("LLM daily action plan output: %s", daily_action_plan)
+        return daily_action_plan
+    except Exception as e:
+        logger.warning("Daily plan API call failed: %s", e)
+        return None
+
+
+async def generate_daily_action_plan_async(sim_date, env_summary, agent, prev_daily_plan="", tick=None,
+                                           world_size=None):
+    # same as generate_daily_action_plan, but awaits the shared pooled client
+    message = _daily_plan_message(sim_date, env_summary, agent, prev_daily_plan, world_size)
+    logger.debug("Prompt:\n%s", message)
+    try:
+        daily_action_plan = await _acomplete(message, "daily", agent.name, tick)
+        logger.debug("LLM daily action plan output: %s", daily_action_plan)
         return daily_action_plan
     except Exception as e:
-        print(f"Daily plan API call failed: {e}")
+        logger.warning("Daily plan API call failed: %s", e)
         return None
@@ -0,0 +1,90 @@
+# llm/stub_server.py
+# OpenAI-compatible /v1/chat/completions endpoint backed by StubBackend,
+# for load testing the real HTTP path (LLM_BACKEND=local) without a key.
+#   python -m GenerativeAgents.llm.stub_server --port 8000 --latency lognormal:-1,0.5
+
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from GenerativeAgents.llm.backends import StubBackend
+
+
+def make_handler(backend):
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, so pooled clients reuse sockets
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                message = body["messages"][-1]["content"]
+            except Exception as e:
+                self._send(400, {"error": {"message": f"bad request: {e}"}})
+                return
+
+            result = backend.complete(message, body.get("model", "stub"))
+            self._send(200, {
+                "id": f"stub-{backend.calls}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": result.model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": result.text},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": result.prompt_tokens,
+                    "completion_tokens": result.completion_tokens,
+                    "total_tokens": result.prompt_tokens + result.completion_tokens
+                }
+            })
+
+        def _send(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            # one line per request would dominate a load test
+            pass
+
+    return StubHandler
+
+
+def serve(host="127.0.0.1", port=8000, seed=0, latency="0"):
+    backend = StubBackend(seed=seed, latency=latency)
+    server = ThreadingHTTPServer((host, port), make_handler(backend))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", default="0",
+                        help="latency spec, eg 0.2 | uniform:0.1,0.5 | lognormal:-1,0.5")
+    args = parser.parse_args(argv)
+
+    server = serve(args.host, args.port, args.seed, args.latency)
+    print(f"Stub LLM listening on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+# llm/telemetry.py
+
+import csv
+import json
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, asdict, fields
+
+# call outcomes; the last two are reported back by the simulation
+OK, API_ERROR, JSON_ERROR, ILLEGAL_MOVE = "ok", "api_error", "json_error", "illegal_move"
+
+# USD per 1M (prompt, completion) tokens, matched by model-name prefix
+PRICES = {
+    "o3-mini":      (1.10, 4.40),
+    "gpt-4o-mini":  (0.15, 0.60),
+    "gpt-4o":       (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1":      (2.00, 8.00),
+}
+
+
+def set_price(model_prefix: str, prompt_per_m: float, completion_per_m: float) -> None:
+    PRICES[model_prefix] = (prompt_per_m, completion_per_m)
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    # longest matching prefix wins (so gpt-4o-mini is not priced as gpt-4o)
+    best = None
+    for prefix in PRICES:
+        if model.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    if best is None:
+        return 0.0
+    p_in, p_out = PRICES[best]
+    return (prompt_tokens * p_in + completion_tokens * p_out) / 1_000_000
+
+
+@dataclass
+class CallRecord:
+    kind: str                   # "action", "daily" or "batch"
+    model: str
+    agent: str                  # agent name (batch calls: names joined by ";")
+    tick: int
+    started: float              # unix time the call began
+    latency_s: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost_usd: float = 0.0
+    outcome: str = OK
+    cached: bool = False
+    error: str = ""
+
+
+class Histogram:
+    # fixed log-spaced buckets; quantiles are interpolated inside a bucket
+    def __init__(self, start=0.001, factor=1.25, count=60):
+        self.bounds = [start * factor ** i for i in range(count)]
+        self.counts = [0] * (count + 1)      # last bucket is +Inf
+        self.n = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        lo, hi = 0, len(self.bounds)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if value <= self.bounds[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        self.counts[lo] += 1
+        self.n += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.n:
+            return 0.0
+        rank, seen = q * self.n, 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                lo = self.bounds[i - 1] if i > 0 else 0.0
+                hi = self.bounds[i] if i < len(self.bounds) else self.max
+                est = lo + (hi - lo) * (rank - seen) / c
+                return min(max(est, self.min), self.max)
+            seen += c
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.n,
+            "mean": self.total / self.n if self.n else 0.0,
+            "min": self.min if self.n else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class Telemetry:
+    # per-call records (bounded) plus running aggregates for the whole run
+    def __init__(self, max_records=100_000):
+        self.records = deque(maxlen=max_records)
+        self._lock = threading.Lock()
+        self._recent = OrderedDict()         # (agent, tick) -> [latest record, agent's outcome]
+        self.in_flight = 0
+        self.reset_aggregates()
+
+    def reset_aggregates(self):
+        self.latency = {}                    # kind -> Histogram (uncached calls)
+        self.outcomes = {}                   # outcome -> count of calls
+        self.agent_outcomes = {}             # outcome -> count of (call, agent) decisions
+        self.calls = 0
+        self.cached_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+
+    # begin() before a backend call, end() after; in_flight counts the gap
+    def begin(self):
+        with self._lock:
+            self.in_flight += 1
+        return time.time(), time.perf_counter()
+
+    def end(self, begun, kind, model, agent, tick, prompt_tokens=0,
+            completion_tokens=0, outcome=OK, cached=False, error=""):
+        started, t0 = begun
+        latency = time.perf_counter() - t0
+        cost = 0.0 if cached else estimate_cost(model, prompt_tokens, completion_tokens)
+        rec = CallRecord(kind, model, agent or "", -1 if tick is None else tick,
+                         started, latency, prompt_tokens, completion_tokens,
+                         cost, outcome, cached, error)
+        with self._lock:
+            self.in_flight -= 1
+            self.records.append(rec)
+            self.calls += 1
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if cached:
+                self.cached_calls += 1
+            else:
+                self.latency.setdefault(kind, Histogram()).add(latency)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cost_usd += cost
+            for name in rec.agent.split(";"):
+                self._recent[(name, rec.tick)] = [rec, outcome]
+                self._recent.move_to_end((name, rec.tick))
+                self.agent_outcomes[outcome] = self.agent_outcomes.get(outcome, 0) + 1
+            while len(self._recent) > 10_000:
+                self._recent.popitem(last=False)
+        return rec
+
+    def mark(self, agent, tick, outcome):
+        # downgrade agent's part of its latest call for tick once the
+        # simulation has seen what came back (ie, JSON that didn't parse, or
+        # an illegal move). A batched call answers several agents: the call
+        # itself is only downgraded once every agent in it has been
+        with self._lock:
+            entry = self._recent.get((agent, -1 if tick is None else tick))
+            if entry is None or entry[1] == outcome:
+                return
+            rec = entry[0]
+            self.agent_outcomes[entry[1]] -= 1
+            self.agent_outcomes[outcome] = self.agent_outcomes.get(outcome, 0) + 1
+            entry[1] = outcome
+            if rec.outcome == outcome:
+                return
+            if all(self._recent.get((name, rec.tick), (rec, outcome))[1] == outcome
+                   for name in rec.agent.split(";")):
+                self.outcomes[rec.outcome] -= 1
+                self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+                rec.outcome = outcome
+
+    def summary(self) -> dict:
+        with self._lock:
+            merged = Histogram()
+            for h in self.latency.values():
+                merged.counts = [a + b for a, b in zip(merged.counts, h.counts)]
+                merged.n += h.n
+                merged.total += h.total
+                merged.min = min(merged.min, h.min)
+                merged.max = max(merged.max, h.max)
+            return {
+                "calls": self.calls,
+                "cached_calls": self.cached_calls,
+                "in_flight": self.in_flight,
+                "outcomes": dict(self.outcomes),
+                "agent_outcomes": dict(self.agent_outcomes),
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "cost_usd": round(self.cost_usd, 6),
+                "latency_s": merged.summary(),
+                "latency_s_by_kind": {k: h.summary() for k, h in self.latency.items()},
+            }
+
+    def export_jsonl(self, path):
+        with self._lock:
+            rows = [asdict(r) for r in self.records]
+        with open(path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+
+    def export_csv(self, path):
+        with self._lock:
+            rows = [asdict(r) for r in self.records]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=[fl.name for fl in fields(CallRecord)])
+            writer.writeheader()
+            writer.writerows(rows)
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+            self._recent.clear()
+            self.reset_aggregates()
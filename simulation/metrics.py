@@ -0,0 +1,433 @@
+# simulation/metrics.py
+# Live metrics for long runs: counters, gauges and histograms in one
+# registry, read while the simulation keeps going. A registry can be
+# scraped over HTTP in the Prometheus text format and/or written to a
+# snapshot file every few seconds:
+#
+#   python -m GenerativeAgents.simulation.run --steps 5000 --metrics-port 9100 --metrics-file metrics.jsonl
+#   curl localhost:9100/metrics
+#
+# The UI picks the same settings up from GA_METRICS_PORT / GA_METRICS_FILE.
+# LLM numbers (calls in flight, latency, outcomes, cache hits) are read from
+# llm.telemetry and llm.cache when scraped, so the call path is unchanged.
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from GenerativeAgents.llm import llm
+from GenerativeAgents.llm.telemetry import JSON_ERROR, ILLEGAL_MOVE
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FRAME_BUCKETS   = (0.001, 0.0025, 0.005, 0.01, 0.0167, 0.025, 0.033, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _sample_name(name, labels):
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{str(v)}"'.replace("\n", " ") for k, v in labels)
+    return f"{name}{{{inner}}}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    # only goes up; one value per label set
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name, self.help = name, help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(_labels(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, v) for key, v in self._values.items()]
+
+
+class Gauge(Counter):
+    # set / inc / dec, or fn() read at scrape time: a number, or a
+    # {label value: number} dict for the one label named by `label`
+    kind = "gauge"
+
+    def __init__(self, name, help="", fn=None, label=None):
+        super().__init__(name, help)
+        self.fn, self.label = fn, label
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.fn is None:
+            return super().samples()
+        try:
+            value = self.fn()
+        except Exception as e:
+            print(f"Error: metric {self.name} failed: {e}", file=sys.stderr)
+            return []
+        if value is None:
+            return []
+        if isinstance(value, dict):
+            return [(self.name, ((self.label, k),), v) for k, v in value.items()]
+        return [(self.name, (), value)]
+
+
+class Histogram:
+    # cumulative buckets, as Prometheus expects them
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=DEFAULT_BUCKETS):
+        self.name, self.help = name, help
+        self.bounds = tuple(sorted(buckets))
+        self._series = {}                    # labels -> [bucket counts..., +Inf], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _labels(labels)
+        with self._lock:
+            counts, total = self._series.get(key) or ([0] * (len(self.bounds) + 1), 0.0)
+            for i, bound in enumerate(self.bounds):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._series[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        out = []
+        for key, counts, total in series:
+            out.extend(histogram_samples(self.name, key, self.bounds, counts, total))
+        return out
+
+
+def histogram_samples(name, key, bounds, counts, total):
+    # per-bucket counts (last one +Inf) -> _bucket / _sum / _count samples
+    out, seen = [], 0
+    for bound, c in zip(list(bounds) + [float("inf")], counts):
+        seen += c
+        out.append((f"{name}_bucket", key + (("le", _number(bound)),), seen))
+    out.append((f"{name}_sum", key, total))
+    out.append((f"{name}_count", key, seen))
+    return out
+
+
+class Family:
+    # samples produced by a function at scrape time (see Registry.collector)
+    def __init__(self, name, kind, help, fn):
+        self.name, self.kind, self.help, self.fn = name, kind, help, fn
+
+    def samples(self):
+        try:
+            return self.fn()
+        except Exception as e:
+            print(f"Error: metric {self.name} failed: {e}", file=sys.stderr)
+            return []
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}                   # name -> metric, in registration order
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def _add(self, metric):
+        with self._lock:
+            # registering a name again replaces it (ie, a new simulation)
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help="", fn=None, label=None):
+        # with fn: a total kept elsewhere, read at scrape time (see Gauge)
+        if fn is None:
+            return self._add(Counter(name, help))
+        metric = Gauge(name, help, fn, label)
+        metric.kind = "counter"
+        return self._add(metric)
+
+    def gauge(self, name, help="", fn=None, label=None):
+        return self._add(Gauge(name, help, fn, label))
+
+    def histogram(self, name, help="", buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, buckets))
+
+    def collector(self, name, kind, help, fn):
+        # fn() -> [(sample name, ((label, value), ...), value), ...]
+        return self._add(Family(name, kind, help, fn))
+
+    def unregister(self, *names):
+        with self._lock:
+            for name in names:
+                self._metrics.pop(name, None)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def collect(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [(m, m.samples()) for m in metrics]
+
+    def render(self):
+        # Prometheus text exposition format 0.0.4
+        lines = []
+        for m, samples in self.collect():
+            if m.help:
+                lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in samples:
+                lines.append(f"{_sample_name(name, labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        # flat {"name{labels}": value} plus the time, for snapshot files
+        now = time.time()
+        values = {_sample_name(name, labels): value
+                  for _, samples in self.collect() for name, labels, value in samples}
+        return {"time": now, "uptime_s": round(now - self.started, 3), "metrics": values}
+
+
+registry = Registry()
+
+# updated by SimulationManager and the UI
+ticks = registry.counter("ga_ticks_total", "simulation ticks completed")
+tick_seconds = registry.histogram("ga_tick_seconds", "wall time per tick")
+frame_seconds = registry.histogram("ga_render_frame_seconds", "UI frame time", FRAME_BUCKETS)
+_last_tick = 0.0
+_recent_ticks = deque(maxlen=1024)           # completion times, for ticks/s
+
+
+def tick_done(seconds):
+    global _last_tick
+    now = time.time()
+    ticks.inc()
+    tick_seconds.observe(seconds)
+    _last_tick = now
+    _recent_ticks.append(now)
+
+
+def _ticks_per_s(window=60.0):
+    now = time.time()
+    recent = [t for t in list(_recent_ticks) if t >= now - window]
+    if len(recent) < 2:
+        return 0.0
+    return (len(recent) - 1) / max(recent[-1] - recent[0], 1e-9)
+
+
+registry.gauge("ga_ticks_per_second", "ticks/s over the last minute", _ticks_per_s)
+registry.gauge("ga_seconds_since_last_tick", "time since a tick last finished (stall check)",
+               lambda: time.time() - _last_tick if _last_tick else None)
+
+
+# LLM layer, read from llm.telemetry / llm.cache when scraped
+def _outcome_share(outcome):
+    def share():
+        # per agent decision, so one bad plan in a batch counts once
+        counts = dict(llm.telemetry.agent_outcomes)
+        decisions = sum(counts.values())
+        return counts.get(outcome, 0) / decisions if decisions else 0.0
+    return share
+
+
+def _llm_latency():
+    # telemetry keeps 60 log-spaced buckets per call kind; every 4th bound
+    # is exported, summing the buckets in between, so counts stay exact
+    out = []
+    with llm.telemetry._lock:
+        series = [(kind, list(h.counts), h.bounds, h.total) for kind, h in llm.telemetry.latency.items()]
+    for kind, counts, bounds, total in series:
+        keep = list(range(0, len(bounds), 4))
+        merged, start = [], 0
+        for i in keep:
+            merged.append(sum(counts[start:i + 1]))
+            start = i + 1
+        merged.append(sum(counts[start:]))
+        out.extend(histogram_samples("ga_llm_latency_seconds", (("kind", kind),),
+                                     [round(bounds[i], 6) for i in keep], merged, total))
+    return out
+
+
+def _cache_stat(name):
+    return lambda: llm.cache.stats()[name]
+
+
+registry.gauge("ga_llm_in_flight", "LLM calls waiting on the backend", lambda: llm.telemetry.in_flight)
+registry.counter("ga_llm_calls_total", "LLM calls made", lambda: llm.telemetry.calls)
+# a gauge: Telemetry.mark moves calls from "ok" to another outcome afterwards
+registry.gauge("ga_llm_call_outcomes", "LLM calls by current outcome",
+               lambda: dict(llm.telemetry.outcomes), "outcome")
+registry.counter("ga_llm_cached_calls_total", "LLM calls served from the cache", lambda: llm.telemetry.cached_calls)
+registry.counter("ga_llm_tokens_total", "tokens sent and received",
+               lambda: {"prompt": llm.telemetry.prompt_tokens,
+                        "completion": llm.telemetry.completion_tokens}, "type")
+registry.counter("ga_llm_cost_usd_total", "estimated spend", lambda: llm.telemetry.cost_usd)
+registry.gauge("ga_llm_illegal_move_ratio", "share of agent plans that were illegal moves",
+               _outcome_share(ILLEGAL_MOVE))
+registry.gauge("ga_llm_json_error_ratio", "share of agent plans that did not parse",
+               _outcome_share(JSON_ERROR))
+registry.collector("ga_llm_latency_seconds", "histogram", "uncached LLM call latency", _llm_latency)
+registry.gauge("ga_llm_cache_hit_ratio", "response cache hits / lookups", _cache_stat("hit_rate"))
+registry.counter("ga_llm_cache_hits_total", "response cache hits", _cache_stat("hits"))
+registry.counter("ga_llm_cache_misses_total", "response cache misses", _cache_stat("misses"))
+
+
+def watch(sim, reg=None):
+    # queue depths and map stats of one SimulationManager
+    reg = reg or registry
+    reg.gauge("ga_sim_tick", "current tick", lambda: sim.step_count)
+    reg.gauge("ga_agents", "agents in the simulation", lambda: len(sim.agents))
+    reg.gauge("ga_agent_queued_moves", "planned moves waiting in agents' queues",
+              lambda: sum(len(a.move_queue) for a in list(sim.agents)))
+    reg.gauge("ga_directives", "overseer directives still alive",
+              lambda: len(sim.overseer_directives))
+    if sim.scheduler is not None:
+        sch = sim.scheduler
+        reg.gauge("ga_scheduler_inflight", "pipelined LLM calls submitted, not finished",
+                  lambda: sch.inflight)
+        reg.gauge("ga_scheduler_prefetched", "next-tick decisions already started",
+                  lambda: len(sch._prefetched))
+    chunk_stats = getattr(sim.environment, "chunk_stats", None)
+    if chunk_stats is not None and chunk_stats() is not None:
+        reg.gauge("ga_map_chunks", "map chunks by state",
+                  lambda: {k: v for k, v in chunk_stats().items() if k != "loaded_bytes"}, "state")
+        reg.gauge("ga_map_chunk_bytes", "tile bytes in loaded chunks",
+                  lambda: chunk_stats()["loaded_bytes"])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = registry
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path in ("/", "/metrics"):
+            body, ctype = self.registry.render(), "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body, ctype = json.dumps(self.registry.snapshot()), "application/json"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class MetricsServer:
+    # GET /metrics (Prometheus text) and /metrics.json on a daemon thread;
+    # localhost only unless another host is given
+    def __init__(self, port, host="127.0.0.1", reg=None):
+        handler = type("Handler", (_Handler,), {"registry": reg or registry})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       name="metrics-http", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SnapshotWriter:
+    # every interval seconds: a .jsonl path gets one line appended (a history
+    # of the run), any other path is replaced with the latest snapshot
+    def __init__(self, path, interval=10.0, reg=None):
+        self.path, self.interval = path, interval
+        self.registry = reg or registry
+        self._stop = threading.Event()
+        self._last = None
+        self.thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        snap = self.registry.snapshot()
+        # ticks/s since the previous snapshot, so a file alone shows stalls
+        done = snap["metrics"].get("ga_ticks_total", 0)
+        if self._last is not None:
+            elapsed = snap["time"] - self._last[0]
+            snap["ticks_per_s_since_last"] = (done - self._last[1]) / elapsed if elapsed > 0 else 0.0
+        self._last = (snap["time"], done)
+        try:
+            if self.path.endswith(".jsonl"):
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(snap) + "\n")
+            else:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(snap, f, indent=1)
+                os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Error: unable to write metrics to {self.path}: {e}", file=sys.stderr)
+
+    def close(self):
+        self._stop.set()
+        self.thread.join()
+        self.write()
+
+
+class Exposure:
+    # what expose() started; close() stops it and writes a last snapshot
+    def __init__(self, server=None, writer=None):
+        self.server, self.writer = server, writer
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def expose(sim=None, port=None, path=None, interval=None, host="127.0.0.1"):
+    # port / path / interval default to GA_METRICS_PORT, GA_METRICS_FILE and
+    # GA_METRICS_INTERVAL; with neither port nor path nothing is started
+    port = port if port is not None else os.getenv("GA_METRICS_PORT")
+    path = path or os.getenv("GA_METRICS_FILE")
+    interval = interval or float(os.getenv("GA_METRICS_INTERVAL") or 10.0)
+    if sim is not None:
+        watch(sim)
+    server = writer = None
+    if port not in (None, ""):
+        try:
+            server = MetricsServer(int(port), host)
+            print(f"metrics on http://{host}:{server.port}/metrics", file=sys.stderr)
+        except OSError as e:
+            print(f"Error: unable to serve metrics on port {port}: {e}", file=sys.stderr)
+    if path:
+        writer = SnapshotWriter(path, interval)
+    return Exposure(server, writer)
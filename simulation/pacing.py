@@ -0,0 +1,84 @@
+# simulation/pacing.py
+# How fast the simulation thread steps. A TickPacer is called once per tick
+# and sleeps (or blocks while paused) as the current mode asks:
+#
+#   "max"       no waiting, step as fast as the LLM answers
+#   "realtime"  ratio sim seconds per wall second: a 10-minute step at
+#               ratio 1200 takes at least 0.5 s; slow ticks are not made up
+#   "paused"    wait until resume() (or another mode is set)
+#
+# Modes can be changed from any thread; a waiting pacer wakes up at once.
+
+import time
+import threading
+
+PACING_MODES = ("max", "realtime", "paused")
+
+
+class TickPacer:
+    def __init__(self, mode="realtime", ratio=1200.0):
+        self._cond = threading.Condition()
+        self.mode = "max"
+        self.ratio = 1.0
+        self._resume_mode = "realtime"
+        self._stopped = False
+        self.set_mode(mode, ratio)
+
+    def set_mode(self, mode, ratio=None):
+        if mode not in PACING_MODES:
+            raise ValueError(f"Unknown pacing mode {mode!r}, expected one of {PACING_MODES}")
+        if ratio is not None and ratio <= 0:
+            raise ValueError("ratio must be positive")
+        with self._cond:
+            if mode != "paused":
+                self._resume_mode = mode
+            elif self.mode != "paused":
+                self._resume_mode = self.mode
+            self.mode = mode
+            if ratio is not None:
+                self.ratio = float(ratio)
+            self._cond.notify_all()
+
+    def pause(self):
+        self.set_mode("paused")
+
+    def resume(self):
+        if self.mode == "paused":
+            self.set_mode(self._resume_mode)
+
+    def toggle_pause(self):
+        if self.mode == "paused":
+            self.resume()
+        else:
+            self.pause()
+
+    @property
+    def paused(self):
+        return self.mode == "paused"
+
+    def stop(self):
+        # releases a waiting thread for good (window closed)
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def interval(self, sim_seconds):
+        # wall seconds one tick should take in the current mode
+        if self.mode == "realtime":
+            return sim_seconds / self.ratio
+        return 0.0
+
+    def wait(self, started, sim_seconds):
+        # call after a tick that began at time.perf_counter() == started and
+        # advanced the clock by sim_seconds; returns False once stopped
+        with self._cond:
+            while not self._stopped:
+                if self.mode == "paused":
+                    self._cond.wait()
+                    continue
+                left = started + self.interval(sim_seconds) - time.perf_counter()
+                if left <= 0:
+                    break
+                # a mode or ratio change re-evaluates the deadline
+                self._cond.wait(left)
+            return not self._stopped
@@ -0,0 +1,170 @@
+# simulation/run.py
+# Headless runner: no Tk, no rendering, no per-tick sleep.
+#   python -m GenerativeAgents.simulation.run --agents spec.json --steps 500 --out run.jsonl
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+from GenerativeAgents import tracing
+from GenerativeAgents.llm import llm
+from GenerativeAgents.simulation import metrics
+from GenerativeAgents.simulation.scenario import (
+    DEFAULT_AGENT_SPECS,
+    load_agent_specs,
+    build_simulation,
+    tick_record,
+)
+
+
+class TickWriter:
+    # streams one JSON line per tick, flushed so a crashed run keeps its ticks
+    def __init__(self, sim, path):
+        self.sim  = sim
+        self.file = sys.stdout if path == "-" else open(path, "w", encoding="utf-8")
+        self._seen = sim.message_count
+
+    def write(self):
+        new = self.sim.message_count - self._seen
+        self._seen = self.sim.message_count
+        messages = self.sim.message_log[-new:] if new > 0 else []
+        self.file.write(json.dumps(tick_record(self.sim, messages)) + "\n")
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def load_directives(path):
+    # {"tick": ["directive", ...]} - applied just before that tick runs
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {int(k): v for k, v in json.load(f).items()}
+
+
+def run(sim, steps, writer=None, directives=None):
+    directives = directives or {}
+    for _ in range(steps):
+        for text in directives.get(sim.step_count + 1, []):
+            sim.add_directive(text)
+        sim.step()
+        if writer:
+            writer.write()
+
+
+async def run_async(sim, steps, writer=None, directives=None):
+    # one event loop for the whole run, so the pooled client is reused
+    directives = directives or {}
+    try:
+        for _ in range(steps):
+            for text in directives.get(sim.step_count + 1, []):
+                sim.add_directive(text)
+            await sim.step_async()
+            if writer:
+                writer.write()
+    finally:
+        await llm.close_async_client()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run a Generative Agents simulation headless")
+    parser.add_argument("--agents", help="agent spec JSON (default: the built-in town roster)")
+    parser.add_argument("--map", help="map file (.txt, .json, .bin) or bundled layout name")
+    parser.add_argument("--map-storage", choices=("objects", "array", "chunked"), default="objects",
+                        help="array keeps tiles in a numpy uint8 grid; chunked pages a .bin map in")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--out", default="run.jsonl", help="per-tick JSONL output ('-' for stdout)")
+    parser.add_argument("--start", help="simulation start, eg 2025-06-01T06:00")
+    parser.add_argument("--time-step", type=int, default=10, help="minutes per tick")
+    parser.add_argument("--directives", help='JSON {"tick": ["directive", ...]} schedule')
+    parser.add_argument("--backend", help="openai | local | stub (default: LLM_BACKEND)")
+    parser.add_argument("--base-url", help="endpoint for the local backend")
+    parser.add_argument("--latency", help="stub latency spec, eg uniform:0.1,0.5 (implies --backend stub)")
+    parser.add_argument("--seed", type=int, help="stub seed (implies --backend stub)")
+    parser.add_argument("--mode", choices=("threads", "async", "pipelined"), default="threads")
+    parser.add_argument("--batch", action="store_true", help="batched multi-agent planning")
+    parser.add_argument("--plan-horizon", type=int, default=1, help="moves per LLM decision")
+    parser.add_argument("--max-concurrency", type=int, help="in-flight LLM call cap (async)")
+    parser.add_argument("--telemetry", help="write per-call telemetry (.csv or .jsonl)")
+    parser.add_argument("--trace", help="write a Chrome trace of the run (open in ui.perfetto.dev)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve live Prometheus metrics on localhost:PORT/metrics")
+    parser.add_argument("--metrics-file", help="write metric snapshots (.jsonl appends, else replaces)")
+    parser.add_argument("--metrics-interval", type=float, help="seconds between snapshots (default 10)")
+    return parser
+
+
+def configure_backend(args, parser):
+    if not (args.backend or args.base_url or args.latency or args.seed is not None):
+        return
+    # --latency / --seed only mean something to the stub, so they imply it
+    stub_only = args.latency or args.seed is not None
+    backend = args.backend or ("stub" if stub_only else None)
+    if stub_only and backend != "stub":
+        parser.error("--latency and --seed need the stub backend")
+    if args.base_url and backend == "stub":
+        parser.error("--base-url does not apply to the stub backend")
+    options = {}
+    if args.base_url:
+        options["base_url"] = args.base_url
+    if args.latency:
+        options["latency"] = args.latency
+    if args.seed is not None:
+        options["seed"] = args.seed
+    llm.set_backend(backend, **options)
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    configure_backend(args, parser)
+    if args.max_concurrency:
+        llm.set_max_concurrency(args.max_concurrency)
+
+    specs = load_agent_specs(args.agents) if args.agents else DEFAULT_AGENT_SPECS
+    sim = build_simulation(specs, args.start, args.time_step,
+                           map_file=args.map,
+                           map_storage=args.map_storage,
+                           batch_planning=args.batch,
+                           plan_horizon=args.plan_horizon,
+                           pipelined=args.mode == "pipelined")
+    writer = TickWriter(sim, args.out)
+    directives = load_directives(args.directives)
+    if args.trace:
+        tracing.enable()
+    exposure = metrics.expose(sim, args.metrics_port, args.metrics_file, args.metrics_interval)
+
+    started = time.perf_counter()
+    try:
+        if args.mode == "async":
+            asyncio.run(run_async(sim, args.steps, writer, directives))
+        else:
+            run(sim, args.steps, writer, directives)
+    finally:
+        sim.close()
+        writer.close()
+        exposure.close()
+    elapsed = time.perf_counter() - started
+
+    if args.telemetry:
+        if args.telemetry.endswith(".csv"):
+            llm.telemetry.export_csv(args.telemetry)
+        else:
+            llm.telemetry.export_jsonl(args.telemetry)
+    if args.trace:
+        events = tracing.export_chrome(args.trace)
+        print(f"{events} trace events written to {args.trace}", file=sys.stderr)
+
+    summary = llm.telemetry.summary()
+    print(f"{sim.step_count} ticks, {len(sim.agents)} agents in {elapsed:.1f}s "
+          f"({sim.step_count / elapsed if elapsed else 0:.2f} ticks/s), "
+          f"{summary['calls']} LLM calls, p95 {summary['latency_s']['p95']:.3f}s, "
+          f"~${summary['cost_usd']:.4f}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# simulation/scenario.py
+
+import json
+from datetime import datetime, timedelta
+
+from GenerativeAgents.agents.agent import Agent
+from GenerativeAgents.environment.map import Map, DEFAULT_LAYOUT
+from GenerativeAgents.simulation.sim_manager import SimulationManager
+
+# the default town roster: (name, role, age, personality, x, y)
+DEFAULT_AGENT_SPECS = [
+        ("Ada",   "Farmer",    29, "Smart",      2,  2),
+        ("Gus",   "Fisherman", 32, "Shy",        5,  5),
+        ("Clara", "ShopOwner", 40, "Friendly",   8,  2),
+        ("Otto",  "ShopOwner",  4, "Persuasive",10,  6),
+        ("Alan",  "Farmer",    57, "Grumpy",    14,  4),
+        ("Olive", "Artisan",   30, "Creative",  17,  8),
+        ("Mavis", "Farmer",    25, "Bubbly",    20, 9),
+        ("Finn",  "Student",    9, "Hyper",     24, 9)
+    ]
+
+SPEC_FIELDS = ("name", "role", "age", "personality", "x", "y")
+
+
+def load_agent_specs(path):
+    # JSON list of [name, role, age, personality, x, y] rows, or of objects
+    # with those keys (plus an optional vision_radius)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_agents(specs, vision_radius=5):
+    agents = []
+    for spec in specs:
+        if isinstance(spec, dict):
+            kwargs = {k: spec[k] for k in SPEC_FIELDS}
+            agents.append(Agent(**kwargs,
+                                vision_radius=spec.get("vision_radius", vision_radius)))
+        else:
+            agents.append(Agent(*spec, vision_radius=vision_radius))
+    return agents
+
+
+def parse_start_time(value):
+    # "2025-06-01T06:00" style strings, or None for today at 06:00
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def build_simulation(agent_specs=None, start_time=None, time_step_minutes=10,
+                     environment=None, map_file=None, map_storage="objects", **options):
+    # one ready-to-step world; options go straight to SimulationManager
+    # (batch_planning, plan_horizon, pipelined, ...). Without an environment
+    # the map comes from map_file (a path or bundled layout name, default town).
+    agents = make_agents(agent_specs or DEFAULT_AGENT_SPECS)
+    if environment is None:
+        environment = Map.from_file(map_file or DEFAULT_LAYOUT, storage=map_storage)
+    return SimulationManager(
+        agents=agents,
+        environment=environment,
+        start_time=parse_start_time(start_time),
+        time_step=timedelta(minutes=time_step_minutes),
+        **options
+    )
+
+
+def tick_record(sim, new_messages=()):
+    # JSON-ready snapshot of the world after a step
+    return {
+        "tick": sim.step_count,
+        "time": sim.time_manager.current_time.isoformat(timespec="minutes"),
+        "agents": [
+            {"name": ag.name, "x": ag.x, "y": ag.y, "speech": ag.speech}
+            for ag in sim.agents
+        ],
+        "directives": [d["text"] for d in sim.overseer_directives],
+        "messages": list(new_messages),
+    }
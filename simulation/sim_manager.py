@@ -1,20 +1,36 @@
+import sys
 import time, json
+import asyncio
+import threading
+from collections import deque
 from datetime import timedelta
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Optional
 
-import tkinter.font as tkFont
-from GenerativeAgents.agents.agent       import Agent
-from GenerativeAgents.environment.map    import Map
+from GenerativeAgents import tracing
+from GenerativeAgents.environment.spatial import SpatialIndex
 from GenerativeAgents.simulation.time_manager import TimeManager
+from GenerativeAgents.simulation.snapshot import WorldSnapshot, AgentState
+from GenerativeAgents.simulation import metrics
 from GenerativeAgents.llm.llm            import (
     generate_action_plan,
     generate_daily_action_plan,
+    generate_action_plan_async,
+    generate_daily_action_plan_async,
+    generate_batch_action_plan,
+    generate_batch_action_plan_async,
+    split_action_batches,
+    telemetry,
 )
+from GenerativeAgents.llm.telemetry import JSON_ERROR, ILLEGAL_MOVE
+
+DIRECTIONS = ("up", "down", "left", "right")
 
 class SimulationManager:
     def __init__(self, agents, environment, start_time=None,
-                 time_step=timedelta(minutes=10)):
+                 time_step=timedelta(minutes=10),
+                 batch_planning=False, batch_size=None, plan_horizon=1,
+                 pipelined=False, max_workers=None):
         self.agents       = agents
         self.environment  = environment
         self.time_manager = TimeManager(start_time=start_time,
@@ -24,14 +40,37 @@ class SimulationManager:
 
         # UI shared logs & directives
         self.message_log: list[str]  = ["Waiting for agents to generate action plans…"]
+        self.message_count = 0           # total ever logged (the log keeps 20)
+        self._log_lock = threading.Lock()
         self.overseer_directives: list[dict] = []       
         self.daily_ready = False
 
-        # initialise relationships to 0
+        # batched micro planning: one completion per batch_size agents
+        # (None = llm.BATCH_MAX_AGENTS), per-agent calls only as a fallback
+        self.batch_planning = batch_planning
+        self.batch_size     = batch_size
+
+        # multi-step plans: each LLM decision may queue up to plan_horizon
+        # moves, walked one per tick until something forces a re-plan
+        self.plan_horizon   = max(1, plan_horizon)
+
+        # pipelined ticks: next-tick decisions start while this tick finishes
+        # (per-agent planning only; batching would serialise agents again)
+        if pipelined and batch_planning:
+            raise ValueError("pipelined and batch_planning cannot be combined")
+        self.scheduler = PipelinedScheduler(self, max_workers) if pipelined else None
+
+        # spatial hash of agent positions for vision queries, bucketed by
+        # vision radius and kept current by Agent.move
+        self.agent_index = SpatialIndex(
+            cell_size=max((a.vision_radius for a in agents), default=5))
         for a in agents:
-            for b in agents:
-                if a is not b:
-                    a.relationships.setdefault(b.name, 0)
+            self.agent_index.insert(a, a.x, a.y)
+            a.spatial_index = self.agent_index
+        self._update_active_area()
+
+        # relationships start at 0: Agent.update_relationship reads a missing
+        # entry as 0, so no N x N table is filled in up front
 
     # overseer
     def add_directive(self, text: str) -> None:
@@ -42,9 +81,11 @@ class SimulationManager:
     # utilities (message, and then cleaning the LLM)
     def add_message(self, text: str, speaker: Optional[str] = None) -> None:
         line = f"{speaker}: {text}" if speaker else text
-        self.message_log.append(line)
-        if len(self.message_log) > 20:
-            self.message_log.pop(0)
+        with self._log_lock:
+            self.message_log.append(line)
+            self.message_count += 1
+            if len(self.message_log) > 20:
+                self.message_log.pop(0)
 
     @staticmethod
     def clean_llm_output(text: str) -> str:
@@ -55,18 +96,38 @@ class SimulationManager:
                 text = text[4:].strip()
         return text
 
+    @property
+    def world_size(self):
+        # (width, height) of the environment, for the prompts' bounds rules
+        return self.environment.width, self.environment.height
+
     # daily planning for each new day
     # (24 hours, many more time steps likely)
-    def update_daily_plans(self, now):
-        """Generate daily plans (one per agent) concurrently; no overseer input."""
-        self.daily_ready = False
-
+    def _daily_plan_inputs(self, now):
         env_summary = (self.environment.get_layout_summary()
                        if hasattr(self.environment, "get_layout_summary")
                        else f"{self.environment.width}×{self.environment.height} grid")
 
         pending = [a for a in self.agents
                    if getattr(a, "daily_plan_date", None) != now.date()]
+        return env_summary, pending
+
+    def _apply_daily_plan(self, ag, raw, now):
+        if not raw:
+            return
+        try:
+            plan = json.loads(self.clean_llm_output(raw))
+            ag.daily_plan      = plan.get("daily_plan", "")
+            ag.daily_plan_date = now.date()
+            self.add_message("New daily plan set.", ag.name)
+        except Exception as e:
+            telemetry.mark(ag.name, self.step_count, JSON_ERROR)
+            print(f"Daily-plan JSON error for {ag.name}:", e, file=sys.stderr)
+
+    def update_daily_plans(self, now):
+        """Generate daily plans (one per agent) concurrently; no overseer input."""
+        self.daily_ready = False
+        env_summary, pending = self._daily_plan_inputs(now)
 
         # everyone already has today’s plan
         if not pending:            
@@ -76,73 +137,206 @@ class SimulationManager:
         date_str = now.strftime("%Y-%m-%d")
 
         # run LLM calls in parallel
-        with ThreadPoolExecutor(max_workers=len(pending)) as tp:
+        with tracing.span("daily_plans", agents=len(pending)), \
+                ThreadPoolExecutor(max_workers=len(pending)) as tp:
             fut_map = {
                 tp.submit(
                     generate_daily_action_plan,
                     date_str,
                     env_summary,
                     ag,
-                    getattr(ag, "daily_plan", "")     # prev_daily_plan
+                    getattr(ag, "daily_plan", ""),    # prev_daily_plan
                     # (no overseer_directives arg)
+                    tick=self.step_count,
+                    world_size=self.world_size
                 ): ag for ag in pending
             }
             for fut in fut_map:
-                ag = fut_map[fut]
-                try:
-                    raw = fut.result()
-                    if not raw:
-                        continue
-                    plan = json.loads(self.clean_llm_output(raw))
-                    ag.daily_plan      = plan.get("daily_plan", "")
-                    ag.daily_plan_date = now.date()
-                    self.add_message("New daily plan set.", ag.name)
-                except Exception as e:
-                    print(f"Daily-plan JSON error for {ag.name}:", e)
+                self._apply_daily_plan(fut_map[fut], fut.result(), now)
 
         # daily done, time for micro
         self.daily_ready = True
 
+    async def update_daily_plans_async(self, now):
+        """Async twin of update_daily_plans; all calls share one event loop."""
+        self.daily_ready = False
+        env_summary, pending = self._daily_plan_inputs(now)
+        if not pending:
+            self.daily_ready = True
+            return
+
+        date_str = now.strftime("%Y-%m-%d")
+        with tracing.span("daily_plans", agents=len(pending)):
+            raws = await asyncio.gather(*(
+                generate_daily_action_plan_async(
+                    date_str, env_summary, ag, getattr(ag, "daily_plan", ""),
+                    tick=self.step_count, world_size=self.world_size)
+                for ag in pending
+            ))
+            for ag, raw in zip(pending, raws):
+                self._apply_daily_plan(ag, raw, now)
+
+        self.daily_ready = True
+
     # micro planning
     def update_agent(self, ag, now, directives):
-        vision    = ag.get_visible_entities(self.environment, self.agents)
+        self._update_agents_threaded([ag], now, directives)
+
+    def _walk_queues(self, agents, directives):
+        # vision for every agent first, then queued moves taken here on the
+        # calling thread, so worker threads never move an agent while others
+        # read the spatial index; -> [(agent, vision)] that need a new plan
+        visions = []
+        for ag in agents:
+            with tracing.span("vision", agent=ag.name):
+                visions.append((ag, ag.get_visible_entities(self.environment, self.agents)))
+        return [(ag, vision) for ag, vision in visions
+                if not self._follow_queue(ag, vision, directives)]
+
+    def _plan_agent(self, ag, now, directives, vision):
+        # the agent's new plan (worker threads: moves nothing)
+        with tracing.span("plan_agent", agent=ag.name, tick=self.step_count):
+            return self._request_plan(ag, now, directives, vision)
+
+    def _request_plan(self, ag, now, directives, vision, tick=None):
+        # the LLM call on its own (safe on worker threads, mutates nothing)
         prev_plan = getattr(ag, "prev_action_plan", "")
-        raw = generate_action_plan(
+        return generate_action_plan(
             now.strftime("%H:%M"), vision, ag, prev_plan,
-            directives                        # pass only micro-step directives
+            directives,                       # pass only micro-step directives
+            self.plan_horizon,
+            tick=self.step_count if tick is None else tick,
+            world_size=self.world_size
         )
-        # failsafe, no plan - don't act
-        if not raw:
-            return
 
-        try:
-            plan = json.loads(self.clean_llm_output(raw))
-            direction = plan.get("direction")
-            speech    = plan.get("speech", "").strip()
-        except Exception as e:
-            print("Step JSON error:", e); return
+    async def update_agent_async(self, ag, now, directives):
+        await self._update_agents_gathered([ag], now, directives)
+
+    async def _plan_agent_async(self, ag, now, directives, vision):
+        with tracing.span("plan_agent", agent=ag.name, tick=self.step_count):
+            prev_plan = getattr(ag, "prev_action_plan", "")
+            return await generate_action_plan_async(
+                now.strftime("%H:%M"), vision, ag, prev_plan, directives,
+                self.plan_horizon, tick=self.step_count, world_size=self.world_size
+            )
 
+    # multi-step plans
+    def _needs_replan(self, ag, vision, directives):
+        # re-plan when the queue ran out, a directive the plan hasn't seen
+        # arrived, or an agent came into view since last tick
+        in_view = {a["name"] for a in vision["agents"]}
+        new_agent = bool(in_view - ag.seen_agents)
+        ag.seen_agents = in_view
+        new_directive = any(d not in ag.plan_directives for d in directives)
+        return not ag.move_queue or new_agent or new_directive
+
+    def _follow_queue(self, ag, vision, directives):
+        # take the next queued move without an LLM call; False means plan now
+        if self._needs_replan(ag, vision, directives):
+            ag.clear_moves()
+            return False
+        return self._take_queued_move(ag)
+
+    def _take_queued_move(self, ag):
+        direction = ag.move_queue.popleft()
+        if self._is_legal_move(ag, direction):
+            ag.move(direction)
+            return True
+
+        ag.clear_moves()
+        fb = f"ILLEGAL MOVE by {ag.name}: {direction} into non-walkable tile."
+        ag.prev_action_plan = fb
+        self.add_message(fb)
+        return False
+
+    @staticmethod
+    def _target(ag, direction):
         # candidate coordinates
         nx, ny = ag.x, ag.y
         if   direction == "up"   : ny += 1
         elif direction == "down" : ny -= 1
         elif direction == "left" : nx -= 1
         elif direction == "right": nx += 1
+        return nx, ny
+
+    def _is_legal_move(self, ag, direction):
+        nx, ny = self._target(ag, direction)
 
         # bounds & walkability check
         legal_move = False
         if 0 <= nx < self.environment.width and 0 <= ny < self.environment.height:
             tgt_tile = self.environment.grid[ny][nx]
             legal_move = getattr(tgt_tile, "walkable", False)
+        return legal_move
 
-        if legal_move:
+    def _legal_moves(self, moves):
+        # [(agent, direction), ...] -> [bool, ...] in one map query when the
+        # environment can answer for many cells at once (Map.are_walkable)
+        if not moves:
+            return []
+        if not hasattr(self.environment, "are_walkable"):
+            return [self._is_legal_move(ag, d) for ag, d in moves]
+        targets = [self._target(ag, d) for ag, d in moves]
+        ok = self.environment.are_walkable([t[0] for t in targets],
+                                           [t[1] for t in targets])
+        return [bool(v) for v in ok]
+
+    def _parse_action_plan(self, ag, raw):
+        # -> (direction, speech, moves), or None when there is nothing to apply
+        # failsafe, no plan - don't act
+        if not raw:
+            return None
+
+        try:
+            plan = json.loads(self.clean_llm_output(raw))
+            direction = plan.get("direction")
+            speech    = plan.get("speech", "").strip()
+            moves     = []
+            if self.plan_horizon > 1:
+                moves = [m for m in plan.get("moves") or [] if m in DIRECTIONS]
+                moves = moves[:self.plan_horizon]
+                if moves:
+                    direction = moves[0]
+        except Exception as e:
+            telemetry.mark(ag.name, self.step_count, JSON_ERROR)
+            print("Step JSON error:", e, file=sys.stderr); return None
+        return direction, speech, moves
+
+    def _apply_action_plan(self, ag, raw, directives=()):
+        parsed = self._parse_action_plan(ag, raw)
+        if parsed is not None:
+            self._apply_parsed_plan(ag, raw, parsed,
+                                    self._is_legal_move(ag, parsed[0]), directives)
+
+    def _apply_action_plans(self, plans, directives=()):
+        # apply a tick's worth of [(agent, raw), ...] with every move
+        # validated against the map in one go
+        parsed = []
+        with tracing.span("parse_plans", plans=len(plans)):
+            for ag, raw in plans:
+                p = self._parse_action_plan(ag, raw)
+                if p is not None:
+                    parsed.append((ag, raw, p))
+        with tracing.span("validate_moves", moves=len(parsed)):
+            legal = self._legal_moves([(ag, p[0]) for ag, _, p in parsed])
+        with tracing.span("apply_moves", moves=len(parsed)):
+            for (ag, raw, p), ok in zip(parsed, legal):
+                self._apply_parsed_plan(ag, raw, p, ok, directives)
+
+    def _apply_parsed_plan(self, ag, raw, parsed, legal, directives=()):
+        direction, speech, moves = parsed
+        if legal:
             ag.move(direction)
+            ag.queue_moves(moves[1:])
+            ag.plan_directives  = set(directives)
             ag.prev_action_plan = raw
             ag.speech           = speech
             if speech:
                 self.add_message(speech, ag.name)
         else:
             fb = f"ILLEGAL MOVE by {ag.name}: {direction} into non-walkable tile."
+            telemetry.mark(ag.name, self.step_count, ILLEGAL_MOVE)
+            ag.clear_moves()
             ag.prev_action_plan = fb
             self.add_message(fb)
 
@@ -152,18 +346,160 @@ class SimulationManager:
             if other is not ag and other.name.lower() in sl:
                 ag.update_relationship(other, 5)
 
+    # batched micro planning
+    def _batch_inputs(self, directives):
+        # agents still walking a multi-step plan move now; the rest get batched
+        entries = [(ag, vision, getattr(ag, "prev_action_plan", ""))
+                   for ag, vision in self._walk_queues(self.agents, directives)]
+        return list(split_action_batches(entries, self.batch_size))
+
+    def _apply_batch(self, batch, raw, directives):
+        # apply every plan the batch answered; returns agents it left out
+        by_name = {}
+        if raw:
+            try:
+                plans = json.loads(self.clean_llm_output(raw))
+                if isinstance(plans, dict):
+                    plans = [plans]
+                by_name = {p["name"]: p for p in plans
+                           if isinstance(p, dict) and "name" in p}
+            except Exception as e:
+                for (ag, _, _), _ in batch:
+                    telemetry.mark(ag.name, self.step_count, JSON_ERROR)
+                print("Batch JSON error:", e, file=sys.stderr)
+
+        missing, plans = [], []
+        for (ag, _, _), _ in batch:
+            plan = by_name.get(ag.name)
+            if plan is None:
+                missing.append(ag)
+            else:
+                plans.append((ag, json.dumps(plan)))
+        self._apply_action_plans(plans, directives)
+        return missing
+
+    def update_agents_batched(self, now, directives):
+        batches  = self._batch_inputs(directives)
+        if not batches:
+            return
+        sim_time = now.strftime("%H:%M")
+        with tracing.span("batch_plans", batches=len(batches)), \
+                ThreadPoolExecutor(max_workers=len(batches)) as tp:
+            raws = list(tp.map(
+                lambda b: generate_batch_action_plan(sim_time, b, directives,
+                                                     self.plan_horizon,
+                                                     tick=self.step_count,
+                                                     world_size=self.world_size),
+                batches))
+
+        missing = []
+        for batch, raw in zip(batches, raws):
+            missing += self._apply_batch(batch, raw, directives)
+
+        # failed or partial batches fall back to one call per agent
+        if missing:
+            self._update_agents_threaded(missing, now, directives)
+
+    def _update_agents_threaded(self, agents, now, directives):
+        # LLM calls on one thread per agent, then every move applied at once
+        pending = self._walk_queues(agents, directives)
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=len(pending)) as tp:
+            raws = list(tp.map(lambda p: self._plan_agent(p[0], now, directives, p[1]), pending))
+        self._apply_action_plans([(ag, r) for (ag, _), r in zip(pending, raws) if r is not None],
+                                 directives)
+
+    async def update_agents_batched_async(self, now, directives):
+        batches  = self._batch_inputs(directives)
+        sim_time = now.strftime("%H:%M")
+        raws = await asyncio.gather(*(
+            generate_batch_action_plan_async(sim_time, b, directives,
+                                             self.plan_horizon,
+                                             tick=self.step_count,
+                                             world_size=self.world_size)
+            for b in batches))
+
+        missing = []
+        for batch, raw in zip(batches, raws):
+            missing += self._apply_batch(batch, raw, directives)
+        await self._update_agents_gathered(missing, now, directives)
+
+    async def _update_agents_gathered(self, agents, now, directives):
+        pending = self._walk_queues(agents, directives)
+        raws = await asyncio.gather(*(self._plan_agent_async(ag, now, directives, vision)
+                                      for ag, vision in pending))
+        self._apply_action_plans([(ag, r) for (ag, _), r in zip(pending, raws) if r is not None],
+                                 directives)
+
     # ---------------------------------------------------------------- main step
     def step(self):
+        if self.scheduler is not None:
+            self.scheduler.step()
+            return
+
+        started = time.perf_counter()
         now = self.time_manager.advance()
         self.step_count += 1
-        self.update_daily_plans(now)                 # daily plans get *no* directives
+        with tracing.span("tick", tick=self.step_count, agents=len(self.agents)):
+            self.update_daily_plans(now)             # daily plans get *no* directives
 
-        # list of texts still alive
-        current_dir = [d["text"] for d in self.overseer_directives]
+            # list of texts still alive
+            current_dir = [d["text"] for d in self.overseer_directives]
 
-        with ThreadPoolExecutor(max_workers=len(self.agents)) as tp:
-            tp.map(lambda a: self.update_agent(a, now, current_dir), self.agents)
+            if self.batch_planning:
+                self.update_agents_batched(now, current_dir)
+            else:
+                self._update_agents_threaded(self.agents, now, current_dir)
+
+            self._expire_directives()
+            self._update_active_area()
+        metrics.tick_done(time.perf_counter() - started)
+
+    async def step_async(self):
+        """Async twin of step: agent calls are awaited on one event loop
+        (capped by llm.set_max_concurrency) instead of one thread per agent."""
+        started = time.perf_counter()
+        now = self.time_manager.advance()
+        self.step_count += 1
+        with tracing.span("tick", tick=self.step_count, agents=len(self.agents)):
+            await self.update_daily_plans_async(now)
+
+            current_dir = [d["text"] for d in self.overseer_directives]
+            if self.batch_planning:
+                await self.update_agents_batched_async(now, current_dir)
+            else:
+                await self._update_agents_gathered(self.agents, now, current_dir)
 
+            self._expire_directives()
+            self._update_active_area()
+        metrics.tick_done(time.perf_counter() - started)
+
+    def snapshot(self):
+        # immutable view of the world after the last step, for other threads
+        with self._log_lock:
+            messages = tuple(self.message_log)
+        return WorldSnapshot(
+            tick=self.step_count,
+            time=self.time_manager.current_time,
+            daily_ready=self.daily_ready,
+            agents=tuple(AgentState(a.name, a.x, a.y, a.speech) for a in self.agents),
+            directives=tuple(d["text"] for d in self.overseer_directives),
+            messages=messages,
+        )
+
+    def close(self):
+        # stop the pipelined scheduler's worker pool (in-flight calls are dropped)
+        if self.scheduler is not None:
+            self.scheduler.close()
+
+    def _update_active_area(self):
+        # chunked maps keep the chunks around agents loaded (see Map.update_active)
+        if hasattr(self.environment, "update_active"):
+            reach = max((a.vision_radius for a in self.agents), default=5) + 2
+            self.environment.update_active([(a.x, a.y) for a in self.agents], reach)
+
+    def _expire_directives(self):
         # decrement TTL and purge 
         # TTL only needed with overseer tasks,
         # ex. Overseer command lasts for 2 micro-plan turns in TLL = 2 (default)
@@ -171,31 +507,161 @@ class SimulationManager:
             d["ttl"] -= 1
         self.overseer_directives = [d for d in self.overseer_directives if d["ttl"] > 0]
 
-    # rendering
-    def render_agents(self, canvas, tile_size: int,
-                      sprite_map: dict[str, "tk.PhotoImage"]):
-        name_fnt   = tkFont.Font(family="Pixellari", size=8)
 
-        for ag in self.agents:
-            cx = ag.x * tile_size + tile_size // 2
-            cy = ag.y * tile_size + tile_size // 2
+class PipelinedScheduler:
+    """Runs SimulationManager ticks with next-tick LLM calls overlapped.
 
-            # sprite or fallback circle
-            sprite = sprite_map.get(ag.name)
-            if sprite:
-                canvas.create_image(cx, cy, image=sprite,
-                                    anchor="center", tags="agent_layer")
-            else:
-                r = tile_size // 3
-                canvas.create_oval(cx - r, cy - r, cx + r, cy + r,
-                                   fill="red", tags="agent_layer")
-
-            # name with outline
-            name_y = cy + tile_size // 2 + 4
-            for dx, dy in ((-1,0),(1,0),(0,-1),(0,1)):
-                canvas.create_text(cx+dx, name_y+dy, text=ag.name,
-                                   fill="black", font=name_fnt,
-                                   tags="agent_layer")
-            canvas.create_text(cx, name_y, text=ag.name,
-                               fill="white", font=name_fnt,
-                               tags="agent_layer")
+    An agent's inputs for tick t+1 (its own position and plan, plus the
+    position and speech of every agent that could be inside its vision) are
+    final once it and every agent within vision_radius + 2 tiles have
+    applied their tick-t move, since each side moves at most one tile per
+    tick. Agents are applied as their calls finish, and each agent whose
+    neighbourhood has settled gets its t+1 call started right away, so it
+    overlaps the rest of tick t, the UI render and any pacing sleep.
+    A prefetched call is dropped if the overseer directives change before
+    the next tick starts. No prefetching happens across midnight, because
+    daily plans change then.
+    """
+
+    def __init__(self, sim, max_workers=None, history=1000):
+        self.sim  = sim
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or max(1, len(sim.agents)))
+        self._prefetched = {}          # agent -> (now, directives, future or None)
+        self._lock = threading.Lock()
+
+        # metrics
+        self.inflight       = 0
+        self.peak_inflight  = 0
+        self.prefetch_hits  = 0
+        self.prefetch_stale = 0
+        self.tick_seconds   = deque(maxlen=history)
+
+    # in-flight accounting
+    def _submit(self, fn, *args):
+        with self._lock:
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+        fut = self.pool.submit(fn, *args)
+        fut.add_done_callback(self._done)
+        return fut
+
+    def _done(self, _):
+        with self._lock:
+            self.inflight -= 1
+
+    def _launch(self, ag, now, directives, tick):
+        # runs once ag's inputs for `now` are final; queued moves need no call
+        sim    = self.sim
+        with tracing.span("vision", agent=ag.name, tick=tick):
+            vision = ag.get_visible_entities(sim.environment, sim.agents)
+        if not sim._needs_replan(ag, vision, directives):
+            return None
+        ag.clear_moves()
+        return self._submit(sim._request_plan, ag, now, list(directives), vision, tick)
+
+    def _walk(self, ag, now, directives):
+        # take ag's queued move; an illegal one gets a new plan submitted
+        # (returned, to be applied with the other calls as it completes)
+        sim = self.sim
+        with tracing.span("apply_plan", agent=ag.name, tick=sim.step_count):
+            if sim._take_queued_move(ag):
+                return None
+            vision = ag.get_visible_entities(sim.environment, sim.agents)
+            return self._submit(sim._request_plan, ag, now, list(directives), vision,
+                                sim.step_count)
+
+    def _finish(self, ag, directives, fut):
+        sim = self.sim
+        with tracing.span("apply_plan", agent=ag.name, tick=sim.step_count):
+            sim._apply_action_plan(ag, fut.result(), directives)
+
+    def _neighbourhoods(self):
+        # agents whose tick-t moves can change each agent's t+1 vision
+        # (kept symmetric so settling one agent updates both sides)
+        agents = self.sim.agents
+        index  = self.sim.agent_index
+        hood   = {ag: {ag} for ag in agents}
+        for a in agents:
+            for b in index.query(a.x, a.y, a.vision_radius + 2):
+                hood[a].add(b)
+                hood[b].add(a)
+        return hood
+
+    def step(self):
+        sim = self.sim
+        started = time.perf_counter()
+
+        now = sim.time_manager.advance()
+        sim.step_count += 1
+        with tracing.span("tick", tick=sim.step_count, agents=len(sim.agents)):
+            sim.update_daily_plans(now)
+
+            directives = tuple(d["text"] for d in sim.overseer_directives)
+            decisions  = {}
+            for ag in sim.agents:
+                pre = self._prefetched.pop(ag, None)
+                if pre is not None and pre[0] == now and pre[1] == directives:
+                    self.prefetch_hits += 1
+                    decisions[ag] = pre[2]
+                else:
+                    if pre is not None:
+                        self.prefetch_stale += 1
+                        if pre[2] is not None:
+                            pre[2].cancel()
+                    decisions[ag] = self._launch(ag, now, directives, sim.step_count)
+
+            # what tick t+1 will most likely see
+            next_now = now + sim.time_manager.time_step
+            next_dir = tuple(d["text"] for d in sim.overseer_directives if d["ttl"] > 1)
+            prefetch = next_now.date() == now.date()
+
+            hood    = self._neighbourhoods()
+            waiting = {ag: len(hood[ag]) for ag in sim.agents}
+
+            def settle(ag):
+                for other in hood[ag]:
+                    waiting[other] -= 1
+                    if waiting[other] == 0 and prefetch:
+                        self._prefetched[other] = (next_now, next_dir,
+                                                   self._launch(other, next_now, next_dir,
+                                                                sim.step_count + 1))
+
+            # queue-walkers first (no waiting), then LLM calls as they complete
+            by_future = {}
+            for ag, fut in decisions.items():
+                if fut is None:
+                    fut = self._walk(ag, now, directives)
+                    if fut is None:
+                        settle(ag)
+                        continue
+                by_future[fut] = ag
+            for fut in as_completed(by_future):
+                ag = by_future[fut]
+                self._finish(ag, directives, fut)
+                settle(ag)
+
+            sim._expire_directives()
+            sim._update_active_area()
+        self.tick_seconds.append(time.perf_counter() - started)
+        metrics.tick_done(self.tick_seconds[-1])
+
+    def metrics(self) -> dict:
+        ticks = list(self.tick_seconds)
+        return {
+            "ticks": len(ticks),
+            "last_tick_s": ticks[-1] if ticks else 0.0,
+            "mean_tick_s": sum(ticks) / len(ticks) if ticks else 0.0,
+            "max_tick_s": max(ticks) if ticks else 0.0,
+            "inflight": self.inflight,
+            "peak_inflight": self.peak_inflight,
+            "prefetched": len(self._prefetched),
+            "prefetch_hits": self.prefetch_hits,
+            "prefetch_stale": self.prefetch_stale,
+        }
+
+    def close(self):
+        for _, _, fut in self._prefetched.values():
+            if fut is not None:
+                fut.cancel()
+        self._prefetched.clear()
+        self.pool.shutdown(wait=False, cancel_futures=True)
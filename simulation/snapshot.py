@@ -0,0 +1,50 @@
+# simulation/snapshot.py
+# Immutable per-tick views of the simulation for readers on other threads
+# (the Tk window). The sim thread builds one snapshot after each step and
+# publishes it into a SnapshotSlot; readers only ever see whole snapshots.
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class AgentState:
+    name: str
+    x: int
+    y: int
+    speech: str
+
+
+@dataclass(frozen=True)
+class WorldSnapshot:
+    tick: int
+    time: datetime
+    daily_ready: bool
+    agents: tuple               # AgentState, in sim order
+    directives: tuple           # overseer directive texts still alive
+    messages: tuple = ()        # the message log at the end of the tick
+
+    def positions(self):
+        return {a.name: (a.x, a.y) for a in self.agents}
+
+
+class SnapshotSlot:
+    # double buffer: (previous, current, publish times) swapped in with one
+    # reference assignment, so the reader needs no lock and never sees a
+    # half-updated pair
+    def __init__(self, snapshot=None):
+        now = time.perf_counter()
+        self._pair = (snapshot, snapshot, now, now)
+
+    def publish(self, snapshot):
+        _, cur, _, cur_at = self._pair
+        self._pair = (cur if cur is not None else snapshot, snapshot,
+                      cur_at, time.perf_counter())
+
+    def latest(self):
+        return self._pair[1]
+
+    def read(self):
+        # -> (previous, current, previous published at, current published at)
+        return self._pair
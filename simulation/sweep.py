@@ -0,0 +1,226 @@
+# simulation/sweep.py
+# Scenario sweeps: every combination of a config grid runs as its own
+# SimulationManager in a process pool, all workers sharing one LLM budget.
+#   python -m GenerativeAgents.simulation.sweep sweep.json --out results.csv --workers 4 --llm-budget 32
+#
+# sweep.json:
+#   {
+#     "steps": 144,
+#     "repeats": 1,
+#     "base": {"time_step": 10, "start_time": "2025-06-01T06:00", "plan_horizon": 1,
+#              "map": "town", "map_storage": "objects"},
+#     "grid": {
+#       "agent_specs": {"town": null, "shy_farmers": [["Ada", "Farmer", 29, "Shy", 2, 2]]},
+#       "time_step": [5, 10],
+#       "directives": [{}, {"6": ["Everyone meet at the store"]}]
+#     }
+#   }
+# A grid axis is a list of values or a {label: value} dict; list entries that
+# are not plain scalars are labelled by their index in the output.
+
+import sys
+import json
+import time
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from GenerativeAgents.llm import llm
+from GenerativeAgents.simulation.scenario import build_simulation
+
+# keys build_simulation understands directly; everything else is a
+# SimulationManager option (plan_horizon, batch_planning, ...)
+SCENARIO_KEYS = ("agent_specs", "start_time", "time_step", "directives", "map", "map_storage")
+
+COLUMNS = ("scenario", "repeat", "tick", "time", "agent", "x", "y", "speech")
+
+
+def _axis(values):
+    # -> [(label, value), ...]
+    if isinstance(values, dict):
+        return list(values.items())
+    return [(v if isinstance(v, (str, int, float, bool)) or v is None else i, v)
+            for i, v in enumerate(values)]
+
+
+def expand_grid(config):
+    # one scenario dict per combination of grid values (times repeats)
+    base  = dict(config.get("base", {}))
+    grid  = config.get("grid", {})
+    names = list(grid)
+    axes  = [_axis(grid[n]) for n in names]
+    scenarios = []
+    for combo in itertools.product(*axes):
+        params = dict(base)
+        labels = {}
+        for name, (label, value) in zip(names, combo):
+            params[name] = value
+            labels[name] = label
+        for repeat in range(config.get("repeats", 1)):
+            scenarios.append({
+                "id": len(scenarios),
+                "repeat": repeat,
+                "params": params,
+                "labels": labels,
+            })
+    return scenarios
+
+
+def _init_worker(limiter, backend, backend_options):
+    # runs once per worker process; options without a backend name apply
+    # to the LLM_BACKEND one
+    if backend or backend_options:
+        llm.set_backend(backend, **backend_options)
+    llm.set_global_limiter(limiter)
+
+
+def run_scenario(scenario, steps):
+    # one world, start to finish, inside a worker; returns columns + a summary
+    params = dict(scenario["params"])
+    directives = {int(k): v for k, v in (params.pop("directives", None) or {}).items()}
+    options = {k: v for k, v in params.items() if k not in SCENARIO_KEYS}
+    sim = build_simulation(params.get("agent_specs"), params.get("start_time"),
+                           params.get("time_step", 10),
+                           map_file=params.get("map"),
+                           map_storage=params.get("map_storage", "objects"),
+                           **options)
+
+    # workers run many scenarios: each repeat is its own sample, so none of
+    # them may be answered from another scenario's (or repeat's) cached replies
+    llm.set_cache_scope(f"scenario{scenario['id']}/repeat{scenario['repeat']}")
+    llm.telemetry.reset()
+    columns = {c: [] for c in COLUMNS}
+    started = time.perf_counter()
+    try:
+        for _ in range(steps):
+            for text in directives.get(sim.step_count + 1, []):
+                sim.add_directive(text)
+            sim.step()
+            stamp = sim.time_manager.current_time.isoformat(timespec="minutes")
+            for ag in sim.agents:
+                columns["scenario"].append(scenario["id"])
+                columns["repeat"].append(scenario["repeat"])
+                columns["tick"].append(sim.step_count)
+                columns["time"].append(stamp)
+                columns["agent"].append(ag.name)
+                columns["x"].append(ag.x)
+                columns["y"].append(ag.y)
+                columns["speech"].append(ag.speech)
+    finally:
+        sim.close()
+        llm.set_cache_scope(None)
+
+    telemetry = llm.telemetry.summary()
+    summary = {
+        "scenario": scenario["id"],
+        "repeat": scenario["repeat"],
+        "labels": scenario["labels"],
+        "ticks": sim.step_count,
+        "wall_s": time.perf_counter() - started,
+        "llm_calls": telemetry["calls"],
+        "cached_calls": telemetry["cached_calls"],
+        "cost_usd": telemetry["cost_usd"],
+        "outcomes": telemetry["outcomes"],
+        "agent_outcomes": telemetry["agent_outcomes"],
+    }
+    return columns, summary
+
+
+def run_sweep(config, workers=None, llm_budget=16, backend=None, backend_options=None,
+              progress=None):
+    # returns (columns, summaries) for every scenario, merged in scenario order
+    scenarios = expand_grid(config)
+    steps = config.get("steps", 100)
+    label_names = list(config.get("grid", {}))
+
+    with multiprocessing.Manager() as manager:
+        limiter = manager.BoundedSemaphore(llm_budget)
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_worker,
+                                 initargs=(limiter, backend, backend_options or {})) as pool:
+            futures = {pool.submit(run_scenario, sc, steps): sc for sc in scenarios}
+            results = {}
+            for fut in as_completed(futures):
+                sc = futures[fut]
+                results[sc["id"]] = fut.result()
+                if progress:
+                    progress(len(results), len(scenarios), results[sc["id"]][1])
+
+    columns = {c: [] for c in list(COLUMNS) + label_names}
+    summaries = []
+    for sc in scenarios:
+        cols, summary = results[sc["id"]]
+        rows = len(cols["tick"])
+        for c in COLUMNS:
+            columns[c].extend(cols[c])
+        for name in label_names:
+            columns[name].extend([sc["labels"][name]] * rows)
+        summaries.append(summary)
+    return columns, summaries
+
+
+def write_columns(columns, path):
+    # .parquet needs pyarrow; anything else is written as CSV
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Writing .parquet needs pyarrow (pip install pyarrow), or use a .csv path")
+        # labels can mix types across axes, keep them as text
+        table = pa.table({k: v if k in COLUMNS else [str(x) for x in v]
+                          for k, v in columns.items()})
+        pq.write_table(table, path)
+        return
+
+    import csv
+    names = list(columns)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(names)
+        writer.writerows(zip(*(columns[n] for n in names)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a grid of scenarios in parallel")
+    parser.add_argument("config", help="sweep config JSON")
+    parser.add_argument("--out", default="sweep.csv", help=".csv or .parquet")
+    parser.add_argument("--summary", help="write per-scenario summaries as JSON")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--llm-budget", type=int, default=16,
+                        help="LLM calls in flight across all workers")
+    parser.add_argument("--backend", help="openai | local | stub (default: LLM_BACKEND)")
+    parser.add_argument("--base-url", help="endpoint for the local backend")
+    parser.add_argument("--latency", help="stub latency spec (implies --backend stub)")
+    args = parser.parse_args(argv)
+    # --latency only means something to the stub, so it implies it
+    backend = args.backend or ("stub" if args.latency else None)
+    if args.latency and backend != "stub":
+        parser.error("--latency needs the stub backend")
+    if args.base_url and backend == "stub":
+        parser.error("--base-url does not apply to the stub backend")
+
+    with open(args.config, encoding="utf-8") as f:
+        config = json.load(f)
+    options = {}
+    if args.base_url:
+        options["base_url"] = args.base_url
+    if args.latency:
+        options["latency"] = args.latency
+
+    def progress(done, total, summary):
+        print(f"[{done}/{total}] scenario {summary['scenario']} {summary['labels']}: "
+              f"{summary['ticks']} ticks in {summary['wall_s']:.1f}s, "
+              f"{summary['llm_calls']} calls", file=sys.stderr)
+
+    columns, summaries = run_sweep(config, args.workers, args.llm_budget,
+                                   backend, options, progress)
+    write_columns(columns, args.out)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
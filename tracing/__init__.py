@@ -0,0 +1,83 @@
+# tracing/__init__.py
+# Per-tick tracing for the simulation, the LLM layer and the UI:
+#
+#   from GenerativeAgents import tracing
+#   tracing.enable()
+#   with tracing.span("tick", tick=n):
+#       ...
+#   tracing.export_chrome("trace.json")    # open in ui.perfetto.dev
+#
+# Set GA_TRACE=trace.json to trace a whole run and write the file at exit.
+
+import os
+import atexit
+import functools
+import asyncio
+
+from .tracer import Tracer, Span, NULL_SPAN
+
+tracer = Tracer()
+
+
+def enabled():
+    return tracer.enabled
+
+
+def enable(max_events=None):
+    tracer.enable(max_events)
+
+
+def disable():
+    tracer.disable()
+
+
+def clear():
+    tracer.clear()
+
+
+def span(name, cat="sim", **args):
+    # context manager; args end up in the trace (agent, tick, ...)
+    if not tracer.enabled:
+        return NULL_SPAN
+    return Span(tracer, name, cat, args)
+
+
+def instant(name, cat="sim", **args):
+    tracer.instant(name, cat, **args)
+
+
+def traced(name=None, cat="sim"):
+    # decorator: the whole call as one span, named after the function
+    def wrap(fn):
+        label = name or fn.__qualname__
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def run_async(*args, **kwargs):
+                if not tracer.enabled:
+                    return await fn(*args, **kwargs)
+                with Span(tracer, label, cat, {}):
+                    return await fn(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            if not tracer.enabled:
+                return fn(*args, **kwargs)
+            with Span(tracer, label, cat, {}):
+                return fn(*args, **kwargs)
+        return run
+    return wrap
+
+
+def export_chrome(path):
+    return tracer.export_chrome(path)
+
+
+def _trace_from_env():
+    path = os.getenv("GA_TRACE")
+    if path:
+        enable()
+        atexit.register(export_chrome, path)
+
+
+_trace_from_env()
@@ -0,0 +1,154 @@
+# tracing/tracer.py
+# Spans for finding out where a tick's time goes. A span records its name,
+# start, duration, thread and a few args; spans on one thread nest by time.
+# Spans opened inside an asyncio task are recorded as async events keyed by
+# the task, because tasks on one thread interleave. Export is Chrome Trace
+# Event JSON, which Perfetto (ui.perfetto.dev), chrome://tracing and
+# speedscope open directly.
+#
+# While disabled, span() hands back one shared no-op object, so leaving the
+# calls in hot paths costs a function call and an attribute check.
+
+import json
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start", "task")
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.task = None
+
+    def set(self, **args):
+        # add args once the span is open (eg whether a call was a cache hit)
+        self.args.update(args)
+
+    def __enter__(self):
+        try:
+            asyncio.get_running_loop()
+            self.task = asyncio.current_task()
+        except RuntimeError:
+            pass
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._record(self, end)
+        return False
+
+
+class Tracer:
+    def __init__(self, max_events=1_000_000):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)   # oldest dropped when full
+        self.threads = {}                        # thread id -> name
+        self._lock = threading.Lock()
+        self._epoch = time.perf_counter_ns()
+
+    def enable(self, max_events=None):
+        if max_events is not None:
+            with self._lock:
+                self.events = deque(self.events, maxlen=max_events)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.threads.clear()
+            self._epoch = time.perf_counter_ns()
+
+    def span(self, name, cat="sim", **args):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, cat, args)
+
+    def instant(self, name, cat="sim", **args):
+        if self.enabled:
+            self._append(("i", name, cat, time.perf_counter_ns(), 0, args, None))
+
+    def _record(self, span, end):
+        task_id = id(span.task) if span.task is not None else None
+        self._append(("X", span.name, span.cat, span.start, end - span.start,
+                      span.args, task_id))
+
+    def _append(self, event):
+        thread = threading.current_thread()
+        tid = thread.ident
+        with self._lock:
+            if tid not in self.threads:
+                self.threads[tid] = thread.name
+            self.events.append(event + (tid,))
+
+    # export
+    def trace_events(self):
+        # -> Chrome Trace Event dicts (timestamps in microseconds)
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self.threads)
+        out = [{"ph": "M", "name": "thread_name", "pid": pid, "tid": tid,
+                "args": {"name": name}} for tid, name in threads.items()]
+        for ph, name, cat, start, dur, args, task_id, tid in events:
+            ts = (start - self._epoch) / 1000
+            if ph == "i":
+                out.append({"ph": "i", "s": "t", "name": name, "cat": cat,
+                            "ts": ts, "pid": pid, "tid": tid, "args": args})
+            elif task_id is None:
+                out.append({"ph": "X", "name": name, "cat": cat, "ts": ts,
+                            "dur": dur / 1000, "pid": pid, "tid": tid, "args": args})
+            else:
+                # async begin/end pair, nested per asyncio task
+                base = {"name": name, "cat": cat, "pid": pid, "tid": tid,
+                        "id2": {"local": hex(task_id)}}
+                out.append(dict(base, ph="b", ts=ts, args=args))
+                out.append(dict(base, ph="e", ts=ts + dur / 1000))
+        out.sort(key=lambda e: e.get("ts", -1))
+        return out
+
+    def export_chrome(self, path):
+        # -> number of events written
+        events = self.trace_events()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+    def totals(self):
+        # name -> (count, seconds), over the complete spans recorded
+        out = {}
+        with self._lock:
+            events = list(self.events)
+        for ph, name, _, _, dur, _, _, _ in events:
+            if ph == "X":
+                n, secs = out.get(name, (0, 0.0))
+                out[name] = (n + 1, secs + dur / 1e9)
+        return out
@@ -0,0 +1,90 @@
+# ui/camera.py
+# The part of the world the simulation window shows. Positions are in
+# tiles; (x, y) is the world point at the window's top-left corner. Each
+# zoom level is a whole tile size in pixels, so tile and sprite images can
+# be scaled once per level and reused.
+
+import math
+
+ZOOM_LEVELS = (0.25, 0.5, 1.0, 2.0)
+
+
+class Camera:
+    def __init__(self, world_w, world_h, view_w, view_h, tile_size=32,
+                 zoom=1.0, levels=ZOOM_LEVELS):
+        self.world_w, self.world_h = world_w, world_h
+        self.view_w, self.view_h = view_w, view_h          # pixels
+        self.tile_size = tile_size
+        self.levels = tuple(sorted(levels))
+        self.level = min(range(len(self.levels)), key=lambda i: abs(self.levels[i] - zoom))
+        self.x = self.y = 0.0
+        self.version = 0          # bumped on every change, for redraw checks
+        self._clamp()
+
+    @property
+    def zoom(self):
+        return self.levels[self.level]
+
+    @property
+    def tile_px(self):
+        return max(1, round(self.tile_size * self.zoom))
+
+    def view_tiles(self):
+        # window size in (fractional) tiles at the current zoom
+        return self.view_w / self.tile_px, self.view_h / self.tile_px
+
+    def _clamp(self):
+        # keep the view on the world; a world smaller than the window is centred
+        vw, vh = self.view_tiles()
+        self.x = (self.world_w - vw) / 2 if vw >= self.world_w else min(max(self.x, 0.0), self.world_w - vw)
+        self.y = (self.world_h - vh) / 2 if vh >= self.world_h else min(max(self.y, 0.0), self.world_h - vh)
+        self.version += 1
+
+    def pan(self, dx, dy):
+        # by screen pixels
+        self.x += dx / self.tile_px
+        self.y += dy / self.tile_px
+        self._clamp()
+
+    def center_on(self, x, y):
+        vw, vh = self.view_tiles()
+        self.x, self.y = x - vw / 2, y - vh / 2
+        self._clamp()
+
+    def zoom_by(self, steps, px=None, py=None):
+        # change zoom level, keeping the world point under screen (px, py)
+        # (default: the window centre) where it is
+        level = min(max(self.level + steps, 0), len(self.levels) - 1)
+        if level == self.level:
+            return False
+        px = self.view_w / 2 if px is None else px
+        py = self.view_h / 2 if py is None else py
+        wx, wy = self.to_world(px, py)
+        self.level = level
+        self.x, self.y = wx - px / self.tile_px, wy - py / self.tile_px
+        self._clamp()
+        return True
+
+    def resize(self, view_w, view_h):
+        if (view_w, view_h) != (self.view_w, self.view_h):
+            self.view_w, self.view_h = view_w, view_h
+            self._clamp()
+
+    def to_screen(self, x, y):
+        return (x - self.x) * self.tile_px, (y - self.y) * self.tile_px
+
+    def to_world(self, px, py):
+        return self.x + px / self.tile_px, self.y + py / self.tile_px
+
+    def visible(self, margin=0):
+        # (x0, y0, x1, y1) tiles on screen, plus margin tiles, clipped to the world
+        vw, vh = self.view_tiles()
+        return (max(0, math.floor(self.x) - margin),
+                max(0, math.floor(self.y) - margin),
+                min(self.world_w, math.ceil(self.x + vw) + margin),
+                min(self.world_h, math.ceil(self.y + vh) + margin))
+
+    def contains(self, x, y, margin=1):
+        vw, vh = self.view_tiles()
+        return (self.x - margin <= x < self.x + vw + margin and
+                self.y - margin <= y < self.y + vh + margin)
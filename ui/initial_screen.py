@@ -3,6 +3,7 @@
 import os
 import tkinter as tk
 from tkinter import messagebox
+from GenerativeAgents.environment import atlas
 from GenerativeAgents.ui.simulation_screen import run_simulation, agent_specs
 
 BASE_DIR   = os.path.dirname(os.path.abspath(__file__))
@@ -51,15 +52,8 @@ def show_help():
         row = tk.Frame(scroll_frame, pady=5)
         row.pack(fill="x", padx=10)
 
-        img_path = os.path.join(ASSETS_DIR, f"{name}.png")
-        try:
-            photo = tk.PhotoImage(file=img_path)
-            ow, oh = photo.width(), photo.height()
-            factor = max(1, ow // 64, oh // 64)
-            if factor > 1:
-                photo = photo.subsample(factor, factor)
-        except Exception:
-            photo = None
+        # 64-px portrait from the shared texture atlas
+        photo = atlas.get_atlas(64).photo(name.lower(), master=win)
 
         if photo:
             lbl_img = tk.Label(row, image=photo)
@@ -0,0 +1,321 @@
+# ui/renderer.py
+# Retained-mode drawing for the simulation window: canvas items for each
+# agent, the clock and the speech log are created once and then moved or
+# re-texted only when what they show changes, so a frame costs about the
+# number of agents that moved rather than the number of agents. With a
+# Camera only the visible part of the map is composited, and agents out of
+# view are hidden, so the cost follows the window rather than the world.
+
+from collections import OrderedDict
+
+import tkinter.font as tkFont
+
+from GenerativeAgents import tracing
+
+OUTLINE = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+# helper: pixel-accurate wrapper
+# correct for device specific
+def wrap_pixel(text: str, max_px: int, font: tkFont.Font) -> list[str]:
+    words, lines, cur = text.split(), [], ""
+    for w in words:
+        trial = (cur + " " + w).strip()
+        if font.measure(trial) <= max_px:
+            cur = trial
+        else:
+            if cur:
+                lines.append(cur)
+            cur = w
+    if cur:
+        lines.append(cur)
+    return lines or [""]
+
+
+class TextLayoutCache:
+    # wrap_pixel without the Tk round trip per growing prefix: each word's
+    # width is measured once per font, a line's width is the sum of its
+    # words and spaces, and whole layouts are kept per (font, width, text),
+    # least recently used dropped first. Fonts are told apart by name, so a
+    # font reconfigured after use needs clear().
+    def __init__(self, max_layouts=1024, max_words=8192):
+        self.max_layouts = max_layouts
+        self.max_words = max_words
+        self._layouts = OrderedDict()    # (font name, max_px, text) -> lines
+        self._widths = OrderedDict()     # (font name, word) -> px
+        self.hits = self.misses = self.measures = 0
+
+    def measure(self, font, text):
+        key = (str(font), text)
+        px = self._widths.get(key)
+        if px is None:
+            px = self._widths[key] = font.measure(text)
+            self.measures += 1
+            if len(self._widths) > self.max_words:
+                self._widths.popitem(last=False)
+        else:
+            self._widths.move_to_end(key)
+        return px
+
+    def wrap(self, text, max_px, font):
+        key = (str(font), max_px, text)
+        lines = self._layouts.get(key)
+        if lines is not None:
+            self._layouts.move_to_end(key)
+            self.hits += 1
+            return lines
+        self.misses += 1
+        space = self.measure(font, " ")
+        lines, cur, cur_px = [], [], 0
+        for w in text.split():
+            w_px = self.measure(font, w)
+            if cur and cur_px + space + w_px > max_px:
+                lines.append(" ".join(cur))
+                cur, cur_px = [w], w_px
+            else:
+                cur_px += (space if cur else 0) + w_px
+                cur.append(w)
+        if cur:
+            lines.append(" ".join(cur))
+        lines = lines or [""]
+        self._layouts[key] = lines
+        if len(self._layouts) > self.max_layouts:
+            self._layouts.popitem(last=False)
+        return lines
+
+    def clear(self):
+        self._layouts.clear()
+        self._widths.clear()
+
+
+class OutlinedText:
+    # white text with a 1-px black outline: five canvas items kept together
+    def __init__(self, canvas, x, y, font, anchor="nw", tags=(), width=0):
+        self.canvas = canvas
+        self.text = ""
+        self.pos = (x, y)
+        self.items = [canvas.create_text(x + dx, y + dy, anchor=anchor, text="",
+                                         fill="black", font=font, tags=tags)
+                      for dx, dy in OUTLINE]
+        self.items.append(canvas.create_text(x, y, anchor=anchor, text="", fill="white",
+                                             font=font, width=width, tags=tags))
+
+    def set_text(self, text):
+        if text != self.text:
+            for item in self.items:
+                self.canvas.itemconfigure(item, text=text)
+            self.text = text
+
+    def move_to(self, x, y):
+        if (x, y) != self.pos:
+            for item in self.items:
+                self.canvas.move(item, x - self.pos[0], y - self.pos[1])
+            self.pos = (x, y)
+
+    def show(self, visible=True):
+        state = "normal" if visible else "hidden"
+        for item in self.items:
+            self.canvas.itemconfigure(item, state=state)
+
+
+class AgentSprite:
+    # an agent's sprite (or fallback circle) plus its outlined name label
+    # (no label when font is None, eg when zoomed far out)
+    def __init__(self, canvas, name, sprite, tile_size, font):
+        self.canvas = canvas
+        self.tag = f"agent:{name}"
+        self.pos = (0.0, 0.0)        # screen pixels of the tile's top-left corner
+        self.visible = True
+        tags = ("agent_layer", self.tag)
+        cx = cy = tile_size // 2
+        if sprite:
+            canvas.create_image(cx, cy, image=sprite, anchor="center", tags=tags)
+        else:
+            r = max(1, tile_size // 3)
+            canvas.create_oval(cx - r, cy - r, cx + r, cy + r, fill="red", tags=tags)
+        if font is not None:
+            label = OutlinedText(canvas, cx, cy + tile_size // 2 + 4, font,
+                                 anchor="center", tags=tags)
+            label.set_text(name)
+
+    def move_to(self, px, py):
+        # floats allowed, for interpolation between tiles
+        dx, dy = px - self.pos[0], py - self.pos[1]
+        if dx or dy:
+            self.canvas.move(self.tag, dx, dy)
+            self.pos = (px, py)
+
+    def show(self, visible=True):
+        if visible != self.visible:
+            self.canvas.itemconfigure(self.tag, state="normal" if visible else "hidden")
+            self.visible = visible
+
+    def delete(self):
+        self.canvas.delete(self.tag)
+
+
+class SimulationRenderer:
+    # camera: a ui.camera.Camera for pan/zoom; without one the world is
+    # drawn unscrolled at tile_size
+    # sprite_loader(name, px): the agent's image at another zoom level;
+    # without one sprite_map images are zoomed / subsampled
+    def __init__(self, canvas, tile_size, sprite_map, window_w, window_h,
+                 box_w=640, input_h=36, camera=None, sprite_loader=None):
+        self.canvas = canvas
+        self.tile_size = tile_size
+        self.sprite_map = sprite_map
+        self.sprite_loader = sprite_loader
+        self.camera = camera
+        self.window_w, self.window_h = window_w, window_h
+        self.box_w, self.input_h = box_w, input_h
+        self.pad, self.line_gap = 10, 2
+
+        # fonts are created once and shared by every item
+        self.name_fnt   = tkFont.Font(family="Pixellari", size=8)
+        self.clk_fnt    = tkFont.Font(family="Pixellari", size=24)
+        self.bold_fnt   = tkFont.Font(family="Pixellari", size=12, weight="bold")
+        self.normal_fnt = tkFont.Font(family="Pixellari", size=12)
+        self.wrap_px    = box_w - 2 * self.pad
+        self.line_h     = self.normal_fnt.metrics("linespace") + self.line_gap
+
+        self.agents = {}             # name -> AgentSprite
+        self._agent_px = tile_size   # tile size the sprites were built for
+        self._sprites = {}           # (name, tile px) -> scaled sprite image
+        self._map_key = None         # (tile px, composited region) on the canvas
+        self._map_version = None
+        self.clock = OutlinedText(canvas, window_w - 20, 20, self.clk_fnt,
+                                  anchor="ne", tags=("clock_layer",))
+        self.layout = TextLayoutCache()
+        self._speech_lines = []      # pooled (label, segment) OutlinedText pairs
+        self._speech_key = None
+        self._speech_msgs = []
+
+    def resize(self, window_w, window_h):
+        self.window_w, self.window_h = window_w, window_h
+        if self.camera is not None:
+            self.camera.resize(window_w, window_h)
+        self.clock.move_to(window_w - 20, 20)
+        self._speech_key = None
+        self.update_speech(self._speech_msgs)
+
+    # map
+    def update_map(self, game_map, margin=None):
+        # composite the visible tiles (plus margin, default half a window)
+        # into the background; panning inside that area only moves the image
+        cam = self.camera
+        if cam is None:
+            if self._map_key is None:
+                game_map.render_map(self.canvas, tile_size=self.tile_size)
+                self._map_key = (self.tile_size, None)
+            return
+        if cam.version == self._map_version:
+            return
+        self._map_version = cam.version
+        px = cam.tile_px
+        inner = cam.visible()
+        key = self._map_key
+        if (key is None or key[0] != px or not
+                (key[1][0] <= inner[0] and key[1][1] <= inner[1] and
+                 key[1][2] >= inner[2] and key[1][3] >= inner[3])):
+            if margin is None:
+                vw, vh = cam.view_tiles()
+                margin = int(max(vw, vh) // 2) + 1
+            region = cam.visible(margin)
+            with tracing.span("render_map", cat="ui", tile_px=px):
+                game_map.render_map(self.canvas, tile_size=px, region=region,
+                                    origin=cam.to_screen(region[0], region[1]), persist=False)
+            self._map_key = key = (px, region)
+        self.canvas.coords("map_layer", *cam.to_screen(key[1][0], key[1][1]))
+
+    # agents
+    def _sprite(self, name, px):
+        # the agent's sprite at px, from sprite_loader or scaled by whole
+        # factors (tk.PhotoImage zoom / subsample), built once per zoom level
+        key = (name, px)
+        if key not in self._sprites:
+            base = self.sprite_map.get(name)
+            if self.sprite_loader is not None and px != self.tile_size:
+                img = self.sprite_loader(name, px)
+            elif base is None or px == self.tile_size:
+                img = base
+            elif px > self.tile_size:
+                img = base.zoom(max(1, px // self.tile_size))
+            else:
+                img = base.subsample(max(1, self.tile_size // px))
+            self._sprites[key] = img
+        return self._sprites[key]
+
+    def update_agents(self, positions):
+        # positions: {name: (x, y)} in tiles; agents out of view are hidden
+        cam = self.camera
+        px = cam.tile_px if cam is not None else self.tile_size
+        if px != self._agent_px:
+            # new zoom level: sprites are rebuilt at the new size
+            for sprite in self.agents.values():
+                sprite.delete()
+            self.agents.clear()
+            self._agent_px = px
+        font = self.name_fnt if px >= 16 else None
+        for name, (x, y) in positions.items():
+            sprite = self.agents.get(name)
+            if cam is not None and not cam.contains(x, y):
+                if sprite is not None:
+                    sprite.show(False)
+                continue
+            if sprite is None:
+                sprite = self.agents[name] = AgentSprite(
+                    self.canvas, name, self._sprite(name, px), px, font)
+            sx, sy = cam.to_screen(x, y) if cam is not None else (x * px, y * px)
+            sprite.move_to(sx, sy)
+            sprite.show(True)
+        for name in [n for n in self.agents if n not in positions]:
+            self.agents.pop(name).delete()
+
+    # clock
+    def update_clock(self, text):
+        self.clock.set_text(text)
+
+    # speech log (lower-right)
+    def update_speech(self, raw_msgs):
+        # raw_msgs: [(label, body), ...]; relaid only when the text changes
+        key = tuple(raw_msgs)
+        if key == self._speech_key:
+            return
+        self._speech_key = key
+        self._speech_msgs = raw_msgs
+        with tracing.span("layout_speech", cat="ui", messages=len(raw_msgs)):
+            self._layout_speech(raw_msgs)
+
+    def _layout_speech(self, raw_msgs):
+        # messages unchanged since the last tick reuse their cached layout
+        lines = []
+        for lab, body in raw_msgs:
+            name_px = self.layout.measure(self.bold_fnt, lab + " ") if lab else 0
+            for idx, seg in enumerate(self.layout.wrap(body, self.wrap_px - name_px, self.normal_fnt)):
+                lines.append((lab if idx == 0 else "", seg, name_px))
+
+        total_h = len(lines) * self.line_h + 2 * self.pad
+        x0 = self.window_w - self.box_w - 10            # 10-px right margin
+        y = self.window_h - self.input_h - total_h + self.pad
+
+        while len(self._speech_lines) < len(lines):
+            tags = ("speech_log_layer",)
+            self._speech_lines.append((
+                OutlinedText(self.canvas, x0, y, self.bold_fnt, tags=tags),
+                OutlinedText(self.canvas, x0, y, self.normal_fnt, tags=tags,
+                             width=self.wrap_px),
+            ))
+        for i, (label, seg) in enumerate(self._speech_lines):
+            if i >= len(lines):
+                label.show(False)
+                seg.show(False)
+                continue
+            lab, text, n_px = lines[i]
+            label.set_text(lab)
+            label.move_to(x0 + self.pad, y)
+            label.show(bool(lab))
+            seg.set_text(text)
+            seg.move_to(x0 + self.pad + n_px, y)
+            seg.show(True)
+            y += self.line_h
+        self.canvas.tag_raise("speech_log_layer")
@@ -1,37 +1,45 @@
 # ui/simulation_screen.py
-import os
 import time
-import textwrap
 import tkinter as tk
-import tkinter.font as tkFont
 from datetime import timedelta
 from threading import Thread
 
-from GenerativeAgents.environment.map      import Map
+from GenerativeAgents                      import tracing
+from GenerativeAgents.environment.map      import Map, DEFAULT_LAYOUT
+from GenerativeAgents.environment          import atlas
 from GenerativeAgents.simulation.sim_manager import SimulationManager
 from GenerativeAgents.agents.agent         import Agent
+from GenerativeAgents.simulation.scenario  import DEFAULT_AGENT_SPECS
+from GenerativeAgents.simulation.snapshot  import SnapshotSlot
+from GenerativeAgents.simulation.pacing    import TickPacer
+from GenerativeAgents.simulation           import metrics
+from GenerativeAgents.ui.renderer         import SimulationRenderer
+from GenerativeAgents.ui.camera           import Camera, ZOOM_LEVELS
 
 # create agents, used in init screen as well
-agent_specs = [
-        ("Ada",   "Farmer",    29, "Smart",      2,  2),
-        ("Gus",   "Fisherman", 32, "Shy",        5,  5),
-        ("Clara", "ShopOwner", 40, "Friendly",   8,  2),
-        ("Otto",  "ShopOwner",  4, "Persuasive",10,  6),
-        ("Alan",  "Farmer",    57, "Grumpy",    14,  4),
-        ("Olive", "Artisan",   30, "Creative",  17,  8),
-        ("Mavis", "Farmer",    25, "Bubbly",    20, 9),
-        ("Finn",  "Student",    9, "Hyper",     24, 9)
-    ]
+agent_specs = DEFAULT_AGENT_SPECS
 
 # main entry
-def run_simulation() -> None:
+# fps: how often the window redraws (agents glide between tiles in between)
+# pacing / ratio: see simulation.pacing; the default is about one 10-minute
+# tick every half second
+# map_file / map_storage: see Map.from_file; maps bigger than the screen are
+# viewed through a camera (drag to pan, wheel to zoom, arrow keys, +/-)
+def run_simulation(fps: int = 30, pacing: str = "realtime", ratio: float = 1200.0,
+                   map_file=None, map_storage: str = "objects",
+                   pipelined: bool = True) -> None:
+    # pipelined=False runs the plain per-tick scheduler instead of the
+    # PipelinedScheduler (see SimulationManager)
     # create tk window of sim itself
     sim_root = tk.Tk()
 
     sim_root.title("Generative Agents Simulation – Map")
     tile_size = 32
-    map_width, map_height = 48, 27
-    window_w, window_h = map_width * tile_size, map_height * tile_size
+    game_map = Map.from_file(map_file or DEFAULT_LAYOUT, storage=map_storage)
+    map_width, map_height = game_map.width, game_map.height
+    # the whole map when it fits, else most of the screen
+    window_w = min(map_width * tile_size, int(sim_root.winfo_screenwidth() * 0.9))
+    window_h = min(map_height * tile_size, int(sim_root.winfo_screenheight() * 0.85))
     sim_root.geometry(f"{window_w}x{window_h}")
 
     # static canvas + map
@@ -39,126 +47,129 @@ def run_simulation() -> None:
                        bd=0, highlightthickness=0)
     canvas.pack(fill=tk.BOTH, expand=True)
 
-    game_map = Map(width=map_width, height=map_height)
-    game_map.render_map(canvas, tile_size=tile_size)
-
     # agents
     agents = [Agent(*spec, vision_radius=5) for spec in agent_specs]
 
-    # sprite map
-    base_dir   = os.path.dirname(os.path.abspath(__file__))
-    assets_dir = os.path.join(base_dir, "..", "assets")
-    sprite_map: dict[str, tk.PhotoImage] = {}
-
+    # every tile and sprite size the zoom levels need, built (or loaded
+    # from the disk cache) in one pass before anything is drawn
+    atlases = atlas.prepare(sorted({max(1, round(tile_size * z)) for z in ZOOM_LEVELS}))
 
-    # render agents to map, this is hard
-    for name, *_ in agent_specs:
-        p = os.path.join(assets_dir, f"{name}.png")
-        try:
-            img = tk.PhotoImage(file=p)
-            # down-sample so it fits in one 32×32 tile
-            sx = max(1, img.width()  // tile_size)
-            sy = max(1, img.height() // tile_size)
-            if sx > 1 or sy > 1:
-                img = img.subsample(sx, sy)
-            sprite_map[name] = img
-        except Exception:
-            sprite_map[name] = None
+    # sprite map
+    sprite_map: dict[str, tk.PhotoImage] = {
+        name: atlases[tile_size].photo(name.lower()) for name, *_ in agent_specs}
 
     # simulation manager
     sim_manager = SimulationManager(
         agents=agents,
         environment=game_map,
-        time_step=timedelta(minutes=10)
+        time_step=timedelta(minutes=10),
+        pipelined=pipelined         # next tick's calls overlap render + sleep
     )
-
-    # helper: pixel-accurate wrapper
-    # correct for device specific
-    def wrap_pixel(text: str, max_px: int, font: tkFont.Font) -> list[str]:
-        words, lines, cur = text.split(), [], ""
-        for w in words:
-            trial = (cur + " " + w).strip()
-            if font.measure(trial) <= max_px:
-                cur = trial
-            else:
-                if cur:
-                    lines.append(cur)
-                cur = w
-        if cur:
-            lines.append(cur)
-        return lines or [""]
-
-    # UI update
-    def update_ui() -> None:
-        canvas.delete("agent_layer", "clock_layer", "speech_log_layer")
-
-        # agents & bubbles
-        sim_manager.render_agents(canvas, tile_size, sprite_map)
-
-        # outlined clock (top-right)
-        clock_txt = sim_manager.time_manager.current_time.strftime("%H:%M")
-        clk_fnt   = tkFont.Font(family="Pixellari", size=24)
-        cx, cy = window_w - 20, 20
-        for dx, dy in ((-1,0),(1,0),(0,-1),(0,1)):
-            canvas.create_text(cx+dx, cy+dy, anchor="ne",
-                            text=clock_txt, fill="black",
-                            font=clk_fnt, tags="clock_layer")
-        canvas.create_text(cx, cy, anchor="ne",
-                        text=clock_txt, fill="white",
-                        font=clk_fnt, tags="clock_layer")
-
-        # transparent speech area (lower-right)
-        pad, line_gap, box_w = 10, 2, 640
-        bold_fnt   = tkFont.Font(family="Pixellari", size=12, weight="bold")
-        normal_fnt = tkFont.Font(family="Pixellari", size=12)
-        wrap_px    = box_w - 2*pad
-        line_h     = normal_fnt.metrics("linespace") + line_gap
-
-        if sim_manager.daily_ready:
-            raw_msgs = [(f"{a.name}:", a.speech.strip() or "…")
-                        for a in sorted(sim_manager.agents,
-                                        key=lambda a: a.name.lower())]
-        else:
-            raw_msgs = [("", "Generating daily plans …")]
-
-        lines: list[tuple[str, str, int]] = []
-        for lab, body in raw_msgs:
-            name_px = bold_fnt.measure(lab + " ") if lab else 0
-            for idx, seg in enumerate(
-                wrap_pixel(body, wrap_px - name_px, normal_fnt)
-            ):
-                lines.append((lab if idx == 0 else "", seg, name_px))
-
-        total_h = len(lines) * line_h + 2*pad
-        input_h = 36                            # height of overseer entry box
-        x0 = window_w - box_w - 10              # 10-px right margin
-        y0 = window_h - input_h - total_h  # 0-px gap above entry box ( -x appended if x was px gap)
-        y  = y0 + pad
-
-        def draw_outlined(tx, ty, text, font, fg="white"):
-            for dx, dy in ((-1,0),(1,0),(0,-1),(0,1)):
-                canvas.create_text(tx+dx, ty+dy, anchor="nw",
-                                text=text, font=font, fill="black",
-                                tags="speech_log_layer")
-            canvas.create_text(tx, ty, anchor="nw",
-                            text=text, font=font, fill=fg,
-                            width=wrap_px, tags="speech_log_layer")
-
-        for lab, seg, n_px in lines:
-            if lab:
-                draw_outlined(x0+pad,        y, lab, bold_fnt)
-            draw_outlined(x0+pad+n_px, y, seg, normal_fnt)
-            y += line_h
-
-    # background simulation thread to prevent UI freezes
+    # live metrics when GA_METRICS_PORT / GA_METRICS_FILE are set
+    exposure = metrics.expose(sim_manager)
+
+    # camera over the map, starting on the agents
+    camera = Camera(map_width, map_height, window_w, window_h, tile_size)
+    camera.center_on(sum(a.x for a in agents) / len(agents) + 0.5,
+                     sum(a.y for a in agents) / len(agents) + 0.5)
+
+    # retained canvas items for map, agents, clock and speech log
+    renderer = SimulationRenderer(canvas, tile_size, sprite_map, window_w, window_h,
+                                  camera=camera,
+                                  sprite_loader=lambda name, px: atlas.get_atlas(px).photo(name.lower()))
+    renderer.update_map(game_map)
+
+    # the sim thread publishes a snapshot per tick; the window only reads them
+    slot  = SnapshotSlot(sim_manager.snapshot())
+    pacer = TickPacer(pacing, ratio)
+    tick_seconds = sim_manager.time_manager.time_step.total_seconds()
+    frame_ms = max(1, round(1000 / fps))
+
+    # UI update: agents are drawn between the last two snapshots, so a move
+    # takes about as long as the tick that produced it
+    drawn = None
+
+    def render_frame() -> None:
+        nonlocal drawn
+        started = time.perf_counter()
+        with tracing.span("frame", cat="ui"):
+            prev, cur, prev_at, cur_at = slot.read()
+            span = cur_at - prev_at
+            t = 1.0 if span <= 0 else min(1.0, (time.perf_counter() - cur_at) / span)
+            before = prev.positions()
+            positions = {}
+            for a in cur.agents:
+                x0, y0 = before.get(a.name, (a.x, a.y))
+                positions[a.name] = (x0 + (a.x - x0) * t, y0 + (a.y - y0) * t)
+            renderer.update_map(game_map)
+            renderer.update_agents(positions)
+
+            if cur is not drawn:
+                drawn = cur
+                renderer.update_clock(cur.time.strftime("%H:%M"))
+                if cur.daily_ready:
+                    raw_msgs = [(f"{a.name}:", a.speech.strip() or "…")
+                                for a in sorted(cur.agents, key=lambda a: a.name.lower())]
+                else:
+                    raw_msgs = [("", "Generating daily plans …")]
+                renderer.update_speech(raw_msgs)
+        metrics.frame_seconds.observe(time.perf_counter() - started)
+        sim_root.after(frame_ms, render_frame)
+
+    # background simulation thread to prevent UI freezes; the manager is
+    # closed here, once the last step is over, never under a running step
     def sim_loop() -> None:
-        while True:
-            sim_manager.step()
-            sim_root.after(0, update_ui)
-            time.sleep(0.5)
-
-    Thread(target=sim_loop, daemon=True).start()
-    update_ui()
+        try:
+            while True:
+                started = time.perf_counter()
+                sim_manager.step()
+                with tracing.span("publish_snapshot"):
+                    slot.publish(sim_manager.snapshot())
+                with tracing.span("pace"):
+                    running = pacer.wait(started, tick_seconds)
+                if not running:
+                    break
+        finally:
+            sim_manager.close()
+
+    sim_thread = Thread(target=sim_loop, daemon=True)
+    sim_thread.start()
+    render_frame()
+
+    # camera controls; the next frame redraws whatever they changed
+    drag = {}
+
+    def on_press(e):
+        canvas.focus_set()
+        drag["pos"] = (e.x, e.y)
+
+    def on_drag(e):
+        x, y = drag.get("pos", (e.x, e.y))
+        camera.pan(x - e.x, y - e.y)
+        drag["pos"] = (e.x, e.y)
+
+    def on_wheel(e):
+        # Windows / macOS send <MouseWheel> with a delta, X11 buttons 4 and 5
+        up = e.num == 4 or getattr(e, "delta", 0) > 0
+        camera.zoom_by(1 if up else -1, e.x, e.y)
+
+    def on_resize(e):
+        if (e.width, e.height) != (renderer.window_w, renderer.window_h):
+            renderer.resize(e.width, e.height)
+
+    canvas.bind("<ButtonPress-1>", on_press)
+    canvas.bind("<B1-Motion>", on_drag)
+    canvas.bind("<MouseWheel>", on_wheel)
+    canvas.bind("<Button-4>", on_wheel)
+    canvas.bind("<Button-5>", on_wheel)
+    canvas.bind("<Configure>", on_resize)
+    step = tile_size * 4
+    for key, (dx, dy) in {"<Left>": (-step, 0), "<Right>": (step, 0),
+                          "<Up>": (0, -step), "<Down>": (0, step)}.items():
+        canvas.bind(key, lambda e, dx=dx, dy=dy: camera.pan(dx, dy))
+    canvas.bind("<plus>", lambda e: camera.zoom_by(1))
+    canvas.bind("<equal>", lambda e: camera.zoom_by(1))
+    canvas.bind("<minus>", lambda e: camera.zoom_by(-1))
 
     # overseer input box
     input_frame = tk.Frame(sim_root)
@@ -179,6 +190,25 @@ def run_simulation() -> None:
             font=("Pixellari", 12), command=send_cmd).pack(side="left", padx=4)
     entry.bind("<Return>", send_cmd)
 
+    # pause / resume the sim thread (the window keeps drawing)
+    def toggle_pause():
+        pacer.toggle_pause()
+        pause_btn.config(text="Resume" if pacer.paused else "Pause")
+
+    pause_btn = tk.Button(input_frame, text="Resume" if pacer.paused else "Pause",
+                          font=("Pixellari", 12), command=toggle_pause)
+    pause_btn.pack(side="left")
+
+    def on_close():
+        # the sim thread stops after its current step; a step still waiting
+        # on the LLM after the timeout finishes (or dies) with the process
+        pacer.stop()
+        sim_thread.join(timeout=2.0)
+        exposure.close()
+        sim_root.destroy()
+
+    sim_root.protocol("WM_DELETE_WINDOW", on_close)
+
     sim_root.mainloop()
 
 